@@ -8,4 +8,6 @@ if os.getenv('VERCEL_ENV') is None:
 
 # Create app with production database
 database_url = os.getenv('DATABASE_URL')
-app = create_app(database_url)
+# Optional read replica; read-only sessions are routed to it when set.
+replica_database_url = os.getenv('DATABASE_REPLICA_URL')
+app = create_app(database_url, replica_database_url)
@@ -10,6 +10,176 @@ export type HttpValidationError = {
     detail?: Array<ValidationError>;
 };
 
+/**
+ * MixtapeBatchError
+ */
+export type MixtapeBatchError = {
+    /**
+     * Status Code
+     * HTTP status code that getting the mixtape on its own would have returned
+     */
+    status_code: number;
+    /**
+     * Detail
+     */
+    detail: string;
+};
+
+/**
+ * MixtapeBatchItem
+ */
+export type MixtapeBatchItem = {
+    /**
+     * Public Id
+     */
+    public_id: string;
+    /**
+     * The mixtape, unless it could not be returned
+     */
+    mixtape?: MixtapeResponse | null;
+    /**
+     * Why the mixtape could not be returned, if it could not
+     */
+    error?: MixtapeBatchError | null;
+};
+
+/**
+ * MixtapeBatchResponse
+ */
+export type MixtapeBatchResponse = {
+    /**
+     * Results
+     * One result per requested public ID, in the order requested
+     */
+    results: Array<MixtapeBatchItem>;
+};
+
+/**
+ * MixtapeCompactResponse
+ * A mixtape as stored, with its tracks' Spotify URIs rather than their details.
+ */
+export type MixtapeCompactResponse = {
+    /**
+     * Public Id
+     */
+    public_id: string;
+    /**
+     * Name
+     */
+    name: string;
+    /**
+     * Intro Text
+     */
+    intro_text: string | null;
+    /**
+     * Subtitle1
+     */
+    subtitle1: string | null;
+    /**
+     * Subtitle2
+     */
+    subtitle2: string | null;
+    /**
+     * Subtitle3
+     */
+    subtitle3: string | null;
+    /**
+     * Is Public
+     */
+    is_public: boolean;
+    /**
+     * Create Time
+     */
+    create_time: string;
+    /**
+     * Last Modified Time
+     */
+    last_modified_time: string;
+    /**
+     * Stack Auth User Id
+     */
+    stack_auth_user_id: string | null;
+    /**
+     * Version
+     * Current version number of the mixtape
+     */
+    version: number;
+    /**
+     * Spotify Playlist Url
+     * Spotify playlist URL if exported to Spotify
+     */
+    spotify_playlist_url?: string | null;
+    /**
+     * Tracks
+     */
+    tracks: Array<MixtapeCompactTrackResponse>;
+    /**
+     * Can Undo
+     * Whether this mixtape can be undone
+     */
+    can_undo: boolean;
+    /**
+     * Can Redo
+     * Whether this mixtape can be redone
+     */
+    can_redo: boolean;
+};
+
+/**
+ * MixtapeCompactTrackResponse
+ */
+export type MixtapeCompactTrackResponse = {
+    /**
+     * Track Position
+     * Unique position of the track within the mixtape (1-based index)
+     */
+    track_position: number;
+    /**
+     * Track Text
+     * Optional text to display next to the track
+     */
+    track_text?: string | null;
+    /**
+     * Spotify Uri
+     * Spotify URI of the track
+     */
+    spotify_uri: string;
+};
+
+/**
+ * MixtapeInsertTrackOperation
+ */
+export type MixtapeInsertTrackOperation = {
+    /**
+     * Op
+     */
+    op: 'insert_track';
+    /**
+     * Track to insert at its track_position; the tracks from that position on move down by one
+     */
+    track: MixtapeTrackRequest;
+};
+
+/**
+ * MixtapeMoveTrackOperation
+ */
+export type MixtapeMoveTrackOperation = {
+    /**
+     * Op
+     */
+    op: 'move_track';
+    /**
+     * From Position
+     * Position of the track to move
+     */
+    from_position: number;
+    /**
+     * To Position
+     * Position to move the track to, as if it had first been removed
+     */
+    to_position: number;
+};
+
 /**
  * MixtapeOverview
  */
@@ -28,6 +198,37 @@ export type MixtapeOverview = {
     last_modified_time: string;
 };
 
+/**
+ * MixtapePatchRequest
+ */
+export type MixtapePatchRequest = {
+    /**
+     * Version
+     * Version the operations were made against; if set and the mixtape has moved on since, nothing is applied and 409 is returned
+     */
+    version?: number | null;
+    /**
+     * Operations
+     * Operations to apply, in order
+     */
+    operations: Array<MixtapeSetTextFieldOperation | MixtapeSetIsPublicOperation | MixtapeInsertTrackOperation | MixtapeMoveTrackOperation | MixtapeRemoveTrackOperation | MixtapeSetTrackTextOperation>;
+};
+
+/**
+ * MixtapeRemoveTrackOperation
+ */
+export type MixtapeRemoveTrackOperation = {
+    /**
+     * Op
+     */
+    op: 'remove_track';
+    /**
+     * Track Position
+     * Position of the track to remove; the tracks after it move up by one
+     */
+    track_position: number;
+};
+
 /**
  * MixtapeRequest
  */
@@ -127,6 +328,11 @@ export type MixtapeResponse = {
      * Tracks
      */
     tracks: Array<MixtapeTrackResponse>;
+    /**
+     * Track Count
+     * Number of tracks in the mixtape (which may be more than returned, if paged)
+     */
+    track_count: number;
     /**
      * Can Undo
      * Whether this mixtape can be undone
@@ -137,6 +343,103 @@ export type MixtapeResponse = {
      * Whether this mixtape can be redone
      */
     can_redo: boolean;
+    /**
+     * Is Partial
+     * Whether some tracks are placeholders (see MixtapeTrackResponse.is_placeholder) because Spotify was slow or unavailable; fetch the mixtape again later for the full details
+     */
+    is_partial?: boolean;
+};
+
+/**
+ * MixtapeSetIsPublicOperation
+ */
+export type MixtapeSetIsPublicOperation = {
+    /**
+     * Op
+     */
+    op: 'set';
+    /**
+     * Field
+     * Set whether the mixtape is public
+     */
+    field: 'is_public';
+    /**
+     * Value
+     * Whether the mixtape is public
+     */
+    value: boolean;
+};
+
+/**
+ * MixtapeSetTextFieldOperation
+ */
+export type MixtapeSetTextFieldOperation = {
+    /**
+     * Op
+     */
+    op: 'set';
+    /**
+     * Field
+     * Text field of the mixtape to set
+     */
+    field: 'name' | 'intro_text' | 'subtitle1' | 'subtitle2' | 'subtitle3';
+    /**
+     * Value
+     * New value of the field, with the same constraints as in MixtapeRequest
+     */
+    value: string | null;
+};
+
+/**
+ * MixtapeSetTrackTextOperation
+ */
+export type MixtapeSetTrackTextOperation = {
+    /**
+     * Op
+     */
+    op: 'set_track_text';
+    /**
+     * Track Position
+     * Position of the track
+     */
+    track_position: number;
+    /**
+     * Track Text
+     * New text to display next to the track
+     */
+    track_text: string | null;
+};
+
+/**
+ * MixtapeTrackPageResponse
+ * A single track of a mixtape, with what is needed to navigate to its neighbors.
+ */
+export type MixtapeTrackPageResponse = {
+    /**
+     * Public Id
+     */
+    public_id: string;
+    /**
+     * Version
+     * Current version number of the mixtape
+     */
+    version: number;
+    track: MixtapeTrackResponse;
+    /**
+     * Previous Track Position
+     * Position of the previous track, if any
+     */
+    previous_track_position: number | null;
+    /**
+     * Next Track Position
+     * Position of the next track, if any
+     */
+    next_track_position: number | null;
+    /**
+     * Track Count
+     * Number of tracks in the mixtape
+     */
+    track_count: number;
 };
 
 /**
@@ -178,6 +481,11 @@ export type MixtapeTrackResponse = {
      * Details about the track, such as name, artist, and Spotify URI.
      */
     track: TrackDetails;
+    /**
+     * Is Placeholder
+     * Whether the track's details could not be looked up in time, or the track no longer exists on Spotify, in which case only its ID and URI are set
+     */
+    is_placeholder?: boolean;
 };
 
 /**
@@ -347,6 +655,20 @@ export type AppHealthApiHealthAppGetResponses = {
     200: unknown;
 };
 
+export type GetMetricsApiHealthMetricsGetData = {
+    body?: never;
+    path?: never;
+    query?: never;
+    url: '/api/health/metrics';
+};
+
+export type GetMetricsApiHealthMetricsGetResponses = {
+    /**
+     * Successful Response
+     */
+    200: unknown;
+};
+
 export type SearchTracksApiSpotifySearchGetData = {
     body?: never;
     path?: never;
@@ -355,6 +677,11 @@ export type SearchTracksApiSpotifySearchGetData = {
          * Query
          */
         query: string;
+        /**
+         * Limit
+         * Most tracks to return
+         */
+        limit?: number;
     };
     url: '/api/spotify/search';
 };
@@ -505,6 +832,52 @@ export type ClaimMixtapeApiMixtapePublicIdClaimPostResponses = {
 
 export type ClaimMixtapeApiMixtapePublicIdClaimPostResponse = ClaimMixtapeApiMixtapePublicIdClaimPostResponses[keyof ClaimMixtapeApiMixtapePublicIdClaimPostResponses];
 
+export type GetMixtapesBatchApiMixtapeBatchGetData = {
+    body?: never;
+    path?: never;
+    query: {
+        /**
+         * Ids
+         * Comma-separated public IDs of the mixtapes to get (at most 50)
+         */
+        ids: string;
+        /**
+         * Album Image Width
+         * Only return the album image best matching this width (the smallest at least this wide, else the largest)
+         */
+        album_image_width?: number | null;
+        /**
+         * Track Offset
+         * Number of tracks (in order of position) to skip
+         */
+        track_offset?: number;
+        /**
+         * Track Limit
+         * Max number of tracks to return (default: all of them)
+         */
+        track_limit?: number | null;
+    };
+    url: '/api/mixtape/batch';
+};
+
+export type GetMixtapesBatchApiMixtapeBatchGetErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type GetMixtapesBatchApiMixtapeBatchGetError = GetMixtapesBatchApiMixtapeBatchGetErrors[keyof GetMixtapesBatchApiMixtapeBatchGetErrors];
+
+export type GetMixtapesBatchApiMixtapeBatchGetResponses = {
+    /**
+     * Successful Response
+     */
+    200: MixtapeBatchResponse;
+};
+
+export type GetMixtapesBatchApiMixtapeBatchGetResponse = GetMixtapesBatchApiMixtapeBatchGetResponses[keyof GetMixtapesBatchApiMixtapeBatchGetResponses];
+
 export type GetMixtapeApiMixtapePublicIdGetData = {
     body?: never;
     path: {
@@ -513,7 +886,23 @@ export type GetMixtapeApiMixtapePublicIdGetData = {
          */
         public_id: string;
     };
-    query?: never;
+    query?: {
+        /**
+         * Album Image Width
+         * Only return the album image best matching this width (the smallest at least this wide, else the largest)
+         */
+        album_image_width?: number | null;
+        /**
+         * Track Offset
+         * Number of tracks (in order of position) to skip
+         */
+        track_offset?: number;
+        /**
+         * Track Limit
+         * Max number of tracks to return (default: all of them)
+         */
+        track_limit?: number | null;
+    };
     url: '/api/mixtape/{public_id}';
 };
 
@@ -565,6 +954,204 @@ export type UpdateMixtapeApiMixtapePublicIdPutResponses = {
 
 export type UpdateMixtapeApiMixtapePublicIdPutResponse = UpdateMixtapeApiMixtapePublicIdPutResponses[keyof UpdateMixtapeApiMixtapePublicIdPutResponses];
 
+export type PatchMixtapeApiMixtapePublicIdPatchData = {
+    body: MixtapePatchRequest;
+    path: {
+        /**
+         * Public Id
+         */
+        public_id: string;
+    };
+    query?: never;
+    url: '/api/mixtape/{public_id}';
+};
+
+export type PatchMixtapeApiMixtapePublicIdPatchErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type PatchMixtapeApiMixtapePublicIdPatchError = PatchMixtapeApiMixtapePublicIdPatchErrors[keyof PatchMixtapeApiMixtapePublicIdPatchErrors];
+
+export type PatchMixtapeApiMixtapePublicIdPatchResponses = {
+    /**
+     * Successful Response
+     */
+    200: MixtapeResponse;
+};
+
+export type PatchMixtapeApiMixtapePublicIdPatchResponse = PatchMixtapeApiMixtapePublicIdPatchResponses[keyof PatchMixtapeApiMixtapePublicIdPatchResponses];
+
+export type GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetData = {
+    body?: never;
+    path: {
+        /**
+         * Public Id
+         */
+        public_id: string;
+        /**
+         * Version
+         * Version of the mixtape to get
+         */
+        version: number;
+    };
+    query?: {
+        /**
+         * Album Image Width
+         * Only return the album image best matching this width (the smallest at least this wide, else the largest)
+         */
+        album_image_width?: number | null;
+        /**
+         * Track Offset
+         * Number of tracks (in order of position) to skip
+         */
+        track_offset?: number;
+        /**
+         * Track Limit
+         * Max number of tracks to return (default: all of them)
+         */
+        track_limit?: number | null;
+    };
+    url: '/api/mixtape/{public_id}/versions/{version}';
+};
+
+export type GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetError = GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetErrors[keyof GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetErrors];
+
+export type GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetResponses = {
+    /**
+     * Successful Response
+     */
+    200: MixtapeResponse;
+};
+
+export type GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetResponse = GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetResponses[keyof GetMixtapeVersionApiMixtapePublicIdVersionsVersionGetResponses];
+
+export type StreamMixtapeApiMixtapePublicIdStreamGetData = {
+    body?: never;
+    path: {
+        /**
+         * Public Id
+         */
+        public_id: string;
+    };
+    query?: {
+        /**
+         * Album Image Width
+         * Only return the album image best matching this width (the smallest at least this wide, else the largest)
+         */
+        album_image_width?: number | null;
+        /**
+         * Track Offset
+         * Number of tracks (in order of position) to skip
+         */
+        track_offset?: number;
+        /**
+         * Track Limit
+         * Max number of tracks to return (default: all of them)
+         */
+        track_limit?: number | null;
+    };
+    url: '/api/mixtape/{public_id}/stream';
+};
+
+export type StreamMixtapeApiMixtapePublicIdStreamGetErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type StreamMixtapeApiMixtapePublicIdStreamGetError = StreamMixtapeApiMixtapePublicIdStreamGetErrors[keyof StreamMixtapeApiMixtapePublicIdStreamGetErrors];
+
+export type StreamMixtapeApiMixtapePublicIdStreamGetResponses = {
+    /**
+     * The mixtape, then its tracks, as JSON lines
+     */
+    200: unknown;
+};
+
+export type StreamMixtapeApiMixtapePublicIdStreamGetResponse = StreamMixtapeApiMixtapePublicIdStreamGetResponses[keyof StreamMixtapeApiMixtapePublicIdStreamGetResponses];
+
+export type GetMixtapeCompactApiMixtapePublicIdCompactGetData = {
+    body?: never;
+    path: {
+        /**
+         * Public Id
+         */
+        public_id: string;
+    };
+    query?: never;
+    url: '/api/mixtape/{public_id}/compact';
+};
+
+export type GetMixtapeCompactApiMixtapePublicIdCompactGetErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type GetMixtapeCompactApiMixtapePublicIdCompactGetError = GetMixtapeCompactApiMixtapePublicIdCompactGetErrors[keyof GetMixtapeCompactApiMixtapePublicIdCompactGetErrors];
+
+export type GetMixtapeCompactApiMixtapePublicIdCompactGetResponses = {
+    /**
+     * Successful Response
+     */
+    200: MixtapeCompactResponse;
+};
+
+export type GetMixtapeCompactApiMixtapePublicIdCompactGetResponse = GetMixtapeCompactApiMixtapePublicIdCompactGetResponses[keyof GetMixtapeCompactApiMixtapePublicIdCompactGetResponses];
+
+export type GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetData = {
+    body?: never;
+    path: {
+        /**
+         * Public Id
+         */
+        public_id: string;
+        /**
+         * Track Position
+         * Position of the track within the mixtape
+         */
+        track_position: number;
+    };
+    query?: {
+        /**
+         * Album Image Width
+         * Only return the album image best matching this width (the smallest at least this wide, else the largest)
+         */
+        album_image_width?: number | null;
+    };
+    url: '/api/mixtape/{public_id}/tracks/{track_position}';
+};
+
+export type GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetErrors = {
+    /**
+     * Validation Error
+     */
+    422: HttpValidationError;
+};
+
+export type GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetError = GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetErrors[keyof GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetErrors];
+
+export type GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetResponses = {
+    /**
+     * Successful Response
+     */
+    200: MixtapeTrackPageResponse;
+};
+
+export type GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetResponse = GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetResponses[keyof GetMixtapeTrackApiMixtapePublicIdTracksTrackPositionGetResponses];
+
 export type UndoMixtapeApiMixtapePublicIdUndoPostData = {
     body?: never;
     path: {
@@ -33,6 +33,7 @@ const fakeMixtape: MixtapeResponse = {
   subtitle2: null,
   subtitle3: null,
   is_public: false,
+  track_count: 0,
   can_undo: false,
   can_redo: false,
   version: 1,
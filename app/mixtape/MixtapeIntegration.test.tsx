@@ -80,6 +80,7 @@ const fakeMixtape: MixtapeResponse = {
   subtitle2: null,
   subtitle3: null,
   is_public: false,
+  track_count: 0,
   can_undo: false,
   can_redo: false,
   version: 1,
@@ -98,6 +99,7 @@ const existingMixtape: MixtapeResponse = {
   subtitle2: null,
   subtitle3: null,
   is_public: true,
+  track_count: 1,
   can_undo: false,
   can_redo: false,
   version: 3,
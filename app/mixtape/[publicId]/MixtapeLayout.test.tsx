@@ -69,6 +69,7 @@ const fakeMixtape: MixtapeResponse = {
   subtitle2: 'Subtitle 2',
   subtitle3: 'Subtitle 3',
   is_public: false,
+  track_count: 1,
   can_undo: true,
   can_redo: false,
   version: 5,
@@ -32,6 +32,7 @@ describe('EditButton', () => {
     create_time: '',
     last_modified_time: '',
     tracks: [],
+    track_count: 0,
     can_undo: true,
     can_redo: false,
     version: 5,
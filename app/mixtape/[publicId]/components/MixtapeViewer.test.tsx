@@ -26,6 +26,7 @@ const mockMixtape: MixtapeResponse = {
   subtitle2: 'Subtitle 2',
   subtitle3: 'Subtitle 3',
   is_public: true,
+  track_count: 1,
   can_undo: true,
   can_redo: false,
   version: 5,
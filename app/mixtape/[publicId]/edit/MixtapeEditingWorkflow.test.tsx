@@ -116,6 +116,7 @@ const mockMixtapeData: MixtapeResponse = {
       },
     },
   ],
+  track_count: 1,
   can_undo: true,
   can_redo: false,
   version: 5,
@@ -186,6 +186,7 @@ const mockMixtapeData: MixtapeResponse = {
       track: mockTrackDetails,
     },
   ],
+  track_count: 1,
   can_undo: true,
   can_redo: false,
   version: 5,
@@ -209,6 +210,7 @@ const mockAnonymousMixtapeData: MixtapeResponse = {
       track: mockTrackDetails,
     },
   ],
+  track_count: 1,
   can_undo: true,
   can_redo: false,
   version: 5,
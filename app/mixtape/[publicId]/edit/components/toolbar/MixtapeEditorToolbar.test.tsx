@@ -55,6 +55,7 @@ const mockMixtape: MixtapeResponse = {
       },
     },
   ],
+  track_count: 1,
   can_undo: true,
   can_redo: false,
   version: 5,
@@ -48,6 +48,7 @@ const mockMixtape: MixtapeResponse = {
       track: mockTrackDetails2,
     },
   ],
+  track_count: 2,
   can_undo: true,
   can_redo: false,
   version: 5,
@@ -67,6 +67,7 @@ const createFallbackMixtapeResponse = (
   last_modified_time: '', // Will be set by server
   stack_auth_user_id: isAuthenticated ? user?.id || null : null, // Will be set by server. For now, use a placeholder if and only if we would expect one.
   version: 1,
+  track_count: 0,
   can_undo: false,
   can_redo: false,
   spotify_playlist_url: null,
@@ -1,4 +1,14 @@
-from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Any, Literal
+
+from pydantic import (
+    BaseModel,
+    Discriminator,
+    Field,
+    StrictBool,
+    StrictStr,
+    Tag,
+    field_validator,
+)
 
 from backend.api_models.spotify import TrackDetails
 
@@ -12,6 +22,12 @@ class MixtapeTrackResponse(BaseModel):
     track_position: int = Field(..., gt=0, description="Unique position of the track within the mixtape (1-based index)")
     track_text: str | None = Field(None, description="Optional text to display next to the track")
     track: TrackDetails = Field(..., description="Details about the track, such as name, artist, and Spotify URI.")
+    is_placeholder: bool = Field(default=False, description="Whether the track's details could not be looked up in time, or the track no longer exists on Spotify, in which case only its ID and URI are set")
+
+class MixtapeCompactTrackResponse(BaseModel):
+    track_position: int = Field(..., gt=0, description="Unique position of the track within the mixtape (1-based index)")
+    track_text: str | None = Field(None, description="Optional text to display next to the track")
+    spotify_uri: str = Field(..., description="Spotify URI of the track")
 
 class MixtapeRequest(BaseModel):
     name: str = Field(..., min_length=1, max_length=255, description="Human-readable name of the mixtape")
@@ -37,6 +53,58 @@ class MixtapeRequest(BaseModel):
             return v.replace('\n', ' ').replace('\r', ' ')
         return v
 
+class MixtapeSetTextFieldOperation(BaseModel):
+    op: Literal["set"]
+    field: Literal["name", "intro_text", "subtitle1", "subtitle2", "subtitle3"] = Field(..., description="Text field of the mixtape to set")
+    value: StrictStr | None = Field(..., description="New value of the field, with the same constraints as in MixtapeRequest")
+
+class MixtapeSetIsPublicOperation(BaseModel):
+    op: Literal["set"]
+    field: Literal["is_public"] = Field(..., description="Set whether the mixtape is public")
+    value: StrictBool = Field(..., description="Whether the mixtape is public")
+
+class MixtapeInsertTrackOperation(BaseModel):
+    op: Literal["insert_track"]
+    track: MixtapeTrackRequest = Field(..., description="Track to insert at its track_position; the tracks from that position on move down by one")
+
+class MixtapeMoveTrackOperation(BaseModel):
+    op: Literal["move_track"]
+    from_position: int = Field(..., gt=0, description="Position of the track to move")
+    to_position: int = Field(..., gt=0, description="Position to move the track to, as if it had first been removed")
+
+class MixtapeRemoveTrackOperation(BaseModel):
+    op: Literal["remove_track"]
+    track_position: int = Field(..., gt=0, description="Position of the track to remove; the tracks after it move up by one")
+
+class MixtapeSetTrackTextOperation(BaseModel):
+    op: Literal["set_track_text"]
+    track_position: int = Field(..., gt=0, description="Position of the track")
+    track_text: str | None = Field(..., description="New text to display next to the track")
+
+def _operation_tag(operation: Any) -> str | None:
+    """
+    Which MixtapeOperation model an operation is: its op, except that setting is_public
+    has a model of its own, so that each field only takes values of its own type (e.g.
+    "yes" is not turned into True).
+    """
+    op = operation.get("op") if isinstance(operation, dict) else getattr(operation, "op", None)
+    field = operation.get("field") if isinstance(operation, dict) else getattr(operation, "field", None)
+    return "set_is_public" if op == "set" and field == "is_public" else op
+
+MixtapeOperation = Annotated[
+    Annotated[MixtapeSetTextFieldOperation, Tag("set")]
+    | Annotated[MixtapeSetIsPublicOperation, Tag("set_is_public")]
+    | Annotated[MixtapeInsertTrackOperation, Tag("insert_track")]
+    | Annotated[MixtapeMoveTrackOperation, Tag("move_track")]
+    | Annotated[MixtapeRemoveTrackOperation, Tag("remove_track")]
+    | Annotated[MixtapeSetTrackTextOperation, Tag("set_track_text")],
+    Discriminator(_operation_tag),
+]
+
+class MixtapePatchRequest(BaseModel):
+    version: int | None = Field(None, description="Version the operations were made against; if set and the mixtape has moved on since, nothing is applied and 409 is returned")
+    operations: list[MixtapeOperation] = Field(..., min_length=1, max_length=200, description="Operations to apply, in order")
+
 class MixtapeResponse(BaseModel):
     public_id: str
     name: str
@@ -51,8 +119,49 @@ class MixtapeResponse(BaseModel):
     version: int = Field(description="Current version number of the mixtape")
     spotify_playlist_url: str | None = Field(default=None, description="Spotify playlist URL if exported to Spotify")
     tracks: list[MixtapeTrackResponse]
+    track_count: int = Field(description="Number of tracks in the mixtape (which may be more than returned, if paged)")
     can_undo: bool = Field(description="Whether this mixtape can be undone")
     can_redo: bool = Field(description="Whether this mixtape can be redone")
+    is_partial: bool = Field(default=False, description="Whether some tracks are placeholders (see MixtapeTrackResponse.is_placeholder) because Spotify was slow or unavailable; fetch the mixtape again later for the full details")
+
+class MixtapeCompactResponse(BaseModel):
+    """A mixtape as stored, with its tracks' Spotify URIs rather than their details."""
+    public_id: str
+    name: str
+    intro_text: str | None
+    subtitle1: str | None
+    subtitle2: str | None
+    subtitle3: str | None
+    is_public: bool
+    create_time: str
+    last_modified_time: str
+    stack_auth_user_id: str | None
+    version: int = Field(description="Current version number of the mixtape")
+    spotify_playlist_url: str | None = Field(default=None, description="Spotify playlist URL if exported to Spotify")
+    tracks: list[MixtapeCompactTrackResponse]
+    can_undo: bool = Field(description="Whether this mixtape can be undone")
+    can_redo: bool = Field(description="Whether this mixtape can be redone")
+
+class MixtapeTrackPageResponse(BaseModel):
+    """A single track of a mixtape, with what is needed to navigate to its neighbors."""
+    public_id: str
+    version: int = Field(description="Current version number of the mixtape")
+    track: MixtapeTrackResponse
+    previous_track_position: int | None = Field(description="Position of the previous track, if any")
+    next_track_position: int | None = Field(description="Position of the next track, if any")
+    track_count: int = Field(description="Number of tracks in the mixtape")
+
+class MixtapeBatchError(BaseModel):
+    status_code: int = Field(description="HTTP status code that getting the mixtape on its own would have returned")
+    detail: str
+
+class MixtapeBatchItem(BaseModel):
+    public_id: str
+    mixtape: MixtapeResponse | None = Field(default=None, description="The mixtape, unless it could not be returned")
+    error: MixtapeBatchError | None = Field(default=None, description="Why the mixtape could not be returned, if it could not")
+
+class MixtapeBatchResponse(BaseModel):
+    results: list[MixtapeBatchItem] = Field(description="One result per requested public ID, in the order requested")
 
 class MixtapeOverview(BaseModel):
     public_id: str
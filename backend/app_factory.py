@@ -1,28 +1,41 @@
 import os
-from collections.abc import Awaitable, Callable
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import DBAPIError
 
-from backend.middleware.db_conn.global_db_conn import initialize_engine
+from backend.middleware.compression import CompressionMiddleware
+from backend.middleware.db_conn.global_db_conn import (
+    initialize_engine,
+    initialize_replica_engine,
+)
+from backend.middleware.db_conn.read_your_writes import ReadYourWritesCookieMiddleware
+from backend.middleware.db_conn.timeouts import database_timeout_exception_handler
 
 # Import custom middleware for detailed exception logging
-from backend.middleware.error_logging import exception_logging_middleware
+from backend.middleware.error_logging import ExceptionLoggingMiddleware
+from backend.middleware.request_logging import RequestLoggingMiddleware
 from backend.routers import account, auth, health, mixtape, spotify
+from backend.util.json_response import FastJSONResponse
+from backend.util.log import configure_logging
 
 
-def create_app(database_url: str | None = None) -> FastAPI:
-    """Factory function to create FastAPI app with configurable database"""
+def create_app(database_url: str | None = None, replica_database_url: str | None = None) -> FastAPI:
+    """Factory function to create FastAPI app with configurable database (and optional read replica)"""
+    configure_logging()
 
     # Initialize the database connection.
     if database_url is not None:
         initialize_engine(database_url)
+    if replica_database_url is not None:
+        initialize_replica_engine(replica_database_url)
 
     api_prefix = "/api"
 
     app = FastAPI(
         docs_url=f"{api_prefix}/docs",
         openapi_url=f"{api_prefix}/openapi.json",
+        default_response_class=FastJSONResponse,
     )
 
     # Add CORS middleware
@@ -32,8 +45,19 @@ def create_app(database_url: str | None = None) -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],  # Allows all methods
         allow_headers=["*"],  # Allows all headers
+        # Lets clients read mixtape versions' ETags (for If-None-Match) and versioned URLs.
+        expose_headers=["ETag", "Content-Location"],
     )
 
+    # Hand clients the LSN of their last write, so their reads stick to the primary.
+    app.add_middleware(ReadYourWritesCookieMiddleware)
+
+    # Compress JSON responses for clients that accept brotli or gzip.
+    app.add_middleware(CompressionMiddleware)
+
+    # Report lock/statement timeouts as retryable 409/503 responses rather than 500s.
+    app.add_exception_handler(DBAPIError, database_timeout_exception_handler)
+
     # Include routers
     app.include_router(auth.router, prefix=f"{api_prefix}/auth", tags=["auth"])
     app.include_router(account.router, prefix=f"{api_prefix}/account", tags=["account"])
@@ -50,14 +74,8 @@ def create_app(database_url: str | None = None) -> FastAPI:
     async def debug(request: Request):
         return dict(request.headers)
 
-    @app.middleware("http")
-    async def debug_path(request: Request, call_next: Callable[[Request], Awaitable[Response]]):
-        print(f"Incoming path: {request.url.path}")
-        response = await call_next(request)
-        print(f"Outgoing response status: {str(response.status_code)}")
-        return response
-
-    # Add global exception logging middleware
-    app.middleware("http")(exception_logging_middleware)
+    # Log every request, and turn unhandled exceptions into logged 500s (outermost).
+    app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(ExceptionLoggingMiddleware)
 
     return app
@@ -0,0 +1,3 @@
+from .client import AbstractCachePurgeClient
+from .mock import MockCachePurgeClient, get_mock_cache_purge_client
+from .real import RealCachePurgeClient, get_cache_purge_client
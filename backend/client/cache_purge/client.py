@@ -0,0 +1,13 @@
+from abc import ABC, abstractmethod
+
+
+class AbstractCachePurgeClient(ABC):
+    @abstractmethod
+    def purge(self, paths: list[str]) -> None:
+        """
+        Purge the given URL paths from the edge cache (CDN), so that the next request
+        for them is served by the origin. A path ending in "*" purges every path with
+        that prefix.
+        Purging is best-effort: failures are reported but not raised.
+        """
+        pass
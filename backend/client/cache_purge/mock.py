@@ -0,0 +1,13 @@
+from .client import AbstractCachePurgeClient
+
+
+class MockCachePurgeClient(AbstractCachePurgeClient):
+    """Records purged paths instead of purging anything, for tests."""
+    def __init__(self) -> None:
+        self.purged_paths: list[str] = []
+
+    def purge(self, paths: list[str]) -> None:
+        self.purged_paths.extend(paths)
+
+def get_mock_cache_purge_client():
+    return MockCachePurgeClient()
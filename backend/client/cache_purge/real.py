@@ -0,0 +1,38 @@
+import logging
+import os
+
+import requests
+
+from backend.util.log import Truncated
+
+from .client import AbstractCachePurgeClient
+
+logger = logging.getLogger(__name__)
+
+
+class RealCachePurgeClient(AbstractCachePurgeClient):
+    """
+    Purges paths by POSTing them as JSON ({"paths": [...]}) to the webhook at
+    CACHE_PURGE_URL (authenticated with CACHE_PURGE_TOKEN as a bearer token, if set),
+    which forwards them to the CDN's purge API.
+
+    Without CACHE_PURGE_URL (e.g. in local development, where there is no edge cache),
+    purging is a no-op and edge-cached responses expire according to their Cache-Control.
+    """
+    def __init__(self) -> None:
+        self.purge_url = os.environ.get("CACHE_PURGE_URL")
+        self.purge_token = os.environ.get("CACHE_PURGE_TOKEN")
+
+    def purge(self, paths: list[str]) -> None:
+        if not self.purge_url or not paths:
+            return
+        headers = {"Authorization": f"Bearer {self.purge_token}"} if self.purge_token else {}
+        try:
+            res = requests.post(self.purge_url, json={"paths": paths}, headers=headers, timeout=5)
+            if res.status_code >= 400:
+                logger.warning("Cache purge of %s failed with %d: %s", paths, res.status_code, Truncated(res.text))
+        except requests.RequestException as e:
+            logger.warning("Cache purge of %s failed: %s", paths, e)
+
+def get_cache_purge_client():
+    return RealCachePurgeClient()
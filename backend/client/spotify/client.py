@@ -1,7 +1,26 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from typing import Any
 
 
+class SpotifyError(Exception):
+    """A Spotify request failed."""
+
+class SpotifyAPIError(SpotifyError):
+    """Spotify answered with an error status."""
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+class SpotifyTrackNotFoundError(SpotifyError):
+    """The track does not exist or is not available (or its ID is malformed)."""
+
+class SpotifyUnavailableError(SpotifyError):
+    """The request was not sent, as Spotify keeps failing (the circuit breaker is open)."""
+
+class SpotifyDeadlineExceededError(SpotifyError):
+    """The request (including waits for the rate limiter and retries) ran out of time."""
+
 class SpotifyArtist:
     def __init__(self, name: str):
         self.name = name
@@ -61,10 +80,9 @@ class SpotifyTrack:
 
 class AbstractSpotifyClient(ABC):
     @abstractmethod
-    def search_tracks(self, query: str) -> list[SpotifyTrack]:
+    def search_tracks(self, query: str, limit: int = 5) -> list[SpotifyTrack]:
         """
-        Returns a dictionary with a single key 'tracks' mapping to a SpotifySearchResult.
-        Example: { 'tracks': SpotifySearchResult([...]) }
+        Returns up to limit tracks matching the query, best match first.
         """
         pass
 
@@ -72,9 +90,44 @@ class AbstractSpotifyClient(ABC):
     def get_track(self, track_id: str) -> SpotifyTrack:
         """
         Returns a SpotifyTrack object for the given track_id.
+        Raises SpotifyTrackNotFoundError if there is no such track.
         """
         pass
 
+    @abstractmethod
+    def get_tracks(self, track_ids: list[str]) -> dict[str, SpotifyTrack]:
+        """
+        Returns the SpotifyTrack objects for the given track_ids (which may contain
+        duplicates), keyed by track ID, looking them up in as few requests as possible.
+        Tracks that do not exist are left out.
+        """
+        pass
+
+    @abstractmethod
+    def get_cached_tracks(self, track_ids: list[str]) -> dict[str, SpotifyTrack]:
+        """
+        Returns the SpotifyTrack objects the client has cached for the given track_ids,
+        however old, keyed by track ID, without any request. Tracks that are not cached
+        are left out.
+        """
+
+    # --- Autocomplete index ---
+    @abstractmethod
+    def claim_track_index_seed(self) -> bool:
+        """
+        Whether the caller should seed the autocomplete index (see seed_track_index):
+        True once per client (and again after a failed seed), False afterwards.
+        """
+
+    @abstractmethod
+    def seed_track_index(self, load_track_uses: Callable[[], dict[str, int]]) -> None:
+        """
+        Seed the autocomplete index with the tracks used in mixtapes, as loaded by
+        load_track_uses (the number of mixtape tracks using each track ID): their details
+        are looked up (in batches) if they are not known yet, and the most used tracks
+        rank first. If anything fails, the seed can be claimed again.
+        """
+
     # --- New for playlist export ---
     @abstractmethod
     def create_playlist(self, title: str, description: str, track_uris: list[str]) -> str:
@@ -1,9 +1,12 @@
+from collections.abc import Callable
+
 from .client import (
     AbstractSpotifyClient,
     SpotifyAlbum,
     SpotifyAlbumImage,
     SpotifyArtist,
     SpotifyTrack,
+    SpotifyTrackNotFoundError,
 )
 
 
@@ -12,6 +15,7 @@ class MockSpotifyClient(AbstractSpotifyClient):
         self.reset_tracks()
         self.playlists: dict[str, dict] = {}  # uri -> {'title': str, 'description': str, 'tracks': list[str]}
         self._playlist_counter = 1
+        self.track_uses: dict[str, int] | None = None  # As passed to seed_track_index
 
     def reset_tracks(self)->None:
         self.tracks: list[SpotifyTrack] = [
@@ -70,9 +74,28 @@ class MockSpotifyClient(AbstractSpotifyClient):
     def add_track(self, track: SpotifyTrack)->None:
         self.tracks.append(track)
 
-    def search_tracks(self, query: str)->list[SpotifyTrack]:
+    def get_tracks(self, track_ids: list[str])->dict[str, SpotifyTrack]:
+        tracks = {}
+        for track_id in dict.fromkeys(track_ids):
+            try:
+                tracks[track_id] = self.get_track(track_id)
+            except SpotifyTrackNotFoundError:
+                pass
+        return tracks
+
+    def get_cached_tracks(self, track_ids: list[str])->dict[str, SpotifyTrack]:
+        return {}  # The mock has nothing to cache.
+
+    def search_tracks(self, query: str, limit: int = 5)->list[SpotifyTrack]:
         results = [t for t in self.tracks if query.lower() in t.name.lower()]
-        return results
+        return results[:limit]
+
+    # --- Autocomplete index ---
+    def claim_track_index_seed(self)->bool:
+        return self.track_uses is None
+
+    def seed_track_index(self, load_track_uses: Callable[[], dict[str, int]])->None:
+        self.track_uses = load_track_uses()
 
     # --- Playlist methods ---
     def _generate_playlist_uri(self)->str:
@@ -103,7 +126,7 @@ class MockSpotifyClient(AbstractSpotifyClient):
         for t in self.tracks:
             if t.id == track_id:
                 return t
-        raise Exception("Track not found")
+        raise SpotifyTrackNotFoundError(f"Track not found: {track_id}")
 
 def get_mock_spotify_client():
     return MockSpotifyClient()
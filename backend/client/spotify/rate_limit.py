@@ -0,0 +1,169 @@
+import contextlib
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from enum import Enum
+
+
+class Priority(Enum):
+    """
+    Lane of a Spotify request. Interactive requests (reads a user is waiting for) may use
+    the whole rate budget; background requests (exports, seeding, refreshes) leave part
+    of it to interactive ones.
+    """
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+
+
+_priority: ContextVar[Priority] = ContextVar("spotify_priority", default=Priority.INTERACTIVE)
+_deadline: ContextVar[float | None] = ContextVar("spotify_deadline", default=None)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+def set_background_priority() -> None:
+    """Make the Spotify requests of the current thread background ones (e.g. as a thread pool initializer)."""
+    _priority.set(Priority.BACKGROUND)
+
+
+@contextlib.contextmanager
+def background_priority() -> Iterator[None]:
+    """Send the Spotify requests made within the block in the background lane."""
+    token = _priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_deadline() -> float | None:
+    """The time.monotonic() deadline set by spotify_deadline, if any."""
+    return _deadline.get()
+
+
+@contextlib.contextmanager
+def spotify_deadline(seconds: float) -> Iterator[None]:
+    """
+    Bound the time spent on the Spotify requests made within the block, including waits
+    for the rate limiter and retries. Nested deadlines can only shorten it.
+    """
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(min(deadline, outer) if outer is not None else deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter shared by all threads: up to `capacity` requests at once,
+    refilled at `rate` per second.
+
+    Callers may reserve part of the bucket for others: with a reserve, a token is only
+    taken if more than `reserve` would be left, so that background requests never use up
+    the budget of interactive ones.
+
+    pause_until stops handing out tokens until the given time, e.g. when the upstream
+    asked us to back off with Retry-After.
+    """
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def try_acquire(self, reserve: float = 0.0) -> float:
+        """
+        Take a token if one is available; return 0 if so, or else how long to wait
+        before trying again.
+        """
+        with self._lock:
+            now = self.clock()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            needed = 1 + reserve
+            if self._tokens >= needed:
+                self._tokens -= 1
+                return 0.0
+            return (needed - self._tokens) / self.rate
+
+    def pause_until(self, until: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, until)
+
+    def paused_for(self) -> float:
+        with self._lock:
+            return max(0.0, self._paused_until - self.clock())
+
+    def available(self) -> float:
+        with self._lock:
+            return min(self.capacity, self._tokens + (self.clock() - self._updated) * self.rate)
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an upstream that keeps failing.
+
+    After failure_threshold consecutive failures the breaker opens: requests are
+    rejected straight away for reset_seconds. Then it is half-open: a single trial
+    request is let through, which closes the breaker if it succeeds and opens it again if
+    it fails.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claiming the trial when half-open)."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self.clock() - self._opened_at < self.reset_seconds:
+            return self.OPEN
+        return self.HALF_OPEN
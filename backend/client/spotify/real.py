@@ -1,36 +1,143 @@
 import base64
+import logging
 import os
+import random
+import re
 import threading
 import time
-from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import requests
 
+from backend.util.log import Truncated
+from backend.util.metrics import metrics
+from backend.util.ttl_cache import TTLCache
+
 from .client import (
     AbstractSpotifyClient,
+    SpotifyAPIError,
+    SpotifyDeadlineExceededError,
+    SpotifyError,
     SpotifyTrack,
+    SpotifyTrackNotFoundError,
+    SpotifyUnavailableError,
+)
+from .rate_limit import (
+    CircuitBreaker,
+    Priority,
+    TokenBucket,
+    background_priority,
+    current_deadline,
+    current_priority,
+    set_background_priority,
 )
+from .track_index import TrackIndex, is_whole_word_match
+
+logger = logging.getLogger(__name__)
+
+# Most tracks the Spotify API returns per request for several tracks.
+GET_TRACKS_BATCH_SIZE = 50
+
+# Base of the exponential backoff between retries (before jitter).
+RETRY_BACKOFF_SECONDS = 0.5
+
+# Methods that can be sent again after a failure whose outcome is unknown: a POST may
+# have gone through (e.g. created a playlist) before the connection broke.
+_IDEMPOTENT_METHODS = frozenset({"GET", "PUT", "DELETE"})
+
+# Spotify IDs are 22 base62 characters.
+_TRACK_ID_PATTERN = re.compile(r"[0-9A-Za-z]{22}")
+
+# Statuses with which Spotify tells that a track does not exist (or is not available).
+_TRACK_NOT_FOUND_STATUSES = (400, 404)
+
+_BREAKER_STATE_GAUGES = {CircuitBreaker.CLOSED: 0.0, CircuitBreaker.HALF_OPEN: 1.0, CircuitBreaker.OPEN: 2.0}
+
+
+def normalize_search_query(query: str) -> str:
+    """
+    The query as sent to Spotify and as cached: case and whitespace are folded, as they
+    do not change the results, so that e.g. "the  Beatles" and "The Beatles " share an
+    entry.
+    """
+    return " ".join(query.split()).casefold()
+
+
+def is_valid_track_id(track_id: str) -> bool:
+    """Whether the track ID is well-formed, so that malformed ones are rejected without any request."""
+    return _TRACK_ID_PATTERN.fullmatch(track_id) is not None
 
 # TODO: move the cache into the abstract spotify client so that both real and mock use the cache?
 
 class SpotifyClient(AbstractSpotifyClient):
-    def __init__(self):
+    def __init__(self) -> None:
         self.client_id = os.environ["SPOTIFY_CLIENT_ID"]
         self.client_secret = os.environ["SPOTIFY_CLIENT_SECRET"]
         self.refresh_token = os.environ["SPOTIFY_REFRESH_TOKEN"]
 
         self._user_id: str | None = None
 
-        # Cache for track look-ups to avoid repeated API calls during a single
-        # request burst.
-        self.track_cache_size = int(os.environ.get("SPOTIFY_TRACK_CACHE_SIZE", 500))
-        self.track_cache = OrderedDict[str, SpotifyTrack]()  # track_id -> SpotifyTrack
         self._cache_lock = threading.Lock()
+        # Refreshes of cached entries run in the background lane (see _spotify_api_request).
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="spotify_refresh", initializer=set_background_priority)
+        # Cache for track look-ups (track_id -> SpotifyTrack). Track details rarely change,
+        # so they are served for a long while: past the soft TTL they are refreshed in the
+        # background (e.g. to pick up new album art), and only past the hard TTL does a
+        # look-up wait for Spotify.
+        soft_ttl_seconds = float(os.environ.get("SPOTIFY_TRACK_CACHE_SOFT_TTL_SECONDS", 24 * 3600))
+        hard_ttl_seconds = float(os.environ.get("SPOTIFY_TRACK_CACHE_HARD_TTL_SECONDS", 7 * 24 * 3600))
+        self.track_cache = TTLCache[SpotifyTrack](
+            "spotify_track_cache",
+            max_entries=int(os.environ.get("SPOTIFY_TRACK_CACHE_SIZE", 500)),
+            ttl_seconds=soft_ttl_seconds,
+            stale_seconds=max(0.0, hard_ttl_seconds - soft_ttl_seconds),
+            executor=self._refresh_executor,
+        )
+        # IDs of the tracks Spotify told us do not exist (or are not available), so that
+        # clients retrying a save or mixtapes with removed tracks do not look them up on
+        # every request. Kept for less long, in case they become available.
+        self.missing_track_cache = TTLCache[bool](
+            "spotify_missing_track_cache",
+            max_entries=int(os.environ.get("SPOTIFY_MISSING_TRACK_CACHE_SIZE", 1000)),
+            ttl_seconds=float(os.environ.get("SPOTIFY_MISSING_TRACK_CACHE_TTL_SECONDS", 600)),
+        )
+        # Cache for searches, as autocomplete sends the same popular queries over and over.
+        # Searches that found nothing are cached for less long, in case the track shows up.
+        self.search_cache = TTLCache[list[SpotifyTrack]](
+            "spotify_search_cache",
+            max_entries=int(os.environ.get("SPOTIFY_SEARCH_CACHE_SIZE", 1000)),
+            ttl_seconds=float(os.environ.get("SPOTIFY_SEARCH_CACHE_TTL_SECONDS", 600)),
+            stale_seconds=float(os.environ.get("SPOTIFY_SEARCH_CACHE_STALE_SECONDS", 3600)),
+            negative_ttl_seconds=float(os.environ.get("SPOTIFY_SEARCH_CACHE_NEGATIVE_TTL_SECONDS", 60)),
+            is_negative=lambda tracks: not tracks,
+            executor=self._refresh_executor,
+        )
+        # Autocomplete index over every track seen (and the most used ones, see
+        # seed_track_index), so that most searches are answered without Spotify.
+        self.track_index = TrackIndex(max_tracks=int(os.environ.get("SPOTIFY_TRACK_INDEX_SIZE", 5000)))
+        self._track_index_seed_claimed = False
+        metrics.register_collector("spotify_track_index", self._track_index_metrics)
         self._token_lock = threading.Lock()
         self._access_token: str | None = None
         self._token_expiration: float = 0.0
 
+        # Shared by all threads, so that the instance as a whole stays within Spotify's
+        # rate limit, and stops calling it while it is down.
+        rate = float(os.environ.get("SPOTIFY_RATE_LIMIT_PER_SECOND", 10))
+        self.rate_limiter = TokenBucket(rate=rate, capacity=float(os.environ.get("SPOTIFY_RATE_LIMIT_BURST", 2 * rate)))
+        # Tokens background requests leave to interactive ones.
+        self.background_reserve = float(os.environ.get("SPOTIFY_RATE_LIMIT_BACKGROUND_RESERVE", rate / 2))
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get("SPOTIFY_BREAKER_FAILURE_THRESHOLD", 5)),
+            reset_seconds=float(os.environ.get("SPOTIFY_BREAKER_RESET_SECONDS", 30)),
+        )
+        self.max_retries = int(os.environ.get("SPOTIFY_MAX_RETRIES", 3))
+        self.request_deadline_seconds = float(os.environ.get("SPOTIFY_REQUEST_DEADLINE_SECONDS", 10))
+        self._sleep = time.sleep
+        metrics.register_collector("spotify", self._request_metrics)
+
     def _get_spotify_access_token(self) -> str:
         """
         Obtain a Spotify access token using Authorization Code flow.
@@ -56,7 +163,7 @@ class SpotifyClient(AbstractSpotifyClient):
                 "refresh_token": self.refresh_token,
             }
 
-            response = requests.post(url, headers=headers, data=data)
+            response = requests.post(url, headers=headers, data=data, timeout=self.request_deadline_seconds)
             if response.status_code == 200:
                 payload = response.json()
                 self._access_token = str(payload["access_token"])
@@ -64,26 +171,116 @@ class SpotifyClient(AbstractSpotifyClient):
                 self._token_expiration = time.time() + expires_in
                 return self._access_token
             else:
-                raise Exception(f"Failed to refresh Spotify access token: {response.text}")
+                raise SpotifyAPIError(f"Failed to refresh Spotify access token: {response.text}", response.status_code)
 
     def _auth_headers(self)->dict[str, str]:
         return {"Authorization": f"Bearer {self._get_spotify_access_token()}"}
 
     def _spotify_api_request(self, method: str, endpoint: str, **kwargs)->Any:
-        """Low-level HTTP helper (raises on non-2xx)."""
+        """
+        Low-level HTTP helper (raises SpotifyError on failure).
+
+        Every request first takes a token from the shared rate limiter; background
+        requests (see background_priority) leave background_reserve tokens to interactive
+        ones. While the circuit breaker is open, requests fail straight away.
+
+        429s are retried after their Retry-After, which also pauses every other request
+        of the instance; 5xx and network errors are retried with exponential backoff,
+        but only for idempotent methods. Both get random jitter. Waits and retries all count against the deadline: the one
+        set by spotify_deadline, or request_deadline_seconds from now.
+        """
+        deadline = time.monotonic() + self.request_deadline_seconds
+        outer_deadline = current_deadline()
+        if outer_deadline is not None:
+            deadline = min(deadline, outer_deadline)
+        reserve = self.background_reserve if current_priority() == Priority.BACKGROUND else 0.0
+
+        attempt = 0
+        while True:
+            self._acquire_rate_limit_token(reserve, deadline, method, endpoint)
+            if not self.breaker.allow():
+                metrics.increment("spotify.breaker_rejections")
+                raise SpotifyUnavailableError(f"Spotify is unavailable (too many failures); not calling {method} {endpoint}")
+
+            metrics.increment("spotify.requests")
+            retry_after: float | None = None
+            try:
+                response = self._send(method, endpoint, timeout=max(deadline - time.monotonic(), 0.001), **kwargs)
+            except requests.RequestException as e:
+                self.breaker.record_failure()
+                error: SpotifyError = SpotifyError(f"Spotify API request failed when calling {method} {endpoint} with kwargs={str(kwargs)}: {e}")
+            except BaseException:
+                # E.g. the access token could not be refreshed. Every allowed request must
+                # be recorded, or a half-open breaker would wait for its trial forever.
+                self.breaker.record_failure()
+                raise
+            else:
+                status = response.status_code
+                if status == 429:
+                    # Spotify is up, but we are sending too much: back off, all together.
+                    self.breaker.record_success()
+                    metrics.increment("spotify.throttled")
+                    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                    self.rate_limiter.pause_until(time.monotonic() + retry_after)
+                elif status >= 500:
+                    self.breaker.record_failure()
+                else:
+                    # Spotify is up, even if it rejected this request.
+                    self.breaker.record_success()
+                    if status < 400:
+                        return response.json() if response.text != "" else None  # No content
+                error = SpotifyAPIError(f"Spotify API error when calling {method} {endpoint} with kwargs={str(kwargs)}: {status}: {response.text}", status)
+                if status < 500 and status != 429:
+                    raise error
+
+            if attempt >= self.max_retries or (retry_after is None and method not in _IDEMPOTENT_METHODS):
+                raise error
+            if retry_after is not None:
+                # The rate limiter waits out Retry-After; the jitter spreads out the retries.
+                delay = random.uniform(0, RETRY_BACKOFF_SECONDS)
+                wait = retry_after + delay
+            else:
+                delay = wait = random.uniform(0, RETRY_BACKOFF_SECONDS * 2 ** attempt)  # Full jitter
+            if time.monotonic() + wait >= deadline:
+                metrics.increment("spotify.deadline_exceeded")
+                raise error
+            metrics.increment("spotify.retries")
+            self._sleep(delay)
+            attempt += 1
+
+    def _acquire_rate_limit_token(self, reserve: float, deadline: float, method: str, endpoint: str)->None:
+        waited = 0.0
+        while True:
+            wait = self.rate_limiter.try_acquire(reserve)
+            if time.monotonic() + wait >= deadline:
+                metrics.increment("spotify.deadline_exceeded")
+                raise SpotifyDeadlineExceededError(f"Ran out of time waiting to call {method} {endpoint}")
+            if wait == 0:
+                break
+            self._sleep(wait)
+            waited += wait
+        if waited:
+            metrics.increment("spotify.rate_limit_waits")
+            metrics.observe("spotify.rate_limit_wait", waited)
+
+    def _send(self, method: str, endpoint: str, timeout: float, **kwargs)->requests.Response:
         headers = self._auth_headers()
         if "headers" in kwargs:
             headers.update(kwargs["headers"])
         kwargs_with_headers = kwargs.copy()
         kwargs_with_headers["headers"] = headers
         url = f"https://api.spotify.com/v1{endpoint}"
-        response = requests.request(method, url, **kwargs_with_headers)
-        print(f"Spotify API response when calling {method} {endpoint} with kwargs={str(kwargs)}: {response.status_code}: {response.text}")
-        if response.status_code >= 400:
-            raise Exception(f"Spotify API error when calling {method} {endpoint} with kwargs={str(kwargs)}: {response.status_code}: {response.text}")
-        if response.text == "":  # No content
-            return None
-        return response.json()
+        response = requests.request(method, url, timeout=timeout, **kwargs_with_headers)
+        # The body is only read (and truncated) if debug logging is enabled for this logger.
+        logger.debug("Spotify API response when calling %s %s with kwargs=%s: %d: %s", method, endpoint, kwargs, response.status_code, Truncated(lambda: response.text))
+        return response
+
+    def _request_metrics(self)->dict[str, float]:
+        return {
+            "spotify.breaker_state": _BREAKER_STATE_GAUGES[self.breaker.state],
+            "spotify.rate_limit_tokens": self.rate_limiter.available(),
+            "spotify.throttled_for_seconds": self.rate_limiter.paused_for(),
+        }
 
     # --- User info ---
     def _get_user_id(self)->str:
@@ -92,38 +289,142 @@ class SpotifyClient(AbstractSpotifyClient):
             self._user_id = data["id"]
         return self._user_id
 
-    def search_tracks(self, query: str)->list[SpotifyTrack]:
-        data = self._spotify_api_request("GET", "/search", params={"q": query, "type": "track", "limit": 5})
-        items = []
-        # TODO: why do we check for both "tracks" and "items"? Should only need one.
-        for item in data.get("tracks", {}).get("items", []):
-            track = SpotifyTrack.from_dict(item)
-            items.append(track)
-        return items
+    def search_tracks(self, query: str, limit: int = 5)->list[SpotifyTrack]:
+        """
+        Tracks of the local index that match every word of the query as a whole word come
+        first; Spotify is only searched (through the search cache) if there are fewer
+        than limit of them. Its results then come before the local tracks that only match
+        some words as prefixes, which common words (or a word still being typed) match
+        far too easily for them to hide tracks nobody has used yet.
+        """
+        normalized_query = normalize_search_query(query)
+        local = self.track_index.search(normalized_query, limit)
+        strong = [track for track in local if is_whole_word_match(track, normalized_query)]
+        if len(strong) >= limit:
+            metrics.increment("spotify_track_index.hits")
+            return strong
+        metrics.increment("spotify_track_index.partial_hits" if local else "spotify_track_index.misses")
+        weak = [track for track in local if track not in strong]
+        strong_ids = {track.id for track in strong}
+        remote = [track for track in self._search_spotify(normalized_query, limit) if track.id not in strong_ids]
+        remote_ids = {track.id for track in remote}
+        return (strong + remote + [track for track in weak if track.id not in remote_ids])[:limit]
+
+    def _search_spotify(self, normalized_query: str, limit: int)->list[SpotifyTrack]:
+        def fetch()->list[SpotifyTrack]:
+            data = self._spotify_api_request("GET", "/search", params={"q": normalized_query, "type": "track", "limit": limit})
+            items = []
+            # TODO: why do we check for both "tracks" and "items"? Should only need one.
+            for item in data.get("tracks", {}).get("items", []):
+                track = SpotifyTrack.from_dict(item)
+                # Search results are full track objects: cache them, so that looking up
+                # the result the user picks is a hit.
+                self._cache_track(track.id, track)
+                items.append(track)
+            return items
+
+        # Copied, as the cached list is shared by every caller.
+        return list(self.search_cache.get_or_fetch((normalized_query, limit), fetch))
 
     def get_track(self, track_id: str)->SpotifyTrack:
-        with self._cache_lock:
-            if track_id in self.track_cache:
-                track: SpotifyTrack = self.track_cache.pop(track_id)
-                self.track_cache[track_id] = track  # Mark as most recently used
-                return track
-        # Not in cache, fetch from API (do not hold lock during network call)
-        # TODO: ensure we use a single flight so that we don't fetch the same track multiple times
-        # from multiple threads. In golang there's a singleflight package we could use; this surely
-        # exists in Python so we just need to find it.
-        item = self._spotify_api_request("GET", f"/tracks/{track_id}")
-        track = SpotifyTrack.from_dict(item)
+        if self._is_missing_track(track_id):
+            raise SpotifyTrackNotFoundError(f"Track not found: {track_id}")
+
+        def fetch()->SpotifyTrack:
+            try:
+                item = self._spotify_api_request("GET", f"/tracks/{track_id}")
+            except SpotifyAPIError as e:
+                if e.status_code not in _TRACK_NOT_FOUND_STATUSES:
+                    raise
+                self.missing_track_cache.put(track_id, True)
+                raise SpotifyTrackNotFoundError(f"Track not found: {track_id}") from e
+            track = SpotifyTrack.from_dict(item)
+            self.track_index.add(track)
+            return track
+
+        # Concurrent look-ups of the same track share a single fetch.
+        return self.track_cache.get_or_fetch(track_id, fetch)
+
+    def get_tracks(self, track_ids: list[str])->dict[str, SpotifyTrack]:
+        unique_ids = [track_id for track_id in dict.fromkeys(track_ids) if not self._is_missing_track(track_id)]
+        tracks, to_refresh = self.track_cache.get_many(unique_ids)
+        if to_refresh:
+            # Stale tracks are served as is, and refreshed in a single background batch.
+            self.track_cache.refresh_many(to_refresh, self._fetch_tracks)
+        missing = [track_id for track_id in unique_ids if track_id not in tracks]
+        for track_id, track in self._fetch_tracks(missing).items():
+            tracks[track_id] = track
+            self.track_cache.put(track_id, track)
+        return tracks
+
+    def get_cached_tracks(self, track_ids: list[str])->dict[str, SpotifyTrack]:
+        # Expired tracks too: when Spotify is unavailable, old details beat none.
+        tracks: dict[str, SpotifyTrack] = {}
+        for track_id in dict.fromkeys(track_ids):
+            track = self.track_cache.get(track_id, include_expired=True)
+            if track is not None:
+                tracks[track_id] = track
+        return tracks
+
+    def _fetch_tracks(self, track_ids: list[str])->dict[str, SpotifyTrack]:
+        """Fetch the given tracks from Spotify, in batches, leaving out unknown IDs."""
+        tracks: dict[str, SpotifyTrack] = {}
+        for start in range(0, len(track_ids), GET_TRACKS_BATCH_SIZE):
+            batch = track_ids[start:start + GET_TRACKS_BATCH_SIZE]
+            data = self._spotify_api_request("GET", "/tracks", params={"ids": ",".join(batch)})
+            # Tracks are returned in the order requested, with null for unknown IDs.
+            for track_id, item in zip(batch, data.get("tracks", []), strict=False):
+                if item is None:
+                    self.missing_track_cache.put(track_id, True)
+                    continue
+                tracks[track_id] = SpotifyTrack.from_dict(item)
+                self.track_index.add(tracks[track_id])
+        return tracks
+
+    def _is_missing_track(self, track_id: str)->bool:
+        """Whether the track is known not to exist: its ID is malformed, or Spotify said so recently."""
+        if is_valid_track_id(track_id) and self.missing_track_cache.get(track_id) is None:
+            return False
+        metrics.increment("spotify_missing_track_cache.hits")
+        return True
 
+    def _cache_track(self, track_id: str, track: SpotifyTrack)->None:
+        self.track_cache.put(track_id, track)
+        self.track_index.add(track)
+
+    # --- Autocomplete index ---
+    def claim_track_index_seed(self)->bool:
         with self._cache_lock:
-            self.track_cache[track_id] = track
-            if len(self.track_cache) > self.track_cache_size:
-                self.track_cache.popitem(last=False)  # Remove least recently used
-        return track
+            claimed = not self._track_index_seed_claimed
+            self._track_index_seed_claimed = True
+        return claimed
+
+    def seed_track_index(self, load_track_uses: Callable[[], dict[str, int]])->None:
+        try:
+            track_uses = load_track_uses()
+            self.track_index.set_uses(track_uses)
+            missing = [track_id for track_id in track_uses if track_id not in self.track_index]
+            # Added to the index as they are fetched.
+            with background_priority():
+                self.get_tracks(missing)
+        except Exception:
+            logger.warning("Failed to seed the track index", exc_info=True)
+            with self._cache_lock:
+                self._track_index_seed_claimed = False  # Try again on a later search
+
+    def _track_index_metrics(self)->dict[str, float]:
+        hits = metrics.get_counter("spotify_track_index.hits")
+        searches = hits + metrics.get_counter("spotify_track_index.partial_hits") + metrics.get_counter("spotify_track_index.misses")
+        return {
+            "spotify_track_index.size": len(self.track_index),
+            "spotify_track_index.hit_ratio": hits / searches if searches else 0.0,
+        }
 
     # --- Playlist methods ---
     def _playlist_id_from_uri(self, playlist_uri: str) -> str:
         return playlist_uri.split(":")[-1]
 
+    @background_priority()
     def create_playlist(self, title: str, description: str, track_uris: list[str]) -> str:
         user_id = self._get_user_id()
         payload = {"name": title, "description": description, "public": True}
@@ -140,6 +441,7 @@ class SpotifyClient(AbstractSpotifyClient):
 
         return playlist_uri
 
+    @background_priority()
     def update_playlist(self, playlist_uri: str, title: str, description: str, track_uris: list[str]) -> None:
         playlist_id = self._playlist_id_from_uri(playlist_uri)
         # Change details
@@ -148,5 +450,24 @@ class SpotifyClient(AbstractSpotifyClient):
         # Replace tracks (PUT replaces)
         self._spotify_api_request("PUT", f"/playlists/{playlist_id}/tracks", json={"uris": track_uris})
 
-def get_spotify_client():
-    return SpotifyClient()
+def _parse_retry_after(value: str | None)->float:
+    """Seconds to wait per a Retry-After header (Spotify sends seconds); 1 if missing or unparseable."""
+    try:
+        return max(float(value), 0.0) if value is not None else 1.0
+    except ValueError:
+        return 1.0
+
+_spotify_client: SpotifyClient | None = None
+_spotify_client_lock = threading.Lock()
+
+def get_spotify_client() -> SpotifyClient:
+    """
+    The process-wide Spotify client, so that its caches (and access token) are shared by
+    all requests rather than starting cold on each one.
+    """
+    global _spotify_client
+    if _spotify_client is None:
+        with _spotify_client_lock:
+            if _spotify_client is None:
+                _spotify_client = SpotifyClient()
+    return _spotify_client
@@ -0,0 +1,113 @@
+import bisect
+import re
+import threading
+from collections import OrderedDict
+
+from .client import SpotifyTrack
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """The words of the text, case-folded, as indexed and searched by TrackIndex."""
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+def _track_words(track: SpotifyTrack) -> set[str]:
+    return set(tokenize(" ".join([track.name, *(artist.name for artist in track.artists)])))
+
+
+def is_whole_word_match(track: SpotifyTrack, query: str) -> bool:
+    """
+    Whether every word of the query is a whole word of the track's name or artists,
+    rather than only the prefix of one, e.g. "here sun" for "Here Comes the Sun", but
+    not "here su".
+    """
+    words = _track_words(track)
+    return all(query_word in words for query_word in tokenize(query))
+
+
+class TrackIndex:
+    """
+    Bounded in-process autocomplete index over tracks whose details the service has
+    already seen (looked up, searched for, or used in mixtapes).
+
+    A track matches a query if every word of the query is the prefix of a word of the
+    track's name or artists, e.g. "beat here" matches "Here Comes the Sun" by The Beatles.
+    Matches are ranked by how many mixtape tracks use them (see set_uses), then by name.
+
+    Beyond max_tracks, the tracks added least recently are dropped.
+    """
+    def __init__(self, max_tracks: int) -> None:
+        self.max_tracks = max_tracks
+        self._lock = threading.Lock()
+        self._tracks: OrderedDict[str, tuple[SpotifyTrack, list[str]]] = OrderedDict()
+        # Word -> IDs of the tracks having it, plus the words in order, for prefix lookups.
+        self._postings: dict[str, set[str]] = {}
+        self._words: list[str] = []
+        self._uses: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tracks)
+
+    def __contains__(self, track_id: str) -> bool:
+        with self._lock:
+            return track_id in self._tracks
+
+    def add(self, track: SpotifyTrack) -> None:
+        if self.max_tracks <= 0:
+            return
+        words = sorted(_track_words(track))
+        with self._lock:
+            if track.id in self._tracks:
+                self._remove(track.id)
+            self._tracks[track.id] = (track, words)
+            for word in words:
+                ids = self._postings.get(word)
+                if ids is None:
+                    ids = self._postings[word] = set()
+                    bisect.insort(self._words, word)
+                ids.add(track.id)
+            while len(self._tracks) > self.max_tracks:
+                self._remove(next(iter(self._tracks)))  # Remove least recently added
+
+    def set_uses(self, uses: dict[str, int]) -> None:
+        """Set how many mixtape tracks use each track (by ID), for ranking."""
+        with self._lock:
+            self._uses = dict(uses)
+
+    def search(self, query: str, limit: int) -> list[SpotifyTrack]:
+        """Up to limit tracks matching the query, best ranked first."""
+        query_words = tokenize(query)
+        if not query_words:
+            return []
+        with self._lock:
+            matches: set[str] | None = None
+            for query_word in query_words:
+                ids = self._ids_with_prefix(query_word)
+                matches = ids if matches is None else matches & ids
+                if not matches:
+                    return []
+            tracks = [self._tracks[track_id][0] for track_id in matches or ()]
+            uses = self._uses
+        tracks.sort(key=lambda track: (-uses.get(track.id, 0), track.name.casefold(), track.id))
+        return tracks[:limit]
+
+    def _ids_with_prefix(self, prefix: str) -> set[str]:
+        ids: set[str] = set()
+        start = bisect.bisect_left(self._words, prefix)
+        for word in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            ids |= self._postings[word]
+        return ids
+
+    def _remove(self, track_id: str) -> None:
+        _, words = self._tracks.pop(track_id)
+        for word in words:
+            ids = self._postings[word]
+            ids.discard(track_id)
+            if not ids:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
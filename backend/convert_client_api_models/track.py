@@ -4,10 +4,24 @@ from backend.api_models.spotify import (
     TrackArtist,
     TrackDetails,
 )
-from backend.client.spotify.client import SpotifyTrack
+from backend.client.spotify.client import SpotifyAlbumImage, SpotifyTrack
 
 
-def spotify_track_to_mixtape_track_details(details: SpotifyTrack)->TrackDetails:
+def select_album_images(images: list[SpotifyAlbumImage], width: int | None) -> list[SpotifyAlbumImage]:
+    """
+    The album images to return for a requested width: all of them if no width was
+    requested, otherwise only the smallest image at least that wide (or the largest image,
+    if none is).
+    """
+    if width is None or not images:
+        return images
+    wide_enough = [image for image in images if image.width >= width]
+    if wide_enough:
+        return [min(wide_enough, key=lambda image: image.width)]
+    return [max(images, key=lambda image: image.width)]
+
+
+def spotify_track_to_mixtape_track_details(details: SpotifyTrack, album_image_width: int | None = None)->TrackDetails:
     return TrackDetails(
         id=details.id,
         name=details.name,
@@ -25,7 +39,7 @@ def spotify_track_to_mixtape_track_details(details: SpotifyTrack)->TrackDetails:
                     width=image.width,
                     height=image.height,
                 )
-                for image in details.album.images
+                for image in select_album_images(details.album.images, album_image_width)
             ]
         ),
         uri=details.uri,
@@ -37,39 +37,18 @@ class Mixtape(SQLModel, table=True):
         Index('ix_mixtape_stack_auth_user_id_last_modified_time', 'stack_auth_user_id', 'last_modified_time'),
     )
 
-    def _to_snapshot(self)->"MixtapeSnapshot":
-        return MixtapeSnapshot(
-            public_id=self.public_id,
-            name=self.name,
-            intro_text=self.intro_text,
-            subtitle1=self.subtitle1,
-            subtitle2=self.subtitle2,
-            subtitle3=self.subtitle3,
-            is_public=self.is_public,
-            create_time=self.create_time,
-            last_modified_time=self.last_modified_time,
-            version=self.version,
-            stack_auth_user_id=self.stack_auth_user_id,
-            undo_to_version=self.undo_to_version,
-            redo_to_version=self.redo_to_version,
-            resembles_version=self.resembles_version,
-            spotify_playlist_uri=self.spotify_playlist_uri,
-        )
-
-    def finalize(self, is_undo_redo_operation: bool = False):
+    def finalize(self):
         """
-        Finalize the mixtape update by incrementing version and creating snapshots.
+        Finalize the mixtape update by incrementing version and updating timestamps.
 
-        This method should be called as the last step before committing changes to
-        the database. It handles:
+        This method should be called as the last step before saving the mixtape with
+        MixtapeQuery.save, which also writes the snapshot of the new version. It handles:
         1. Version management (increment for updates, set to 1 for new mixtapes)
         2. Timestamp updates (create_time for new, last_modified_time for all)
-        3. Undo/redo pointer management (clear redo chain after normal edits)
-        4. Snapshot generation for audit trail
+        3. Undo/redo pointer management (clear redo chain after edits)
 
-        Args:
-            is_undo_redo_operation: If True, preserves undo/redo pointers as set by caller.
-                                  If False, clears redo chain for normal edits.
+        Undo/redo do not go through this method: MixtapeQuery.restore_snapshot writes
+        their new version, with its own undo/redo pointers, within Postgres.
 
         For new mixtapes:
         - Sets create_time and last_modified_time to current time
@@ -79,8 +58,7 @@ class Mixtape(SQLModel, table=True):
         For existing mixtapes:
         - Increments version number
         - Updates last_modified_time
-        - For normal edits: Clears redo_to_version to break the redo chain
-        - For undo/redo: Preserves undo/redo pointers set by caller
+        - Clears redo_to_version to break the redo chain
         """
         now = datetime.now(UTC)
         if self.id is None:
@@ -94,83 +72,11 @@ class Mixtape(SQLModel, table=True):
         else:
             # Mixtape is being updated.
             self.version += 1
-            if not is_undo_redo_operation:
-                # After a normal edit, break the redo chain and clear resembles_version
-                self.redo_to_version = None
-                self.resembles_version = None
-                # Note: undo_to_version and other fields are preserved for undo/redo operations
+            # After an edit, break the redo chain and clear resembles_version
+            self.redo_to_version = None
+            self.resembles_version = None
 
         self.last_modified_time = now
-        self._generate_snapshots()
-
-    def restore_from_snapshot(self, target_snapshot: "MixtapeSnapshot", is_undo: bool) -> None:
-        """
-        Restore the mixtape to the state captured in the given snapshot.
-
-        This method performs a complete restoration of the mixtape's state from
-        a historical snapshot, including all metadata fields, while handling
-        undo/redo pointers appropriately.
-        The tracks are not restored here - that must be done separately by the
-        calling code to maintain proper relationship management.
-
-        Args:
-            snapshot: The MixtapeSnapshot instance containing the state to restore
-            is_undo: Whether this is an undo or redo operation
-
-        Note:
-            This method modifies the current mixtape instance in-place. The tracks
-            relationship should be managed separately to avoid SQLAlchemy relationship
-            conflicts. The mixtape_id field is preserved to maintain database
-            referential integrity.
-        """
-        # Store current version for redo chain
-        current_version = self.version
-
-        # Set up new state: copy content from target snapshot but create new version
-        self.name = target_snapshot.name
-        self.intro_text = target_snapshot.intro_text
-        self.subtitle1 = target_snapshot.subtitle1
-        self.subtitle2 = target_snapshot.subtitle2
-        self.subtitle3 = target_snapshot.subtitle3
-        self.is_public = target_snapshot.is_public
-        self.spotify_playlist_uri = target_snapshot.spotify_playlist_uri
-
-        # Set up undo/redo pointers for the new version
-        self.resembles_version = target_snapshot.version  # This new version resembles the target
-
-        if is_undo:
-            self.undo_to_version = target_snapshot.undo_to_version  # Point to where target could undo
-            self.redo_to_version = current_version  # Can redo back to where we came from
-        else:
-            self.undo_to_version = current_version  # Point to where target could undo
-            self.redo_to_version = target_snapshot.redo_to_version  # Can redo back to where we came from
-
-    def _generate_snapshots(self):
-        """
-        Generate snapshot records for the current mixtape state.
-
-        This private method creates audit trail snapshots by:
-        1. Creating a new MixtapeSnapshot with the current mixtape state
-        2. Creating MixtapeSnapshotTrack records for each track
-        3. Establishing bidirectional relationships between snapshots and tracks
-
-        The snapshots are automatically linked to the mixtape via SQLAlchemy
-        relationship management. This method is called by finalize() to ensure
-        every version change is captured in the audit trail.
-
-        Note:
-            This method relies on SQLAlchemy's relationship management to set
-            foreign key fields automatically when objects are appended to
-            relationship collections.
-        """
-        # Build a new MixtapeSnapshot and attach to mixtape
-        new_snapshot = self._to_snapshot()    # this fills everything except mixtape_id
-        self.snapshots.append(new_snapshot)  # sets new_snapshot.mixtape_id automatically
-
-        # Build and attach MixtapeSnapshotTracks for each MixtapeTrack
-        for track in self.tracks:
-            snapshot_track = track._to_snapshot()
-            new_snapshot.tracks.append(snapshot_track)  # sets mixtape_snapshot_id automatically
 
 
 #  The mixtape_snapshot table is an append-only audit/version log for the
@@ -225,13 +131,6 @@ class MixtapeTrack(SQLModel, table=True):
         UniqueConstraint('mixtape_id', 'track_position', name='mixtape_track_unique_position'),
     )
 
-    def _to_snapshot(self)->"MixtapeSnapshotTrack":
-        return MixtapeSnapshotTrack(
-            track_position=self.track_position,
-            track_text=self.track_text,
-            spotify_uri=self.spotify_uri,
-        )
-
 # The mixtape_snapshot_track table is a snapshot for the mixtape_track table,
 # capturing a snapshot of each entry in the mixtape_track table as it has
 # existed at every moment the mixtape gets updated throughout history. This
@@ -252,20 +151,3 @@ class MixtapeSnapshotTrack(SQLModel, table=True):
     spotify_uri: str = Field(max_length=255)
     # Relationships
     mixtape_snapshot: "MixtapeSnapshot" = Relationship(back_populates="tracks")
-
-    def to_restored_track(self, mixtape_id: int)->"MixtapeTrack":
-        """
-        Convert this snapshot track to a restored track.
-
-        Args:
-            mixtape_id: The ID of the mixtape to restore the track to
-
-        Returns:
-            A MixtapeTrack instance with the same state as this snapshot track
-        """
-        return MixtapeTrack(
-            mixtape_id=mixtape_id,
-            track_position=self.track_position,
-            track_text=self.track_text,
-            spotify_uri=self.spotify_uri,
-        )
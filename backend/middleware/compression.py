@@ -0,0 +1,137 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.util.compression import (
+    COMPRESSION_MINIMUM_SIZE,
+    StreamCompressor,
+    compress,
+    is_compressible,
+    negotiate_encoding,
+)
+from backend.util.http_cache import encoded_etag
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, as negotiated with the request's
+    Accept-Encoding header.
+
+    - Only compressible content types (JSON, text) are compressed, and only when the body
+      is at least minimum_size bytes. Responses that already have a Content-Encoding
+      (e.g. precompressed cached bodies) are passed through untouched.
+    - A response sent in a single body message is compressed in one go and keeps an
+      accurate Content-Length. A streamed response is compressed chunk by chunk, each
+      chunk being flushed to the client as soon as it is produced.
+    - A compressed response's strong ETag gets the encoding appended (see encoded_etag),
+      as different content codings must have different strong validators. A 304 Not
+      Modified response carries the compressed variant's ETag when that is what the
+      client revalidated.
+
+    This is a pure ASGI middleware (rather than a BaseHTTPMiddleware), so responses are
+    not buffered or copied through an extra task on their way out.
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, _vary_on_accept_encoding(send))
+            return
+        responder = _CompressingResponder(send, encoding, self.minimum_size, Headers(scope=scope).get("if-none-match"))
+        await self.app(scope, receive, responder.send)
+
+
+def _vary_on_accept_encoding(send: Send) -> Send:
+    """
+    Wraps `send` for a response to a client that does not accept compression, marking
+    compressible responses as varying on Accept-Encoding all the same, so that shared
+    caches do not serve the uncompressed variant to clients that would get it compressed.
+    """
+    async def send_with_vary(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if is_compressible(headers.get("content-type")) and "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+        await send(message)
+
+    return send_with_vary
+
+
+class _CompressingResponder:
+    """Wraps `send` for one response, deciding on its first body message whether to compress."""
+    def __init__(self, send: Send, encoding: str, minimum_size: int, if_none_match: str | None = None) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.if_none_match = if_none_match
+        self.start_message: Message | None = None
+        self.compressor: StreamCompressor | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the headers back until the first body message shows how to send it.
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self.passthrough:
+            await self._send(message)
+        elif self.compressor is not None:
+            chunk = self.compressor.compress(body)
+            if not more_body:
+                chunk += self.compressor.finish()
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        else:
+            await self._first_body(body, more_body, message)
+
+    async def _first_body(self, body: bytes, more_body: bool, message: Message) -> None:
+        assert self.start_message is not None
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        etag = headers.get("etag")
+        if self.start_message["status"] == 304:
+            if etag is not None and self.if_none_match is not None and encoded_etag(etag, self.encoding) in self.if_none_match:
+                headers["ETag"] = encoded_etag(etag, self.encoding)
+            self.passthrough = True
+            await self._flush_start()
+            await self._send(message)
+            return
+        if "content-encoding" in headers or not is_compressible(headers.get("content-type")) or (not more_body and len(body) < self.minimum_size):
+            self.passthrough = True
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if etag is not None and not etag.startswith("W/"):
+            headers["ETag"] = encoded_etag(etag, self.encoding)
+        if not more_body:
+            compressed = compress(body, self.encoding)
+            headers["Content-Length"] = str(len(compressed))
+            await self._flush_start()
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": False})
+            return
+
+        # Streamed: the compressed length is not known up front.
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        self.compressor = StreamCompressor(self.encoding)
+        await self._flush_start()
+        await self._send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
+
+    async def _flush_start(self) -> None:
+        if self.start_message is not None:
+            await self._send(self.start_message)
+            self.start_message = None
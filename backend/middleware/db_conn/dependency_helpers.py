@@ -1,33 +1,177 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Callable, Generator
 
+from fastapi import Depends, Request
+from sqlalchemy import Engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from backend.middleware.db_conn.global_db_conn import get_current_engine
+from backend.middleware.db_conn.global_db_conn import (
+    get_current_async_engine,
+    get_current_async_replica_engine,
+    get_current_engine,
+    get_current_replica_engine,
+)
+from backend.middleware.db_conn.read_your_writes import (
+    ReadYourWritesTracker,
+    get_read_your_writes_tracker,
+)
+from backend.middleware.db_conn.session import RetryingSession
+from backend.middleware.db_conn.timeouts import SessionTimeouts
 
+_REPLAY_LSN_QUERY = text("SELECT pg_last_wal_replay_lsn()::text")
+_CURRENT_LSN_QUERY = text("SELECT pg_current_wal_lsn()::text")
 
-def get_readonly_session() -> Generator[Session, None, None]:  # pragma: no cover – utility
+
+def _select_readonly_engine(request: Request, tracker: ReadYourWritesTracker) -> Engine:
+    """
+    Pick the engine that should serve a read for the given client.
+
+    Reads go to the replica (if one is configured), unless the client wrote recently and
+    the replica has not yet replayed that write, in which case they go to the primary.
+    """
+    replica_engine = get_current_replica_engine()
+    if replica_engine is None:
+        return get_current_engine()
+
+    lsn = tracker.pending_lsn_for(request)
+    if lsn is None:
+        return replica_engine
+
+    with replica_engine.connect() as conn:
+        replay_lsn = conn.execute(_REPLAY_LSN_QUERY).scalar()
+    if tracker.is_caught_up(replay_lsn, lsn):
+        tracker.mark_caught_up_for(request)
+        return replica_engine
+    return get_current_engine()
+
+
+def get_readonly_session(
+    request: Request,
+    tracker: ReadYourWritesTracker = Depends(get_read_your_writes_tracker),
+) -> Generator[Session, None, None]:  # pragma: no cover – utility
     """FastAPI dependency that yields a *read-only* SQLModel session.
 
     The session is *not* committed when the request finishes – it is intended
     for read operations only. It is nevertheless enclosed in its own session
     context so that connection pooling works correctly.
+
+    If a read replica is configured, the session is bound to it, except for clients
+    that wrote recently and whose write the replica has not replayed yet.
     """
-    engine = get_current_engine()
-    with Session(engine) as session:
+    engine = _select_readonly_engine(request, tracker)
+    with RetryingSession(engine) as session:
         yield session
 
 
-def get_write_session() -> Generator[Session, None, None]:  # pragma: no cover – utility
+def _write_session(request: Request, tracker: ReadYourWritesTracker, timeouts: SessionTimeouts) -> Generator[Session, None, None]:
+    engine = get_current_engine()
+    with RetryingSession(engine) as session:
+        timeouts.apply(session)
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        if get_current_replica_engine() is not None:
+            lsn = session.execute(_CURRENT_LSN_QUERY).scalar_one()
+            session.commit()
+            tracker.record_write_for(request, lsn)
+
+
+def get_write_session(
+    request: Request,
+    tracker: ReadYourWritesTracker = Depends(get_read_your_writes_tracker),
+) -> Generator[Session, None, None]:  # pragma: no cover – utility
     """FastAPI dependency that provides a writable/transactional session.
 
     Any unhandled exception will cause a rollback. Otherwise, the transaction
     is committed after the request completes.
+
+    If a read replica is configured, the primary's WAL position after the commit is
+    recorded (and handed to the client in a cookie) so that the client's subsequent
+    reads observe its own writes, whichever instance serves them.
+
+    Statements are bounded by the default lock and statement timeouts (see
+    SessionTimeouts); use get_write_session_with_timeouts to override them.
     """
-    engine = get_current_engine()
-    with Session(engine) as session:
+    yield from _write_session(request, tracker, SessionTimeouts())
+
+
+def get_write_session_with_timeouts(
+    lock_timeout_ms: int | None = None,
+    statement_timeout_ms: int | None = None,
+) -> Callable[..., Generator[Session, None, None]]:
+    """
+    Build a get_write_session dependency with endpoint-specific lock/statement timeouts
+    (in milliseconds). Unspecified timeouts fall back to the defaults.
+    """
+    timeouts = SessionTimeouts(lock_timeout_ms=lock_timeout_ms, statement_timeout_ms=statement_timeout_ms)
+
+    def get_write_session_with_custom_timeouts(
+        request: Request,
+        tracker: ReadYourWritesTracker = Depends(get_read_your_writes_tracker),
+    ) -> Generator[Session, None, None]:  # pragma: no cover – utility
+        yield from _write_session(request, tracker, timeouts)
+
+    return get_write_session_with_custom_timeouts
+
+
+async def _select_async_readonly_engine(request: Request, tracker: ReadYourWritesTracker) -> AsyncEngine:
+    """Async counterpart of _select_readonly_engine."""
+    replica_engine = get_current_async_replica_engine()
+    if replica_engine is None:
+        return get_current_async_engine()
+
+    lsn = tracker.pending_lsn_for(request)
+    if lsn is None:
+        return replica_engine
+
+    async with replica_engine.connect() as conn:
+        replay_lsn = (await conn.execute(_REPLAY_LSN_QUERY)).scalar()
+    if tracker.is_caught_up(replay_lsn, lsn):
+        tracker.mark_caught_up_for(request)
+        return replica_engine
+    return get_current_async_engine()
+
+
+async def get_async_readonly_session(
+    request: Request,
+    tracker: ReadYourWritesTracker = Depends(get_read_your_writes_tracker),
+) -> AsyncGenerator[AsyncSession, None]:  # pragma: no cover – utility
+    """Async counterpart of get_readonly_session, for `async def` endpoints.
+
+    Queries are awaited on the event loop rather than blocking a thread-pool worker.
+    Relationships cannot be lazy-loaded on an AsyncSession, so endpoints must eagerly
+    load whatever they access.
+    """
+    engine = await _select_async_readonly_engine(request, tracker)
+    async with AsyncSession(engine, sync_session_class=RetryingSession) as session:
+        yield session
+
+
+async def get_async_write_session(
+    request: Request,
+    tracker: ReadYourWritesTracker = Depends(get_read_your_writes_tracker),
+) -> AsyncGenerator[AsyncSession, None]:  # pragma: no cover – utility
+    """Async counterpart of get_write_session, for `async def` endpoints.
+
+    Objects are not expired on commit, since they could not be transparently reloaded
+    afterwards on an AsyncSession.
+    """
+    engine = get_current_async_engine()
+    async with AsyncSession(engine, sync_session_class=RetryingSession, expire_on_commit=False) as session:
+        SessionTimeouts().apply(session.sync_session)
         try:
             yield session
-            session.commit()
+            await session.commit()
         except Exception:
-            session.rollback()
+            await session.rollback()
             raise
+
+        if get_current_async_replica_engine() is not None:
+            lsn = (await session.execute(_CURRENT_LSN_QUERY)).scalar_one()
+            await session.commit()
+            tracker.record_write_for(request, lsn)
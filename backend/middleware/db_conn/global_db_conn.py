@@ -1,6 +1,9 @@
 from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import create_engine
 
+from backend.middleware.db_conn.pool import PoolSettings, instrument_pool
+
 # Global variable holding the singular engine connection.
 # We assume there is only one global database connection to a single database. If in the future
 # we need to support multiple databases, this code will need to change.
@@ -8,6 +11,15 @@ from sqlmodel import create_engine
 # TODO: rather than a global variable, instantiate this at a known time and pass it through the app somehow?
 _current_engine: Engine | None = None
 
+# Optional engine connected to a read replica of the primary database. When set, read-only
+# sessions are routed to it (see get_readonly_session); writes always go to the primary.
+_current_replica_engine: Engine | None = None
+
+# Async counterparts of the engines above, connected to the same databases through the
+# async psycopg (v3) driver. They are created alongside their sync engines.
+_current_async_engine: AsyncEngine | None = None
+_current_async_replica_engine: AsyncEngine | None = None
+
 def normalize_db_url(db_url: str)->str:
     # Convert Neon `postgres://` URL to SQLAlchemy `postgresql://` format if needed
     if db_url.startswith('postgres://'):
@@ -22,22 +34,44 @@ def normalize_db_url(db_url: str)->str:
     else:
         raise Exception("db_url is invalid")
 
-def load_engine(engine_url: str)->Engine:
-    return create_engine(
+def load_engine(engine_url: str, metrics_prefix: str = "db.pool.primary")->Engine:
+    settings = PoolSettings()
+    engine = create_engine(
         engine_url,
-        pool_pre_ping=True,
-        pool_recycle=300,
-        echo=False  # Set to True for SQL debugging
+        echo=False,  # Set to True for SQL debugging
+        **settings.engine_kwargs(engine_url, is_async=False),
     )
+    instrument_pool(engine, metrics_prefix, settings)
+    return engine
+
+def to_async_db_url(engine_url: str)->str:
+    """Convert a normalized SQLAlchemy URL to one that uses the async psycopg (v3) driver."""
+    for prefix in ('postgresql+psycopg2://', 'postgresql+psycopg://', 'postgresql://'):
+        if engine_url.startswith(prefix):
+            return 'postgresql+psycopg://' + engine_url[len(prefix):]
+    raise Exception("engine_url is invalid")
+
+def load_async_engine(engine_url: str, metrics_prefix: str = "db.pool.primary_async")->AsyncEngine:
+    settings = PoolSettings()
+    async_url = to_async_db_url(engine_url)
+    engine = create_async_engine(
+        async_url,
+        echo=False,  # Set to True for SQL debugging
+        **settings.engine_kwargs(async_url, is_async=True),
+    )
+    instrument_pool(engine.sync_engine, metrics_prefix, settings)
+    return engine
 
 def initialize_engine(db_url: str)->Engine:
     '''
     Initializes the database engine at the given URL (if it isn't already initialized), stores it in a global variable, and returns it.
+    Also initializes the async engine for the same database.
     '''
-    global _current_engine
+    global _current_engine, _current_async_engine
     engine_url = normalize_db_url(db_url)
     if _current_engine is None:
         _current_engine = load_engine(engine_url)
+        _current_async_engine = load_async_engine(engine_url)
     elif str(_current_engine.url) != engine_url:
         raise Exception("engine was already loaded with one url, cannot load a engine at different url")
     return _current_engine
@@ -46,3 +80,30 @@ def get_current_engine()->Engine:
     if _current_engine is None:
         raise Exception("no engine has been initialized")
     return _current_engine
+
+def get_current_async_engine()->AsyncEngine:
+    if _current_async_engine is None:
+        raise Exception("no engine has been initialized")
+    return _current_async_engine
+
+def initialize_replica_engine(db_url: str)->Engine:
+    '''
+    Initializes the read replica engine at the given URL (if it isn't already initialized), stores it in a global variable, and returns it.
+    Also initializes the async engine for the same replica.
+    '''
+    global _current_replica_engine, _current_async_replica_engine
+    engine_url = normalize_db_url(db_url)
+    if _current_replica_engine is None:
+        _current_replica_engine = load_engine(engine_url, metrics_prefix="db.pool.replica")
+        _current_async_replica_engine = load_async_engine(engine_url, metrics_prefix="db.pool.replica_async")
+    elif str(_current_replica_engine.url) != engine_url:
+        raise Exception("replica engine was already loaded with one url, cannot load a replica engine at different url")
+    return _current_replica_engine
+
+def get_current_replica_engine()->Engine | None:
+    """Returns the read replica engine, or None if no replica is configured."""
+    return _current_replica_engine
+
+def get_current_async_replica_engine()->AsyncEngine | None:
+    """Returns the async read replica engine, or None if no replica is configured."""
+    return _current_async_replica_engine
@@ -0,0 +1,123 @@
+import os
+import time
+from typing import Any
+
+from sqlalchemy import Engine, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from sqlalchemy.pool.base import PoolProxiedConnection
+
+from backend.util.metrics import metrics
+
+POOL_MODE_QUEUE = "queue"
+POOL_MODE_NULL = "null"
+
+
+class PoolSettings:
+    """
+    Connection pool configuration, read from the environment.
+
+    DATABASE_POOL_MODE selects the strategy:
+    - "queue" (default): a local pool of long-lived connections per process, sized by
+      DATABASE_POOL_SIZE / DATABASE_POOL_MAX_OVERFLOW / DATABASE_POOL_TIMEOUT.
+    - "null": no local pooling; every session opens a fresh connection and closes it
+      afterwards. Meant for use behind an external pooler (PgBouncer, the Neon pooler) in
+      transaction mode, where each serverless instance holding its own pool would only
+      waste server connections. Prepared statements are disabled in this mode since
+      they do not survive across transactions on a transaction-mode pooler.
+
+    Connections are not pinged on checkout by default (DATABASE_POOL_PRE_PING); instead,
+    a statement failing on a dead connection at the start of a transaction is retried
+    once on a fresh connection (see RetryingSession).
+    """
+    mode: str
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_recycle: int
+    pool_pre_ping: bool
+
+    def __init__(self) -> None:
+        self.mode = os.environ.get("DATABASE_POOL_MODE", POOL_MODE_QUEUE)
+        if self.mode not in (POOL_MODE_QUEUE, POOL_MODE_NULL):
+            raise Exception(f"DATABASE_POOL_MODE must be '{POOL_MODE_QUEUE}' or '{POOL_MODE_NULL}', got '{self.mode}'")
+        self.pool_size = int(os.environ.get("DATABASE_POOL_SIZE", 5))
+        self.max_overflow = int(os.environ.get("DATABASE_POOL_MAX_OVERFLOW", 10))
+        self.pool_timeout = float(os.environ.get("DATABASE_POOL_TIMEOUT", 30))
+        self.pool_recycle = int(os.environ.get("DATABASE_POOL_RECYCLE", 300))
+        self.pool_pre_ping = os.environ.get("DATABASE_POOL_PRE_PING", "false").lower() == "true"
+
+    def engine_kwargs(self, engine_url: str, is_async: bool) -> dict[str, Any]:
+        """Keyword arguments for create_engine/create_async_engine implementing these settings."""
+        kwargs: dict[str, Any] = {"pool_pre_ping": self.pool_pre_ping}
+        if self.mode == POOL_MODE_NULL:
+            kwargs["poolclass"] = InstrumentedNullPool
+            if engine_url.startswith("postgresql+psycopg://"):
+                # psycopg (v3) prepares frequently-run statements server-side by default.
+                kwargs["connect_args"] = {"prepare_threshold": None}
+        else:
+            kwargs["poolclass"] = InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool
+            kwargs["pool_size"] = self.pool_size
+            kwargs["max_overflow"] = self.max_overflow
+            kwargs["pool_timeout"] = self.pool_timeout
+            kwargs["pool_recycle"] = self.pool_recycle
+        return kwargs
+
+
+class _InstrumentedPoolMixin:
+    """
+    Reports how long checkouts wait (including connecting, for a NullPool) and how
+    often they time out. The metrics are prefixed with `metrics_prefix`, which is set
+    by instrument_pool once the engine has created its pool.
+    """
+    metrics_prefix: str = "db.pool"
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            return super().connect()  # type: ignore[misc,no-any-return]
+        except exc.TimeoutError:
+            metrics.increment(f"{self.metrics_prefix}.checkout_timeouts")
+            raise
+        finally:
+            metrics.observe(f"{self.metrics_prefix}.checkout_wait", time.perf_counter() - start)
+
+    def recreate(self) -> Any:
+        # Pools are recreated (e.g. on dispose()); carry the prefix over to the new pool.
+        pool = super().recreate()  # type: ignore[misc]
+        pool.metrics_prefix = self.metrics_prefix
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    pass
+
+
+def instrument_pool(engine: Engine, metrics_prefix: str, settings: PoolSettings) -> None:
+    """
+    Label the engine pool's checkout metrics and, for queue pools, report pool saturation
+    (the fraction of the pool's capacity that is checked out) whenever metrics are read.
+    """
+    if isinstance(engine.pool, _InstrumentedPoolMixin):
+        engine.pool.metrics_prefix = metrics_prefix
+
+    if isinstance(engine.pool, QueuePool):
+        capacity = settings.pool_size + settings.max_overflow
+
+        def collect() -> dict[str, float]:
+            # Read the pool through the engine, as dispose() replaces it.
+            pool = engine.pool
+            checked_out = pool.checkedout() if isinstance(pool, QueuePool) else 0
+            return {
+                f"{metrics_prefix}.checked_out": checked_out,
+                f"{metrics_prefix}.saturation": checked_out / capacity if capacity else 1.0,
+            }
+
+        metrics.register_collector(metrics_prefix, collect)
@@ -0,0 +1,182 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.middleware.auth.user_cache import hash_token
+
+# Cookie carrying the primary's LSN after a client's last write, so that its reads stick
+# to the primary whichever instance serves them.
+WRITE_LSN_COOKIE = "mixtape_write_lsn"
+
+
+def parse_lsn(lsn: str) -> int:
+    """Convert a Postgres LSN in its textual `X/Y` form into a comparable integer."""
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def read_your_writes_key(request: Request) -> str | None:
+    """
+    Identify the client on whose behalf a request is made, for read-your-writes tracking.
+
+    Authenticated clients are identified by (a hash of) their access token. Anonymous
+    clients have no stable identity, so they are only tracked through the write LSN
+    cookie.
+    """
+    access_token = request.headers.get("x-stack-access-token")
+    if access_token:
+        return f"token:{hash_token(access_token)}"
+    return None
+
+
+def _cookie_lsn(request: Request) -> str | None:
+    """The LSN carried by the request's write LSN cookie, if it holds a valid one."""
+    lsn = request.cookies.get(WRITE_LSN_COOKIE)
+    if lsn is None:
+        return None
+    try:
+        parse_lsn(lsn)
+    except ValueError:
+        return None
+    return lsn
+
+
+class ReadYourWritesTracker:
+    """
+    Remembers which clients wrote recently, so their reads stick to the primary.
+
+    After a client writes, we record the primary's WAL position (LSN) at commit time.
+    Until the sticky window expires, that client's reads go to the primary unless the
+    replica has already replayed past the recorded LSN. Once the window expires (or the
+    replica has caught up), the entry is forgotten and reads go back to the replica.
+
+    The tracker lives in this process's memory, so on its own it only covers reads served
+    by the instance that handled the write. The LSN is therefore also handed to the client
+    in a cookie (see ReadYourWritesCookieMiddleware) that lasts for the sticky window, and
+    reads honour whichever of the two is more recent. Clients that do not send cookies
+    back (e.g. server-side callers) only get the per-instance guarantee.
+    """
+    sticky_seconds: float
+    max_entries: int
+
+    def __init__(
+        self,
+        sticky_seconds: float | None = None,
+        max_entries: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.sticky_seconds = sticky_seconds if sticky_seconds is not None else float(os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", 10))
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get("DATABASE_REPLICA_STICKY_MAX_ENTRIES", 10000))
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (LSN of the client's last write, time at which stickiness expires)
+        self._pending = OrderedDict[str, tuple[str, float]]()
+
+    def record_write(self, key: str, lsn: str) -> None:
+        """Record that the given client committed a write at the given primary LSN."""
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = (lsn, self._clock() + self.sticky_seconds)
+            if len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)  # Forget the oldest write.
+
+    def pending_lsn(self, key: str) -> str | None:
+        """
+        Return the LSN the replica must have replayed before it may serve this client,
+        or None if the client has no recent writes and can read from the replica freely.
+        """
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                return None
+            lsn, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._pending[key]
+                return None
+            return lsn
+
+    def pending_lsn_for(self, request: Request) -> str | None:
+        """
+        Return the LSN the replica must have replayed before it may serve this request:
+        the later of the client's tracked write and the write LSN cookie it sent back.
+        """
+        key = read_your_writes_key(request)
+        lsns = [lsn for lsn in (self.pending_lsn(key) if key else None, _cookie_lsn(request)) if lsn is not None]
+        return max(lsns, key=parse_lsn, default=None)
+
+    def record_write_for(self, request: Request, lsn: str) -> None:
+        """
+        Record that the request's client committed a write at the given primary LSN, and
+        have ReadYourWritesCookieMiddleware hand the LSN to the client in a cookie.
+        """
+        key = read_your_writes_key(request)
+        if key is not None:
+            self.record_write(key, lsn)
+        request.state.write_lsn_cookie = (
+            f"{WRITE_LSN_COOKIE}={lsn}; Max-Age={math.ceil(self.sticky_seconds)}; Path=/api; HttpOnly; SameSite=Lax"
+        )
+
+    def mark_caught_up(self, key: str) -> None:
+        """Forget the client's pending write once the replica is known to have replayed it."""
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def mark_caught_up_for(self, request: Request) -> None:
+        """
+        Forget the request's client's tracked write once the replica has replayed it. Its
+        cookie is left to expire, costing at most a replay LSN check per read until then.
+        """
+        key = read_your_writes_key(request)
+        if key is not None:
+            self.mark_caught_up(key)
+
+    def is_caught_up(self, replay_lsn: str | None, lsn: str) -> bool:
+        """
+        Whether a replica that has replayed WAL up to `replay_lsn` reflects a write at `lsn`.
+
+        A NULL replay LSN means the "replica" is not in recovery at all (i.e. it is itself a
+        primary, as in local development), so it is always up to date.
+        """
+        if replay_lsn is None:
+            return True
+        return parse_lsn(replay_lsn) >= parse_lsn(lsn)
+
+
+class ReadYourWritesCookieMiddleware:
+    """
+    Sets the write LSN cookie on responses to requests that committed a write.
+
+    Write sessions commit when the endpoint's dependencies are torn down, after the
+    endpoint has already built its response, so the cookie cannot be set on the response
+    object itself. Instead, the write session leaves the cookie in the request state, and
+    this middleware adds it to the response headers on their way out.
+    """
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and "write_lsn_cookie" in state:
+                MutableHeaders(scope=message).append("set-cookie", state["write_lsn_cookie"])
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+_read_your_writes_tracker = ReadYourWritesTracker()
+
+def get_read_your_writes_tracker() -> ReadYourWritesTracker:
+    """FastAPI dependency returning the process-wide read-your-writes tracker."""
+    return _read_your_writes_tracker
@@ -0,0 +1,99 @@
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session as SQLAlchemySession
+from sqlalchemy.orm import SessionTransaction
+from sqlmodel import Session
+
+from backend.util.metrics import metrics
+
+# session.info key set once the current transaction has checked out a connection.
+_CONNECTED_KEY = "retry_on_disconnect.connected"
+# session.info key set while commit() runs its final flush.
+_COMMITTING_KEY = "retry_on_disconnect.committing"
+
+
+class _RetryOnDisconnect(SQLAlchemySession):
+    """
+    Retries a statement once if it failed because its pooled connection was dead.
+
+    This is the "optimistic" alternative to pinging every connection on checkout: a
+    connection dropped while idle in the pool (server restart, idle timeout, pooler
+    recycling) only costs a failed attempt on the first statement that uses it. The
+    failed connection is invalidated by SQLAlchemy, so the retry gets a fresh one.
+
+    Only the first statement, flush or commit of a transaction is retried, i.e. one issued
+    before the transaction checked out its connection: nothing has been sent on the
+    dead connection yet, so nothing is lost by rolling back. Objects added to the
+    session but not yet flushed are re-added after the rollback; a flush of changes
+    to already-persistent objects is not retried, as the rollback would expire them.
+    """
+    def execute(self, *args: Any, **kwargs: Any) -> Any:
+        pending = self._pending_if_retryable()
+        try:
+            return super().execute(*args, **kwargs)
+        except exc.DBAPIError as e:
+            if pending is None or not e.connection_invalidated:
+                raise
+            self._rollback_for_retry(pending)
+            return super().execute(*args, **kwargs)
+
+    def flush(self, objects: Any = None) -> None:
+        # A flush run by commit() cannot roll back by itself; commit() retries instead.
+        pending = None if self.info.get(_COMMITTING_KEY) else self._pending_if_retryable()
+        try:
+            super().flush(objects)
+        except exc.DBAPIError as e:
+            if pending is None or not e.connection_invalidated:
+                raise
+            self._rollback_for_retry(pending)
+            super().flush(objects)
+
+    def commit(self) -> None:
+        pending = self._pending_if_retryable()
+        self.info[_COMMITTING_KEY] = True
+        try:
+            super().commit()
+        except exc.DBAPIError as e:
+            if pending is None or not e.connection_invalidated:
+                raise
+            self._rollback_for_retry(pending)
+            super().commit()
+        finally:
+            self.info.pop(_COMMITTING_KEY, None)
+
+    def _pending_if_retryable(self) -> list[Any] | None:
+        """
+        The objects pending in the session if the next operation may be retried, else
+        None. They are captured up front, as a failed flush already discards them.
+        """
+        if self.info.get(_CONNECTED_KEY) or self.dirty or self.deleted:
+            return None
+        return list(self.new)
+
+    def _rollback_for_retry(self, pending: list[Any]) -> None:
+        metrics.increment("db.disconnect_retries")
+        # Rolling back expunges objects that were added during the transaction.
+        self.rollback()
+        self.add_all(pending)
+
+
+@event.listens_for(_RetryOnDisconnect, "after_begin")
+def _mark_connected(session: SQLAlchemySession, transaction: SessionTransaction, connection: Connection) -> None:
+    session.info[_CONNECTED_KEY] = True
+
+
+@event.listens_for(_RetryOnDisconnect, "after_transaction_end")
+def _mark_disconnected(session: SQLAlchemySession, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_CONNECTED_KEY, None)
+
+
+class RetryingSession(Session, _RetryOnDisconnect):
+    """
+    SQLModel session that retries a statement once on a dead pooled connection.
+
+    _RetryOnDisconnect sits between SQLModel's Session and SQLAlchemy's in the MRO, so
+    that both `session.exec(...)` and `session.execute(...)` go through the retry.
+    """
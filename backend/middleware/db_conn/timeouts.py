@@ -0,0 +1,89 @@
+import os
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, SessionTransaction
+
+# Postgres SQLSTATEs raised when a lock cannot be acquired (lock_timeout or NOWAIT) and
+# when a statement is cancelled (statement_timeout).
+SQLSTATE_LOCK_NOT_AVAILABLE = "55P03"
+SQLSTATE_QUERY_CANCELED = "57014"
+
+# Seconds after which clients are told to retry a request that hit a timeout.
+LOCK_CONTENTION_RETRY_AFTER_SECONDS = 1
+STATEMENT_TIMEOUT_RETRY_AFTER_SECONDS = 5
+
+_SET_TIMEOUTS_QUERY = text(
+    "SELECT set_config('lock_timeout', :lock_timeout, true), set_config('statement_timeout', :statement_timeout, true)"
+)
+
+
+class SessionTimeouts:
+    """
+    Bounds on how long a write session's statements may wait, in milliseconds (0 disables).
+
+    - lock_timeout caps how long a statement waits for a row lock, e.g. the
+      `SELECT ... FOR UPDATE` of a mixtape that another request is saving.
+    - statement_timeout caps the total run time of any single statement.
+
+    Defaults come from DATABASE_LOCK_TIMEOUT_MS / DATABASE_STATEMENT_TIMEOUT_MS; endpoints
+    can override them (see get_write_session_with_timeouts). Without them, requests
+    queued on a hot mixtape each hold a thread-pool worker and a pool connection for as
+    long as the lock holder takes, starving unrelated requests.
+    """
+    lock_timeout_ms: int
+    statement_timeout_ms: int
+
+    def __init__(self, lock_timeout_ms: int | None = None, statement_timeout_ms: int | None = None) -> None:
+        self.lock_timeout_ms = lock_timeout_ms if lock_timeout_ms is not None else int(os.environ.get("DATABASE_LOCK_TIMEOUT_MS", 5000))
+        self.statement_timeout_ms = statement_timeout_ms if statement_timeout_ms is not None else int(os.environ.get("DATABASE_STATEMENT_TIMEOUT_MS", 30000))
+
+    def apply(self, session: Session) -> None:
+        """
+        Apply the timeouts to every transaction the session begins.
+
+        The settings are transaction-scoped (like SET LOCAL), so they never leak to the
+        next user of the pooled connection, and remain correct behind a transaction-mode
+        external pooler.
+        """
+        params = {"lock_timeout": f"{self.lock_timeout_ms}ms", "statement_timeout": f"{self.statement_timeout_ms}ms"}
+
+        @event.listens_for(session, "after_begin")
+        def set_timeouts(session: Session, transaction: SessionTransaction, connection: Connection) -> None:
+            connection.execute(_SET_TIMEOUTS_QUERY, params)
+
+
+def _sqlstate(error: exc.DBAPIError) -> str | None:
+    # psycopg (v3) exposes the SQLSTATE as `sqlstate`, psycopg2 as `pgcode`.
+    return getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+
+
+async def database_timeout_exception_handler(request: Request, error: Exception) -> JSONResponse:
+    """
+    Turn lock and statement timeouts into responses the client can retry.
+
+    - A lock that could not be acquired (lock_timeout, NOWAIT) means the mixtape is being
+      modified by another request: 409 Conflict.
+    - A statement cancelled by statement_timeout means the database is overloaded:
+      503 Service Unavailable.
+
+    Both carry a Retry-After header. Any other database error is re-raised, so that it is
+    logged and reported as a 500 as before.
+    """
+    assert isinstance(error, exc.DBAPIError)
+    sqlstate = _sqlstate(error)
+    if sqlstate == SQLSTATE_LOCK_NOT_AVAILABLE:
+        return JSONResponse(
+            status_code=409,
+            content={"detail": "This mixtape is being modified by another request; please retry"},
+            headers={"Retry-After": str(LOCK_CONTENTION_RETRY_AFTER_SECONDS)},
+        )
+    if sqlstate == SQLSTATE_QUERY_CANCELED:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "The database took too long to respond; please retry"},
+            headers={"Retry-After": str(STATEMENT_TIMEOUT_RETRY_AFTER_SECONDS)},
+        )
+    raise error
@@ -1,38 +1,46 @@
 import logging
-import traceback
 
-from fastapi import Request, Response
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-# Configure basic logging at import time if the root logger has no handlers configured.
-# This is important on platforms like Vercel where the runtime might not configure logging.
-if not logging.getLogger().handlers:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-    )
+logger = logging.getLogger(__name__)
 
 
-async def exception_logging_middleware(request: Request, call_next) -> Response:
+class ExceptionLoggingMiddleware:
     """Middleware that logs unhandled exceptions with full traceback.
 
     The middleware catches all exceptions raised downstream, logs the full traceback, and
     returns a generic 500 response. This ensures that we never swallow errors silently in
     production (e.g. Vercel logs).
+
+    If the response had already started when the exception was raised, a 500 can no longer
+    be sent, so the exception is logged and re-raised for the server to abort the response.
     """
-    try:
-        return await call_next(request) # type: ignore[no-any-return]
-    except Exception as exc:  # pylint: disable=broad-except
-        # Log full traceback along with request information for debugging.
-        logging.error(
-            "Unhandled exception while processing %s %s: %s\n%s",
-            request.method,
-            request.url.path,
-            exc,
-            traceback.format_exc(),
-        )
-
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal server error"},
-        )
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:  # pylint: disable=broad-except
+            # Log full traceback along with request information for debugging.
+            logger.exception("Unhandled exception while processing %s %s: %s", scope["method"], scope["path"], exc)
+            if response_started:
+                raise
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": "Internal server error"},
+            )
+            await response(scope, receive, send)
@@ -1,22 +1,274 @@
 from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import NamedTuple
 
-from sqlalchemy import desc, func
+from sqlalchemy import (
+    ARRAY,
+    Insert,
+    Integer,
+    String,
+    Update,
+    bindparam,
+    delete,
+    desc,
+    func,
+    insert,
+    or_,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.sql import Select
 from sqlalchemy.sql.base import ExecutableOption
+from sqlalchemy.sql.expression import CTE
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
-from backend.db_models.mixtape import Mixtape, MixtapeSnapshot
+from backend.db_models.mixtape import (
+    Mixtape,
+    MixtapeSnapshot,
+    MixtapeSnapshotTrack,
+    MixtapeTrack,
+)
 
+# Columns written by save(); a snapshot copies all of them (plus the mixtape's ID).
+_MIXTAPE_COLUMNS = [column.key for column in Mixtape.__table__.columns if column.key != "id"]  # type: ignore[attr-defined]
+_TRACK_COLUMNS = ["track_position", "track_text", "spotify_uri"]
 
-class MixtapeQuery:
-    session: Session
+
+class TrackWithNeighbors(NamedTuple):
+    """A track of a mixtape, with the positions of the tracks around it."""
+    track: MixtapeTrack
+    previous_track_position: int | None
+    next_track_position: int | None
+    track_count: int
+
+
+class _MixtapeStatements:
+    """
+    Builds the statements shared by MixtapeQuery and AsyncMixtapeQuery, so that the
+    sync and async query classes only differ in how they execute them.
+
+    With for_update, mixtapes are locked with SELECT ... FOR UPDATE, which waits for
+    the lock (up to the session's lock_timeout) by default. Alternatively:
+    - nowait: fail immediately if another transaction holds the lock.
+    - skip_locked: silently leave out mixtapes that are locked, so a locked mixtape
+      looks the same as a missing one.
+    """
     for_update: bool
+    nowait: bool
+    skip_locked: bool
     options: list[ExecutableOption]
 
-    def __init__(self, session: Session, options: list[ExecutableOption], for_update: bool = False):
-        self.session = session
+    def __init__(self, options: list[ExecutableOption], for_update: bool = False, nowait: bool = False, skip_locked: bool = False):
+        if (nowait or skip_locked) and not for_update:
+            raise ValueError("nowait and skip_locked only apply with for_update")
+        if nowait and skip_locked:
+            raise ValueError("nowait and skip_locked are mutually exclusive")
         self.for_update = for_update
+        self.nowait = nowait
+        self.skip_locked = skip_locked
         self.options = options or []
 
+    def _list_mixtapes_for_user_statement(self, stack_auth_user_id: str, q: str | None, limit: int, offset: int) -> SelectOfScalar[Mixtape]:
+        statement = select(Mixtape).where(Mixtape.stack_auth_user_id == stack_auth_user_id)
+        if len(self.options) > 0:
+            statement = statement.options(*self.options)
+        if q:
+            statement = statement.where(func.lower(Mixtape.name).contains(func.lower(q)))
+        if self.for_update:
+            statement = statement.with_for_update(nowait=self.nowait, skip_locked=self.skip_locked)
+        return statement.order_by(desc(Mixtape.last_modified_time)).limit(limit).offset(offset)  # type: ignore[arg-type]
+
+    def _load_by_public_id_statement(self, public_id: str) -> SelectOfScalar[Mixtape]:
+        statement = select(Mixtape).where(Mixtape.public_id == public_id)
+        if len(self.options) > 0:
+            statement = statement.options(*self.options)
+        if self.for_update:
+            statement = statement.with_for_update(nowait=self.nowait, skip_locked=self.skip_locked)
+        return statement
+
+    def _load_by_public_ids_statement(self, public_ids: list[str]) -> SelectOfScalar[Mixtape]:
+        statement = select(Mixtape).where(Mixtape.public_id.in_(public_ids))  # type: ignore[attr-defined]
+        if len(self.options) > 0:
+            statement = statement.options(*self.options)
+        return statement
+
+    def _load_most_used_tracks_statement(self, limit: int) -> Select:
+        uses = func.count().label("uses")
+        return select(MixtapeTrack.spotify_uri, uses).group_by(MixtapeTrack.spotify_uri).order_by(desc(uses)).limit(limit)
+
+    def _load_version_by_public_id_statement(self, public_id: str) -> SelectOfScalar[Mixtape]:
+        # Only what is needed to check access and compare versions; no tracks.
+        return select(Mixtape).where(Mixtape.public_id == public_id).options(
+            load_only(Mixtape.id, Mixtape.public_id, Mixtape.version, Mixtape.stack_auth_user_id, Mixtape.is_public),  # type: ignore[arg-type]
+        )
+
+    def _load_snapshot_by_version_statement(self, mixtape_id: int, version: int) -> SelectOfScalar[MixtapeSnapshot]:
+        return select(MixtapeSnapshot).where(
+            MixtapeSnapshot.mixtape_id == mixtape_id,
+            MixtapeSnapshot.version == version
+        )
+
+    def _load_snapshot_by_public_id_statement(self, public_id: str, version: int) -> SelectOfScalar[MixtapeSnapshot]:
+        return select(MixtapeSnapshot).where(
+            MixtapeSnapshot.public_id == public_id,
+            MixtapeSnapshot.version == version,
+        ).options(selectinload(MixtapeSnapshot.tracks))  # type: ignore[arg-type]
+
+    def _load_track_statement(self, mixtape_id: int, track_position: int) -> Select:
+        # Every part is a lookup (or index-only scan) on the unique (mixtape_id,
+        # track_position) index.
+        same_mixtape = select(MixtapeTrack.track_position).where(MixtapeTrack.mixtape_id == mixtape_id)
+        previous_position = same_mixtape.where(MixtapeTrack.track_position < track_position).order_by(desc(MixtapeTrack.track_position)).limit(1)  # type: ignore[arg-type]
+        next_position = same_mixtape.where(MixtapeTrack.track_position > track_position).order_by(MixtapeTrack.track_position).limit(1)  # type: ignore[arg-type]
+        track_count = select(func.count()).select_from(MixtapeTrack).where(MixtapeTrack.mixtape_id == mixtape_id)
+        return select(
+            MixtapeTrack,
+            previous_position.scalar_subquery(),
+            next_position.scalar_subquery(),
+            track_count.scalar_subquery(),
+        ).where(
+            MixtapeTrack.mixtape_id == mixtape_id,
+            MixtapeTrack.track_position == track_position,
+        )
+
+    def _write_statement(self, written_mixtape: CTE, new_tracks: CTE) -> Select:
+        """
+        Complete a statement that writes a mixtape row (the `written_mixtape` CTE, which
+        returns all of the mixtape's columns) with the mixtape's tracks (the `new_tracks`
+        CTE, with the track columns) and a snapshot of the new version, by chaining
+        data-modifying CTEs:
+
+            deleted_tracks:   DELETE the mixtape's tracks at positions no longer in use
+            written_tracks:   upsert the tracks, keyed on (mixtape_id, track_position)
+            snapshot:         INSERT a copy of the written mixtape row
+            snapshot_tracks:  INSERT a copy of the tracks for the snapshot
+
+        Upserting by position (rather than deleting and re-inserting every track) keeps
+        the DELETE and INSERT from touching the same (mixtape_id, track_position) key
+        within one statement. Tracks that are unchanged at their position are left
+        alone, so only the rows an edit affects are written (and locked, and bloat the
+        table); the snapshot always copies every track. If no mixtape row is written,
+        nothing else is either. The statement returns the mixtape's ID.
+        """
+        deleted_tracks = delete(MixtapeTrack).where(
+            MixtapeTrack.mixtape_id.in_(select(written_mixtape.c.id)),  # type: ignore[attr-defined]
+            MixtapeTrack.track_position.not_in(select(new_tracks.c.track_position)),  # type: ignore[attr-defined]
+        ).cte("deleted_tracks")
+
+        upsert_tracks = pg_insert(MixtapeTrack).from_select(
+            ["mixtape_id", *_TRACK_COLUMNS],
+            select(written_mixtape.c.id, *[new_tracks.c[column] for column in _TRACK_COLUMNS])
+            .select_from(written_mixtape.join(new_tracks, true())),
+        )
+        existing_track = MixtapeTrack.__table__.c  # type: ignore[attr-defined]
+        written_tracks = upsert_tracks.on_conflict_do_update(
+            constraint="mixtape_track_unique_position",
+            set_={"track_text": upsert_tracks.excluded.track_text, "spotify_uri": upsert_tracks.excluded.spotify_uri},
+            where=or_(
+                existing_track.track_text.is_distinct_from(upsert_tracks.excluded.track_text),
+                existing_track.spotify_uri.is_distinct_from(upsert_tracks.excluded.spotify_uri),
+            ),
+        ).cte("written_tracks")
+
+        snapshot = insert(MixtapeSnapshot).from_select(
+            ["mixtape_id", *_MIXTAPE_COLUMNS],
+            select(written_mixtape.c.id, *[written_mixtape.c[column] for column in _MIXTAPE_COLUMNS]),
+        ).returning(MixtapeSnapshot.__table__.c.id).cte("snapshot")  # type: ignore[attr-defined]
+
+        snapshot_tracks = insert(MixtapeSnapshotTrack).from_select(
+            ["mixtape_snapshot_id", *_TRACK_COLUMNS],
+            select(snapshot.c.id, *[new_tracks.c[column] for column in _TRACK_COLUMNS])
+            .select_from(snapshot.join(new_tracks, true())),
+        ).cte("snapshot_tracks")
+
+        # Data-modifying CTEs run even though the result does not reference them, but
+        # SQLAlchemy only renders CTEs that are referenced or added explicitly.
+        return select(written_mixtape.c.id).add_cte(deleted_tracks, written_tracks, snapshot, snapshot_tracks)
+
+    def _save_statement(self, mixtape: Mixtape) -> Select:
+        """
+        A single statement that writes the mixtape (INSERT if new, else UPDATE), its
+        tracks and a snapshot of the new version; see _write_statement.
+
+        The tracks are passed as one array parameter per column and expanded with
+        unnest(), so the statement does not grow with the number of tracks.
+        """
+        values = {column: getattr(mixtape, column) for column in _MIXTAPE_COLUMNS}
+        write_mixtape: Insert | Update
+        if mixtape.id is None:
+            write_mixtape = insert(Mixtape).values(**values)
+        else:
+            write_mixtape = update(Mixtape).where(Mixtape.id == mixtape.id).values(**values)  # type: ignore[arg-type]
+        written_mixtape = write_mixtape.returning(*Mixtape.__table__.columns).cte("written_mixtape")  # type: ignore[attr-defined]
+
+        # Postgres zips multiple set-returning functions in a select list.
+        new_tracks = select(
+            func.unnest(bindparam("track_positions", [t.track_position for t in mixtape.tracks], type_=ARRAY(Integer))).label("track_position"),
+            func.unnest(bindparam("track_texts", [t.track_text for t in mixtape.tracks], type_=ARRAY(String))).label("track_text"),
+            func.unnest(bindparam("track_spotify_uris", [t.spotify_uri for t in mixtape.tracks], type_=ARRAY(String))).label("spotify_uri"),
+        ).cte("new_tracks")
+
+        return self._write_statement(written_mixtape, new_tracks)
+
+    def _restore_snapshot_statement(self, mixtape_id: int, target_version: int, is_undo: bool) -> Select:
+        """
+        A single statement that makes a new version of the mixtape resembling one of its
+        snapshots (for undo/redo), copying the snapshot's content and tracks within
+        Postgres; see _write_statement.
+
+        The new version copies the target snapshot's content, records that it resembles
+        the target, and gets new undo/redo pointers:
+        - Undo: undo goes to where the target could undo to, and redo comes back to the
+          current version.
+        - Redo: undo comes back to the current version, and redo goes to where the target
+          could redo to.
+
+        Like finalize(), the version is incremented and last_modified_time is updated.
+        Nothing is written if the target snapshot does not exist.
+        """
+        target = self._load_snapshot_by_version_statement(mixtape_id, target_version).cte("target")
+        values = {
+            column: target.c[column]
+            for column in ["name", "intro_text", "subtitle1", "subtitle2", "subtitle3", "is_public", "spotify_playlist_uri"]
+        }
+        current_version = Mixtape.__table__.c.version  # type: ignore[attr-defined]
+        if is_undo:
+            undo_to_version, redo_to_version = target.c.undo_to_version, current_version
+        else:
+            undo_to_version, redo_to_version = current_version, target.c.redo_to_version
+        written_mixtape = update(Mixtape).where(Mixtape.id == target.c.mixtape_id).values(  # type: ignore[arg-type]
+            **values,
+            resembles_version=target.c.version,
+            undo_to_version=undo_to_version,
+            redo_to_version=redo_to_version,
+            version=current_version + 1,
+            last_modified_time=datetime.now(UTC),
+        ).returning(*Mixtape.__table__.columns).cte("written_mixtape")  # type: ignore[attr-defined]
+
+        new_tracks = select(*[MixtapeSnapshotTrack.__table__.c[column] for column in _TRACK_COLUMNS]).where(  # type: ignore[attr-defined]
+            MixtapeSnapshotTrack.mixtape_snapshot_id.in_(select(target.c.id)),  # type: ignore[attr-defined]
+        ).cte("new_tracks")
+
+        return self._write_statement(written_mixtape, new_tracks)
+
+    @staticmethod
+    def _after_save(mixtape: Mixtape, mixtape_id: int) -> None:
+        mixtape.id = mixtape_id
+        for track in mixtape.tracks:
+            track.mixtape_id = mixtape_id
+
+
+class MixtapeQuery(_MixtapeStatements):
+    session: Session
+
+    def __init__(self, session: Session, options: list[ExecutableOption], for_update: bool = False, nowait: bool = False, skip_locked: bool = False):
+        super().__init__(options=options, for_update=for_update, nowait=nowait, skip_locked=skip_locked)
+        self.session = session
+
     def list_mixtapes_for_user(self, stack_auth_user_id: str, q: str | None = None, limit: int = 20, offset: int = 0) -> Sequence[Mixtape]:
         """
         List all mixtapes for a user, ordered by last_modified_time descending, with optional search and pagination.
@@ -25,25 +277,45 @@ class MixtapeQuery:
         offset: pagination offset
         Returns a list of dicts with public_id, name, last_modified_time.
         """
-        statement = select(Mixtape).where(Mixtape.stack_auth_user_id == stack_auth_user_id)
-        if len(self.options) > 0:
-            statement = statement.options(*self.options)
-        if q:
-            statement = statement.where(func.lower(Mixtape.name).contains(func.lower(q)))
-        if self.for_update:
-            statement = statement.with_for_update()
-        statement = statement.order_by(desc(Mixtape.last_modified_time)).limit(limit).offset(offset)  # type: ignore[arg-type]
+        statement = self._list_mixtapes_for_user_statement(stack_auth_user_id, q, limit, offset)
         return self.session.exec(statement).all()
 
     def load_by_public_id(self, public_id: str) -> Mixtape | None:
         # Get mixtape with tracks
-        statement = select(Mixtape).where(Mixtape.public_id == public_id)
-        if len(self.options) > 0:
-            statement = statement.options(*self.options)
-        if self.for_update:
-            statement = statement.with_for_update()
+        statement = self._load_by_public_id_statement(public_id)
         return self.session.exec(statement).first()
 
+    def load_by_public_ids(self, public_ids: list[str]) -> Sequence[Mixtape]:
+        """
+        Load the mixtapes with the given public IDs (in no particular order; missing ones
+        are left out) in one query, plus one per relationship loaded through `options`.
+        """
+        statement = self._load_by_public_ids_statement(public_ids)
+        return self.session.exec(statement).all()
+
+    def load_most_used_tracks(self, limit: int) -> dict[str, int]:
+        """
+        The Spotify URIs of the (at most limit) tracks used most across all mixtapes, with
+        the number of mixtape tracks using each, most used first.
+        """
+        rows = self.session.execute(self._load_most_used_tracks_statement(limit)).all()
+        return {row.spotify_uri: row.uses for row in rows}
+
+    def load_version_by_public_id(self, public_id: str) -> Mixtape | None:
+        """
+        Cheaply load a mixtape's version, for conditional requests: only the columns
+        needed to check access (owner, is_public) and its ID, public ID and version are
+        loaded, and no tracks.
+
+        The mixtape is returned detached from the session, so that a full load of the same
+        mixtape afterwards is not served from this partially loaded instance. Accessing
+        any other attribute of it raises an error.
+        """
+        mixtape = self.session.exec(self._load_version_by_public_id_statement(public_id)).first()
+        if mixtape is not None:
+            self.session.expunge(mixtape)
+        return mixtape
+
     def load_snapshot_by_version(self, mixtape_id: int, version: int) -> MixtapeSnapshot | None:
         """
         Load a specific snapshot by version number.
@@ -63,8 +335,134 @@ class MixtapeQuery:
             This method does not use SELECT FOR UPDATE since snapshots are immutable
             and only used for reading historical data during undo/redo operations.
         """
-        statement = select(MixtapeSnapshot).where(
-            MixtapeSnapshot.mixtape_id == mixtape_id,
-            MixtapeSnapshot.version == version
-        )
+        statement = self._load_snapshot_by_version_statement(mixtape_id, version)
         return self.session.exec(statement).first()
+
+    def load_snapshot_by_public_id(self, public_id: str, version: int) -> MixtapeSnapshot | None:
+        """
+        Load the snapshot of a mixtape at a specific version, with its tracks, to serve
+        that (immutable) version of the mixtape.
+
+        Returns None if the mixtape does not exist or never had that version.
+        """
+        statement = self._load_snapshot_by_public_id_statement(public_id, version)
+        return self.session.exec(statement).first()
+
+    def load_track(self, mixtape_id: int, track_position: int) -> TrackWithNeighbors | None:
+        """
+        Load a single track of a mixtape by its position, plus the positions of the
+        previous and next tracks and the number of tracks, in one query that only touches
+        the index of the mixtape's tracks (and the one row).
+
+        Returns None if the mixtape has no track at that position.
+        """
+        row = self.session.execute(self._load_track_statement(mixtape_id, track_position)).first()
+        return TrackWithNeighbors(*row) if row is not None else None
+
+    def save(self, mixtape: Mixtape) -> None:
+        """
+        Write the (finalized) mixtape, its tracks and a snapshot of its new version in a
+        single statement, i.e. a single round trip regardless of the number of tracks.
+
+        The mixtape may be new or loaded through this session (normally for update).
+        Either way, it is written by this statement rather than flushed by the ORM, so
+        the session is cleared first: the mixtape, its tracks (including tracks removed
+        from it) and anything else loaded in the session become detached, and must not be
+        modified further. Call this as the last change of the transaction.
+        """
+        self.session.expunge_all()
+        mixtape_id = self.session.execute(self._save_statement(mixtape)).scalar_one()
+        self._after_save(mixtape, mixtape_id)
+
+    def restore_snapshot(self, mixtape: Mixtape, target_version: int, is_undo: bool) -> bool:
+        """
+        Make a new version of the mixtape (loaded through this session, normally for
+        update) that resembles its snapshot at target_version, for undo/redo.
+
+        This is a single statement, regardless of the number of tracks: the snapshot's
+        content and tracks are copied inside Postgres, and no ORM objects are built for
+        them (see _restore_snapshot_statement). The mixtape is expired, so its new state
+        and tracks are loaded when next accessed.
+
+        Returns False, without writing anything, if there is no snapshot at target_version.
+        """
+        if mixtape.id is None:
+            raise ValueError("Cannot restore a snapshot of an unsaved mixtape")
+        statement = self._restore_snapshot_statement(mixtape.id, target_version, is_undo)
+        restored = self.session.execute(statement).first() is not None
+        self.session.expire(mixtape)
+        return restored
+
+
+class AsyncMixtapeQuery(_MixtapeStatements):
+    """
+    Async counterpart of MixtapeQuery, for use with AsyncSession.
+
+    Relationships cannot be lazy-loaded on an AsyncSession, so any relationship the
+    caller will access (e.g. Mixtape.tracks) must be eagerly loaded via `options`.
+    """
+    session: AsyncSession
+
+    def __init__(self, session: AsyncSession, options: list[ExecutableOption], for_update: bool = False, nowait: bool = False, skip_locked: bool = False):
+        super().__init__(options=options, for_update=for_update, nowait=nowait, skip_locked=skip_locked)
+        self.session = session
+
+    async def list_mixtapes_for_user(self, stack_auth_user_id: str, q: str | None = None, limit: int = 20, offset: int = 0) -> Sequence[Mixtape]:
+        """See MixtapeQuery.list_mixtapes_for_user."""
+        statement = self._list_mixtapes_for_user_statement(stack_auth_user_id, q, limit, offset)
+        return (await self.session.exec(statement)).all()
+
+    async def load_by_public_id(self, public_id: str) -> Mixtape | None:
+        """See MixtapeQuery.load_by_public_id."""
+        statement = self._load_by_public_id_statement(public_id)
+        return (await self.session.exec(statement)).first()
+
+    async def load_by_public_ids(self, public_ids: list[str]) -> Sequence[Mixtape]:
+        """See MixtapeQuery.load_by_public_ids."""
+        statement = self._load_by_public_ids_statement(public_ids)
+        return (await self.session.exec(statement)).all()
+
+    async def load_most_used_tracks(self, limit: int) -> dict[str, int]:
+        """See MixtapeQuery.load_most_used_tracks."""
+        rows = (await self.session.execute(self._load_most_used_tracks_statement(limit))).all()
+        return {row.spotify_uri: row.uses for row in rows}
+
+    async def load_version_by_public_id(self, public_id: str) -> Mixtape | None:
+        """See MixtapeQuery.load_version_by_public_id."""
+        mixtape = (await self.session.exec(self._load_version_by_public_id_statement(public_id))).first()
+        if mixtape is not None:
+            self.session.expunge(mixtape)
+        return mixtape
+
+    async def load_snapshot_by_version(self, mixtape_id: int, version: int) -> MixtapeSnapshot | None:
+        """See MixtapeQuery.load_snapshot_by_version."""
+        statement = self._load_snapshot_by_version_statement(mixtape_id, version)
+        return (await self.session.exec(statement)).first()
+
+    async def load_snapshot_by_public_id(self, public_id: str, version: int) -> MixtapeSnapshot | None:
+        """See MixtapeQuery.load_snapshot_by_public_id."""
+        statement = self._load_snapshot_by_public_id_statement(public_id, version)
+        return (await self.session.exec(statement)).first()
+
+    async def load_track(self, mixtape_id: int, track_position: int) -> TrackWithNeighbors | None:
+        """See MixtapeQuery.load_track."""
+        row = (await self.session.execute(self._load_track_statement(mixtape_id, track_position))).first()
+        return TrackWithNeighbors(*row) if row is not None else None
+
+    async def save(self, mixtape: Mixtape) -> None:
+        """See MixtapeQuery.save."""
+        self.session.expunge_all()
+        mixtape_id = (await self.session.execute(self._save_statement(mixtape))).scalar_one()
+        self._after_save(mixtape, mixtape_id)
+
+    async def restore_snapshot(self, mixtape: Mixtape, target_version: int, is_undo: bool) -> bool:
+        """
+        See MixtapeQuery.restore_snapshot. The mixtape's relationships cannot be lazy-loaded
+        afterwards on an AsyncSession; load it again to access its tracks.
+        """
+        if mixtape.id is None:
+            raise ValueError("Cannot restore a snapshot of an unsaved mixtape")
+        statement = self._restore_snapshot_statement(mixtape.id, target_version, is_undo)
+        restored = (await self.session.execute(statement)).first() is not None
+        self.session.expire(mixtape)
+        return restored
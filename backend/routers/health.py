@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session, func, select
 
 from backend.middleware.db_conn.dependency_helpers import get_readonly_session
+from backend.util.metrics import metrics
 
 router = APIRouter()
 
@@ -19,3 +23,23 @@ def db(session: Session = Depends(get_readonly_session)):
 @router.get("/app")
 def app_health():
     return {"status": "ok"}
+
+def require_metrics_token(request: Request) -> None:
+    """
+    Only lets through requests bearing the METRICS_TOKEN shared secret in the
+    x-metrics-token header. Without a configured METRICS_TOKEN, metrics are not served.
+    """
+    expected_token = os.environ.get("METRICS_TOKEN")
+    if not expected_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = request.headers.get("x-metrics-token")
+    if token is None or not hmac.compare_digest(token.encode(), expected_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing metrics token")
+
+@router.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def get_metrics():
+    """
+    Returns the in-process metrics (counters, gauges and timings) of this instance.
+    Requires the METRICS_TOKEN shared secret in the x-metrics-token header.
+    """
+    return metrics.snapshot()
@@ -1,31 +1,197 @@
+import logging
+import os
 import threading
+import time
+from collections.abc import Iterator, Sequence
+from typing import NamedTuple
+from urllib.parse import urlencode
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, delete
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.api_models.mixtape import (
+    MixtapeBatchError,
+    MixtapeBatchItem,
+    MixtapeBatchResponse,
+    MixtapeCompactResponse,
+    MixtapeCompactTrackResponse,
+    MixtapeOperation,
     MixtapeOverview,
+    MixtapePatchRequest,
     MixtapeRequest,
     MixtapeResponse,
+    MixtapeTrackPageResponse,
     MixtapeTrackRequest,
     MixtapeTrackResponse,
 )
+from backend.api_models.spotify import TrackAlbum, TrackDetails
+from backend.client.cache_purge import (
+    AbstractCachePurgeClient,
+    get_cache_purge_client,
+)
 from backend.client.spotify import SpotifyClient, get_spotify_client
+from backend.client.spotify.client import SpotifyTrack, SpotifyTrackNotFoundError
+from backend.client.spotify.rate_limit import spotify_deadline
+from backend.client.spotify.real import GET_TRACKS_BATCH_SIZE
 from backend.convert_client_api_models.track import (
     spotify_track_to_mixtape_track_details,
 )
-from backend.db_models.mixtape import Mixtape, MixtapeTrack
+from backend.db_models.mixtape import (
+    Mixtape,
+    MixtapeSnapshot,
+    MixtapeSnapshotTrack,
+    MixtapeTrack,
+)
 from backend.middleware.auth.authenticated_user import AuthenticatedUser
 from backend.middleware.auth.dependency_helpers import get_optional_user, get_user
 from backend.middleware.db_conn.dependency_helpers import (
+    get_async_readonly_session,
     get_readonly_session,
     get_write_session,
+    get_write_session_with_timeouts,
+)
+from backend.query.mixtape import AsyncMixtapeQuery, MixtapeQuery
+from backend.util.compression import COMPRESSION_MINIMUM_SIZE, negotiate_encoding
+from backend.util.http_cache import (
+    encoded_etag,
+    if_none_match,
+    immutable_cache_control,
+    mixtape_etag,
+    mutable_cache_control,
+    not_modified,
 )
-from backend.query.mixtape import MixtapeQuery
+from backend.util.json_response import FastJSONResponse
+from backend.util.metrics import metrics
+from backend.util.response_cache import ResponseCache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Autosaves of one mixtape queue up behind each other's row lock. Rather than let them
+# pile up (each holding a worker and a pool connection), give up after a short wait and
+# let the client retry on the resulting 409.
+get_autosave_session = get_write_session_with_timeouts(lock_timeout_ms=3000)
+
+# Serialized MixtapeResponse bodies, keyed by (public_id, version, MixtapeResponseOptions).
+# A body depends only on the mixtape's content at that version and on the response
+# options (not on who is reading it, nor on whether it was built from the mixtape or from
+# its snapshot), and every write bumps the version, so entries never need invalidating.
+mixtape_response_cache = ResponseCache(
+    "mixtape_response_cache",
+    max_entries=int(os.environ.get("MIXTAPE_RESPONSE_CACHE_SIZE", 1000)),
+)
+
+# Largest page of tracks a client may request at once (see MixtapeResponseOptions).
+MAX_TRACK_LIMIT = 100
+
+# Most mixtapes a client may request at once (see get_mixtapes_batch).
+MAX_BATCH_SIZE = 50
+
+# Time budget for looking up the tracks of a mixtape response on Spotify, after which
+# the response is served partial (see lookup_track_details).
+ENRICHMENT_DEADLINE_SECONDS = float(os.environ.get("MIXTAPE_ENRICHMENT_DEADLINE_SECONDS", 3))
+
+
+class PartialMixtapeResponse(Exception):
+    """
+    Raised from response cache builds when the response is partial: it must not be
+    cached, and every request sharing the build should serve it uncached (see
+    serialize_mixtape_response).
+    """
+    def __init__(self, mixtape_response: MixtapeResponse) -> None:
+        super().__init__("Partial mixtape response")
+        self.mixtape_response = mixtape_response
+
+
+class MixtapeResponseOptions(NamedTuple):
+    """
+    What a mixtape response includes, as requested through query parameters (see
+    get_mixtape_response_options). Part of the response cache key and of the ETag, as
+    each combination is a different representation of the mixtape.
+    """
+    album_image_width: int | None = None
+    track_offset: int = 0
+    track_limit: int | None = None
+
+    def etag_variant(self) -> str | None:
+        parts = []
+        if self.album_image_width is not None:
+            parts.append(album_image_variant(self.album_image_width))
+        if self.track_offset or self.track_limit is not None:
+            parts.append(f"o{self.track_offset}l{self.track_limit if self.track_limit is not None else ''}")
+        return ".".join(p for p in parts if p) or None
+
+    def query_string(self) -> str:
+        """The query parameters requesting these options, e.g. for Content-Location."""
+        params = {
+            "album_image_width": self.album_image_width,
+            "track_offset": self.track_offset or None,
+            "track_limit": self.track_limit,
+        }
+        return urlencode({name: value for name, value in params.items() if value is not None})
+
+    def select_tracks(self, tracks: Sequence[MixtapeTrack | MixtapeSnapshotTrack]) -> list[MixtapeTrack | MixtapeSnapshotTrack]:
+        """The requested page of the tracks, in order of track_position."""
+        ordered = sorted(tracks, key=lambda t: t.track_position)
+        end = self.track_offset + self.track_limit if self.track_limit is not None else None
+        return ordered[self.track_offset:end]
+
+
+def get_mixtape_response_options(
+    album_image_width: int | None = Query(None, ge=1, description="Only return the album image best matching this width (the smallest at least this wide, else the largest)"),
+    track_offset: int = Query(0, ge=0, description="Number of tracks (in order of position) to skip"),
+    track_limit: int | None = Query(None, ge=1, le=MAX_TRACK_LIMIT, description="Max number of tracks to return (default: all of them)"),
+) -> MixtapeResponseOptions:
+    return MixtapeResponseOptions(album_image_width=album_image_width, track_offset=track_offset, track_limit=track_limit)
+
+class MixtapeEdgeCache:
+    """
+    Purges a mixtape's responses from the edge cache (CDN) after it is written, so that
+    shared links can be edge-cached (see mutable_cache_control) without serving a stale
+    version for long.
+
+    Purges run as background tasks, after the response has been sent, so that they never
+    slow down or fail the write.
+    """
+    def __init__(self, request: Request, background_tasks: BackgroundTasks, cache_purge_client: AbstractCachePurgeClient) -> None:
+        self.request = request
+        self.background_tasks = background_tasks
+        self.cache_purge_client = cache_purge_client
+
+    def purge(self, mixtape: Mixtape) -> None:
+        """
+        Purge every response of the mixtape's current version: the full, compact and
+        per-track responses, with any query string (e.g. album_image_width). Streamed
+        responses are never cached.
+        If it is no longer readable by anyone (e.g. it was just made private), also purge
+        its versions, which edge caches otherwise keep serving until they expire.
+        """
+        path = self.request.url_for("get_mixtape", public_id=mixtape.public_id).path
+        paths = [path, f"{path}?*", f"{path}/compact*", f"{path}/tracks/*"]
+        if not is_publicly_readable(mixtape):
+            paths.append(f"{path}/versions/*")
+        self.background_tasks.add_task(self.cache_purge_client.purge, paths)
+
+def get_mixtape_edge_cache(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    cache_purge_client: AbstractCachePurgeClient = Depends(get_cache_purge_client),
+) -> MixtapeEdgeCache:
+    return MixtapeEdgeCache(request, background_tasks, cache_purge_client)
 
 def parse_track(track: MixtapeTrackRequest, spotify_client: SpotifyClient) -> MixtapeTrack:
     """
@@ -47,11 +213,17 @@ def parse_track(track: MixtapeTrackRequest, spotify_client: SpotifyClient) -> Mi
 
     Note:
         The function extracts the track ID from the Spotify URI format "spotify:track:ID"
-        and validates it against the Spotify API before proceeding.
+        and validates it against the Spotify API before proceeding. Malformed URIs (and
+        IDs, see the client's get_track) are rejected without any lookup, and tracks
+        recently found not to exist are not looked up again.
     """
     # Look up TrackDetails just to verify track is valid.
-    track_id = track.spotify_uri.replace('spotify:track:', '')
-    details = spotify_client.get_track(track_id)
+    details: SpotifyTrack | None = None
+    if track.spotify_uri.startswith('spotify:track:'):
+        try:
+            details = spotify_client.get_track(track.spotify_uri.removeprefix('spotify:track:'))
+        except SpotifyTrackNotFoundError:
+            details = None
     if not details:
         raise HTTPException(status_code=400, detail=f"Invalid Spotify URI or failed lookup for track with position {track.track_position}: {track.spotify_uri}")
     return MixtapeTrack(
@@ -103,10 +275,10 @@ def create_mixtape(
     )
 
     mixtape.finalize()
-    session.add(mixtape) # add root object if not already present.
+    MixtapeQuery(session=session, options=[]).save(mixtape)
     session.commit()
 
-    return load_mixtape_api_models_from_dbmodel(spotify_client, mixtape)
+    return mixtape_json_response(load_mixtape_api_models_from_dbmodel(spotify_client, mixtape), status_code=201)
 
 @router.post("/{public_id}/claim", response_model=MixtapeResponse)
 def claim_mixtape(
@@ -114,6 +286,7 @@ def claim_mixtape(
     session: Session = Depends(get_write_session),
     authenticated_user: AuthenticatedUser = Depends(get_user),
     spotify_client: SpotifyClient = Depends(get_spotify_client),
+    edge_cache: MixtapeEdgeCache = Depends(get_mixtape_edge_cache),
 ):
     """Claim an anonymous mixtape, making the authenticated user the owner."""
     stack_auth_user_id = authenticated_user.get_user_id()
@@ -133,14 +306,15 @@ def claim_mixtape(
     mixtape.stack_auth_user_id = stack_auth_user_id
 
     mixtape.finalize()
-    session.add(mixtape) # add root object if not already present.
+    mixtape_query.save(mixtape)
     session.commit()
+    edge_cache.purge(mixtape)
 
-    return load_mixtape_api_models_from_dbmodel(spotify_client, mixtape)
+    return mixtape_json_response(load_mixtape_api_models_from_dbmodel(spotify_client, mixtape))
 
 @router.get("", response_model=list[MixtapeOverview])
-def list_my_mixtapes(
-    session: Session = Depends(get_readonly_session),
+async def list_my_mixtapes(
+    session: AsyncSession = Depends(get_async_readonly_session),
     authenticated_user: AuthenticatedUser = Depends(get_user),
     q: str | None = Query(None, description="Search mixtape titles (partial match)"),
     limit: int = Query(20, ge=1, le=100, description="Max results to return"),
@@ -149,70 +323,176 @@ def list_my_mixtapes(
     """
     Lists all mixtapes owned by the current user, taking into account the specified query parameters.
     Does not return the entire mixtape, just an overview.
+    This endpoint only talks to the database, so it runs on the event loop with an async
+    session rather than occupying a thread-pool worker.
     """
     stack_auth_user_id = authenticated_user.get_user_id()
 
-    mixtape_query = MixtapeQuery(session=session, for_update=False, options=[])
-    mixtapes = mixtape_query.list_mixtapes_for_user(stack_auth_user_id, q=q, limit=limit, offset=offset)
-    return [
+    mixtape_query = AsyncMixtapeQuery(session=session, for_update=False, options=[])
+    mixtapes = await mixtape_query.list_mixtapes_for_user(stack_auth_user_id, q=q, limit=limit, offset=offset)
+    return FastJSONResponse([
         MixtapeOverview(
             public_id=m.public_id,
             name=m.name,
             last_modified_time=m.last_modified_time.isoformat(),
         )
         for m in mixtapes
-    ]
+    ])
 
-def load_mixtape_api_models_from_dbmodel(spotify_client: SpotifyClient, mixtape: Mixtape) -> MixtapeResponse:
+def load_mixtape_api_models_from_dbmodel(spotify_client: SpotifyClient, mixtape: Mixtape | MixtapeSnapshot, options: MixtapeResponseOptions = MixtapeResponseOptions()) -> MixtapeResponse:
     """
-    Convert a database mixtape model to an API response model.
+    Convert a database mixtape model (or a snapshot of one of its versions) to an API
+    response model.
 
     This function enriches the mixtape data by:
-    1. Fetching detailed track information from Spotify for each track
+    1. Fetching detailed track information from Spotify for all tracks, in batches
     2. Converting database models to API response models
     3. Computing the can_undo and can_redo flags based on version pointers
     4. Formatting datetime fields as ISO strings
 
     Args:
         spotify_client: Spotify client for fetching track details
-        mixtape: Database model instance of the mixtape
+        mixtape: Database model instance of the mixtape, or of its snapshot at a version
+        options: What to include in the response: which page of the tracks (only those
+            are looked up on Spotify), and which album images (see select_album_images)
 
     Returns:
-        MixtapeResponse: API response model with enriched track data and undo/redo flags
-
-    Raises:
-        HTTPException 500: If track details cannot be fetched from Spotify
+        MixtapeResponse: API response model with enriched track data and undo/redo flags.
+            If Spotify is slow or unavailable, tracks that could not be looked up in time
+            are placeholders, and the response is flagged is_partial. Tracks that no
+            longer exist on Spotify are placeholders too, but do not make it partial.
 
     Note:
         The can_undo flag is True if undo_to_version is not None
         The can_redo flag is True if redo_to_version is not None
+        Tracks are returned in order of track_position
+        track_count is the number of tracks of the mixtape, not of the page returned
     """
-    # Enrich tracks with TrackDetails
-    enriched_tracks: list[MixtapeTrackResponse] = []
-    for track in mixtape.tracks:
-        try:
-            track_id = track.spotify_uri.replace('spotify:track:', '')
-            details = spotify_client.get_track(track_id)
-            if not details:
-                raise Exception("Track not found")
-        except Exception:
-            raise HTTPException(status_code=500, detail=f"Failed to fetch track details for {track.spotify_uri}")
-        enriched_tracks.append(
-            MixtapeTrackResponse(
-                track_position=track.track_position,
-                track_text=track.track_text,
-                track=spotify_track_to_mixtape_track_details(details)
-            )
-        )
+    tracks = options.select_tracks(mixtape.tracks)
+    return build_mixtape_response(mixtape, tracks, lookup_track_details(spotify_client, tracks), options.album_image_width)
+
+class TrackLookup(NamedTuple):
+    """Details of tracks looked up on Spotify (see lookup_track_details)."""
+    # Track ID -> details
+    details: dict[str, SpotifyTrack]
+    # IDs of the tracks Spotify does not know (e.g. removed since they were added). Their
+    # placeholders are part of the content, unlike those of tracks that could not be
+    # looked up in time.
+    missing_ids: frozenset[str]
+
+    def is_settled(self, track: MixtapeTrack | MixtapeSnapshotTrack) -> bool:
+        """Whether the track was looked up, or is known not to exist."""
+        track_id = spotify_track_id(track)
+        return track_id in self.details or track_id in self.missing_ids
+
+    def track_response(self, track: MixtapeTrack | MixtapeSnapshotTrack, album_image_width: int | None = None) -> MixtapeTrackResponse:
+        """The API response model for the track: a placeholder if it has no details."""
+        details = self.details.get(spotify_track_id(track))
+        if details is None:
+            return placeholder_track_response(track)
+        return track_response(track, details, album_image_width)
+
+def build_mixtape_response(
+    mixtape: Mixtape | MixtapeSnapshot,
+    tracks: Sequence[MixtapeTrack | MixtapeSnapshotTrack],
+    lookup: TrackLookup,
+    album_image_width: int | None = None,
+) -> MixtapeResponse:
+    """
+    The API response model for a mixtape with the given tracks of it, from track details
+    that have already been looked up (see lookup_track_details). Tracks whose details
+    are missing are placeholders; if any of them could not be looked up (rather than
+    being known not to exist), the response is flagged is_partial.
+    """
+    track_responses = [lookup.track_response(track, album_image_width) for track in tracks]
+    is_partial = not all(lookup.is_settled(track) for track in tracks)
+    if is_partial:
+        metrics.increment("mixtape_enrichment.partial_responses")
+    return load_mixtape_header_api_model_from_dbmodel(mixtape).model_copy(update={
+        "tracks": track_responses,
+        "is_partial": is_partial,
+    })
+
+def load_mixtape_header_api_model_from_dbmodel(mixtape: Mixtape | MixtapeSnapshot) -> MixtapeResponse:
+    """The API response model for a mixtape (or snapshot), without any of its tracks."""
+    return MixtapeResponse(
+        public_id=mixtape.public_id,
+        name=mixtape.name,
+        intro_text=mixtape.intro_text,
+        subtitle1=mixtape.subtitle1,
+        subtitle2=mixtape.subtitle2,
+        subtitle3=mixtape.subtitle3,
+        is_public=mixtape.is_public,
+        create_time=mixtape.create_time.isoformat(),
+        last_modified_time=mixtape.last_modified_time.isoformat(),
+        stack_auth_user_id=mixtape.stack_auth_user_id,
+        version=mixtape.version,
+        spotify_playlist_url=spotify_playlist_url(mixtape),
+        tracks=[],
+        track_count=len(mixtape.tracks),
+        can_undo=mixtape.undo_to_version is not None,
+        can_redo=mixtape.redo_to_version is not None,
+    )
 
-    # Convert Spotify playlist URI to URL if it exists
-    spotify_playlist_url = None
-    if mixtape.spotify_playlist_uri:
-        # Extract playlist ID from URI (spotify:playlist:ID) and convert to URL
-        playlist_id = mixtape.spotify_playlist_uri.split(':')[-1]
-        spotify_playlist_url = f"https://open.spotify.com/playlist/{playlist_id}"
+def spotify_track_id(track: MixtapeTrack | MixtapeSnapshotTrack) -> str:
+    return track.spotify_uri.replace('spotify:track:', '')
 
-    return MixtapeResponse(
+def lookup_track_details(spotify_client: SpotifyClient, tracks: Sequence[MixtapeTrack | MixtapeSnapshotTrack], deadline_seconds: float = ENRICHMENT_DEADLINE_SECONDS) -> TrackLookup:
+    """
+    Look up the details of the given tracks on Spotify in a single deduplicated pass (see
+    get_tracks), within deadline_seconds (including the client's waits and retries).
+    Tracks that Spotify does not know are left out, and listed as missing.
+
+    If the lookup fails or runs out of time, falls back to the details the client has
+    cached, however old (see get_cached_tracks), so that a slow or unavailable Spotify
+    only degrades responses instead of failing them. Tracks that are not cached are left
+    out, but not listed as missing, as whether they exist is unknown.
+    """
+    track_ids = [spotify_track_id(track) for track in tracks]
+    try:
+        with spotify_deadline(deadline_seconds):
+            details = spotify_client.get_tracks(track_ids)
+    except Exception:
+        logger.warning("Failed to fetch details of %d tracks from Spotify; falling back to cached details", len(tracks), exc_info=True)
+        metrics.increment("mixtape_enrichment.lookup_failures")
+        return TrackLookup(spotify_client.get_cached_tracks(track_ids), frozenset())
+    return TrackLookup(details, frozenset(track_ids) - details.keys())
+
+def track_response(track: MixtapeTrack | MixtapeSnapshotTrack, details: SpotifyTrack | None, album_image_width: int | None = None) -> MixtapeTrackResponse:
+    """
+    The API response model for a track, given its details from Spotify.
+
+    Raises:
+        HTTPException 500: If there are no details (the track could not be fetched)
+    """
+    if not details:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch track details for {track.spotify_uri}")
+    return MixtapeTrackResponse(
+        track_position=track.track_position,
+        track_text=track.track_text,
+        track=spotify_track_to_mixtape_track_details(details, album_image_width=album_image_width),
+    )
+
+def placeholder_track_response(track: MixtapeTrack | MixtapeSnapshotTrack) -> MixtapeTrackResponse:
+    """
+    The API response model for a track whose details could not be looked up: only its
+    ID and URI are known.
+    """
+    track_id = spotify_track_id(track)
+    return MixtapeTrackResponse(
+        track_position=track.track_position,
+        track_text=track.track_text,
+        track=TrackDetails(id=track_id, name="", artists=[], album=TrackAlbum(name="", images=[]), uri=track.spotify_uri),
+        is_placeholder=True,
+    )
+
+def load_compact_mixtape_api_model_from_dbmodel(mixtape: Mixtape) -> MixtapeCompactResponse:
+    """
+    Convert a database mixtape model to a compact API response model: the same as
+    load_mixtape_api_models_from_dbmodel, but with the tracks as stored (Spotify URI,
+    position and text), so that no Spotify lookups are needed.
+    """
+    return MixtapeCompactResponse(
         public_id=mixtape.public_id,
         name=mixtape.name,
         intro_text=mixtape.intro_text,
@@ -224,12 +504,76 @@ def load_mixtape_api_models_from_dbmodel(spotify_client: SpotifyClient, mixtape:
         last_modified_time=mixtape.last_modified_time.isoformat(),
         stack_auth_user_id=mixtape.stack_auth_user_id,
         version=mixtape.version,
-        spotify_playlist_url=spotify_playlist_url,
-        tracks=enriched_tracks,
+        spotify_playlist_url=spotify_playlist_url(mixtape),
+        tracks=[
+            MixtapeCompactTrackResponse(
+                track_position=track.track_position,
+                track_text=track.track_text,
+                spotify_uri=track.spotify_uri,
+            )
+            for track in sorted(mixtape.tracks, key=lambda t: t.track_position)
+        ],
         can_undo=mixtape.undo_to_version is not None,
         can_redo=mixtape.redo_to_version is not None,
     )
 
+def spotify_playlist_url(mixtape: Mixtape | MixtapeSnapshot) -> str | None:
+    """URL of the Spotify playlist the mixtape was exported to, if any."""
+    if not mixtape.spotify_playlist_uri:
+        return None
+    # Extract playlist ID from URI (spotify:playlist:ID) and convert to URL
+    playlist_id = mixtape.spotify_playlist_uri.split(':')[-1]
+    return f"https://open.spotify.com/playlist/{playlist_id}"
+
+def serialize_mixtape_response(spotify_client: SpotifyClient, mixtape: Mixtape | MixtapeSnapshot, options: MixtapeResponseOptions) -> bytes:
+    """
+    Build the API response for a mixtape (or snapshot) and serialize it, for caching.
+
+    Raises:
+        PartialMixtapeResponse: If the response is partial, so must not be cached
+    """
+    mixtape_response = load_mixtape_api_models_from_dbmodel(spotify_client, mixtape, options)
+    if mixtape_response.is_partial:
+        raise PartialMixtapeResponse(mixtape_response)
+    return mixtape_response.model_dump_json().encode()
+
+def get_or_build_mixtape_version_body(mixtape_query: MixtapeQuery, spotify_client: SpotifyClient, public_id: str, version: int, options: MixtapeResponseOptions) -> bytes | None:
+    """
+    The serialized response for the given version of a mixtape, from the response cache,
+    or built from the version's snapshot on a miss. Returns None if the mixtape never had
+    that version.
+
+    get_mixtape and get_mixtape_version share these bodies (and concurrent builds of
+    them), so both must build them the same way: from the immutable snapshot, rather
+    than from the mixtape and its tracks, which a write could change between loading the
+    one and the other.
+
+    Raises:
+        PartialMixtapeResponse: If the response is partial, so must not be cached
+    """
+    def build() -> bytes | None:
+        snapshot = mixtape_query.load_snapshot_by_public_id(public_id, version)
+        if snapshot is None:
+            return None
+        body = serialize_mixtape_response(spotify_client, snapshot, options)
+        mixtape_response_cache.put((public_id, version, options), body)
+        return body
+
+    return mixtape_response_cache.get_or_build((public_id, version, options), build)
+
+def mixtape_json_response(mixtape_response: MixtapeResponse, status_code: int = 200, headers: dict[str, str] | None = None, etag_variant: str | None = None) -> Response:
+    """
+    Serialize the mixtape response directly (see FastJSONResponse), with the ETag of the
+    returned mixtape version, so that clients can revalidate their copy with If-None-Match.
+
+    Partial responses get neither an ETag nor any caching, so that clients and CDNs fetch
+    the full response next time instead of revalidating the partial one.
+    """
+    if mixtape_response.is_partial:
+        return FastJSONResponse(mixtape_response, status_code=status_code, headers={**(headers or {}), "Cache-Control": "no-store"})
+    etag = mixtape_etag(mixtape_response.public_id, mixtape_response.version, etag_variant)
+    return FastJSONResponse(mixtape_response, status_code=status_code, headers={**(headers or {}), "ETag": etag})
+
 def validate_mixtape_exists(mixtape: Mixtape | None) -> Mixtape:
     """
     Validate that the mixtape exists.
@@ -240,6 +584,10 @@ def validate_mixtape_exists(mixtape: Mixtape | None) -> Mixtape:
         raise HTTPException(status_code=404, detail="Mixtape not found")
     return mixtape
 
+def is_publicly_readable(mixtape: Mixtape) -> bool:
+    """Whether anyone, logged in or not, may read the mixtape (see validate_mixtape_access)."""
+    return mixtape.stack_auth_user_id is None or mixtape.is_public
+
 def validate_mixtape_access(mixtape: Mixtape | None, authenticated_user: AuthenticatedUser | None, is_write: bool = True) -> Mixtape:
     """
     Validate that the user can access the mixtape to perform the requested action (read or write).
@@ -268,33 +616,335 @@ def validate_mixtape_access(mixtape: Mixtape | None, authenticated_user: Authent
 
     return mixtape
 
+@router.get("/batch", response_model=MixtapeBatchResponse)
+def get_mixtapes_batch(
+    ids: str = Query(..., description=f"Comma-separated public IDs of the mixtapes to get (at most {MAX_BATCH_SIZE})"),
+    options: MixtapeResponseOptions = Depends(get_mixtape_response_options),
+    session: Session = Depends(get_readonly_session),
+    authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
+    spotify_client: SpotifyClient = Depends(get_spotify_client),
+):
+    """
+    Gets several mixtapes at once, e.g. for a page listing them.
+
+    All the mixtapes and their tracks are loaded in two queries, and the tracks of all of
+    them are looked up on Spotify in a single deduplicated pass (see get_tracks), instead
+    of once per mixtape. The options apply to each mixtape.
+
+    Each mixtape is checked on its own, as get_mixtape would: the results have the
+    mixtapes that could be returned (partial ones if Spotify is slow, see
+    lookup_track_details), and the error (status code and detail) of those that could
+    not (not found or not authorized), in the order requested. Duplicate IDs are only
+    returned once.
+
+    The response is never shared by caches, as it can combine mixtapes with different
+    access rules.
+
+    Raises:
+        HTTPException 422: If no IDs, or more than MAX_BATCH_SIZE, are given
+    """
+    public_ids = list(dict.fromkeys(public_id.strip() for public_id in ids.split(",") if public_id.strip()))
+    if not public_ids:
+        raise HTTPException(status_code=422, detail="No mixtape IDs given")
+    if len(public_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_SIZE} mixtapes can be requested at once")
+
+    mixtape_query = MixtapeQuery(session=session, for_update=False, options=[selectinload(Mixtape.tracks)]) # type: ignore[arg-type]
+    mixtapes_by_id = {mixtape.public_id: mixtape for mixtape in mixtape_query.load_by_public_ids(public_ids)}
+
+    readable: dict[str, Mixtape] = {}
+    errors: dict[str, MixtapeBatchError] = {}
+    for public_id in public_ids:
+        try:
+            readable[public_id] = validate_mixtape_access(mixtapes_by_id.get(public_id), authenticated_user, is_write=False)
+        except HTTPException as e:
+            errors[public_id] = MixtapeBatchError(status_code=e.status_code, detail=e.detail)
+
+    tracks_by_id = {public_id: options.select_tracks(mixtape.tracks) for public_id, mixtape in readable.items()}
+    lookup = lookup_track_details(spotify_client, [track for tracks in tracks_by_id.values() for track in tracks])
+
+    results = [
+        MixtapeBatchItem(public_id=public_id, error=errors[public_id]) if public_id in errors else MixtapeBatchItem(
+            public_id=public_id,
+            mixtape=build_mixtape_response(readable[public_id], tracks_by_id[public_id], lookup, options.album_image_width),
+        )
+        for public_id in public_ids
+    ]
+
+    return FastJSONResponse(
+        MixtapeBatchResponse(results=results),
+        headers={"Cache-Control": mutable_cache_control(is_shared=False)},
+    )
+
 @router.get("/{public_id}", response_model=MixtapeResponse)
 def get_mixtape(
     public_id: str,
+    request: Request,
+    options: MixtapeResponseOptions = Depends(get_mixtape_response_options),
     session: Session = Depends(get_readonly_session),
     authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
     spotify_client: SpotifyClient = Depends(get_spotify_client),
 ):
     """
     Gets the mixtape with the given public ID.
+
+    The response's Content-Location header points to the immutable URL of the returned
+    version (see get_mixtape_version), which shared links can use to be served by CDNs.
+    Anonymous reads of public mixtapes may also be cached by CDNs for a short while (see
+    mutable_cache_control); writes purge them. Other reads are private to the client.
+
+    Only a version-only query and the access check run on every request:
+    - If the If-None-Match header matches the current version's ETag, returns 304 Not
+      Modified.
+    - Otherwise, returns the serialized response for the current version from the
+      in-process response cache, building it (loading the version's snapshot with its
+      tracks, and looking them up on Spotify) on a miss. Concurrent misses for the same
+      version share a single build.
+    - If Spotify is slow or unavailable, the response may be partial (see
+      lookup_track_details), in which case it is neither cached nor given an ETag.
+
+    Callers that only need the album image of one size can pass album_image_width to
+    leave out the others. Callers that need no track details at all should use
+    get_mixtape_compact instead, which skips Spotify entirely.
+
+    For long mixtapes, callers can page through the tracks with track_offset and
+    track_limit, so that only one page of tracks is looked up on Spotify per request
+    (track_count has the total), or use stream_mixtape.
+    """
+    mixtape_query = MixtapeQuery(session=session, for_update=False, options=[])
+    current = mixtape_query.load_version_by_public_id(public_id)
+    current = validate_mixtape_access(current, authenticated_user, is_write=False)
+    etag = mixtape_etag(current.public_id, current.version, options.etag_variant())
+    headers = {
+        "Content-Location": mixtape_version_path(request, public_id, current.version, options),
+        # Edge caches may only share anonymous reads, which never depend on the user.
+        "Cache-Control": mutable_cache_control(is_shared=authenticated_user is None and is_publicly_readable(current)),
+    }
+    if if_none_match(request, etag):
+        return not_modified(etag, headers)
+
+    try:
+        body = get_or_build_mixtape_version_body(mixtape_query, spotify_client, public_id, current.version, options)
+    except PartialMixtapeResponse as e:
+        # Spotify was slow: serve what we have, uncached, and build it again next time.
+        return mixtape_json_response(e.mixtape_response, headers=headers)
+    if body is None:
+        # The mixtape was deleted since the version query.
+        raise HTTPException(status_code=404, detail="Mixtape not found")
+
+    return cached_json_response(request, (public_id, current.version, options), body, etag, headers)
+
+@router.get("/{public_id}/versions/{version}", response_model=MixtapeResponse)
+def get_mixtape_version(
+    public_id: str,
+    request: Request,
+    version: int = Path(..., ge=1, description="Version of the mixtape to get"),
+    options: MixtapeResponseOptions = Depends(get_mixtape_response_options),
+    session: Session = Depends(get_readonly_session),
+    authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
+    spotify_client: SpotifyClient = Depends(get_spotify_client),
+):
+    """
+    Gets the mixtape with the given public ID as it was at the given version, from its
+    snapshot.
+
+    A version never changes once written, so the response is cacheable forever
+    (Cache-Control: immutable): by CDNs if anyone may read the mixtape, otherwise only by
+    the client. Access is checked against the mixtape's current owner and visibility.
+    Returns 404 if the mixtape does not exist or has no such version.
     """
     mixtape_query = MixtapeQuery(session=session, for_update=False, options=[])
+    current = mixtape_query.load_version_by_public_id(public_id)
+    current = validate_mixtape_access(current, authenticated_user, is_write=False)
+    if version > current.version:
+        raise HTTPException(status_code=404, detail="Mixtape version not found")
+
+    etag = mixtape_etag(current.public_id, version, options.etag_variant())
+    headers = {"Cache-Control": immutable_cache_control(is_shared=is_publicly_readable(current))}
+    if if_none_match(request, etag):
+        return not_modified(etag, headers)
+
+    try:
+        body = get_or_build_mixtape_version_body(mixtape_query, spotify_client, public_id, version, options)
+    except PartialMixtapeResponse as e:
+        return mixtape_json_response(e.mixtape_response, headers=headers)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Mixtape version not found")
+    return cached_json_response(request, (public_id, version, options), body, etag, headers)
+
+@router.get(
+    "/{public_id}/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "The mixtape, then its tracks, as JSON lines"}},
+)
+def stream_mixtape(
+    public_id: str,
+    options: MixtapeResponseOptions = Depends(get_mixtape_response_options),
+    session: Session = Depends(get_readonly_session),
+    authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
+    spotify_client: SpotifyClient = Depends(get_spotify_client),
+):
+    """
+    Streams the mixtape with the given public ID as newline-delimited JSON, so that
+    clients can render it before every track has been looked up on Spotify, however long
+    the mixtape is:
+    - The first line is the MixtapeResponse with an empty track list (but the full
+      track_count).
+    - Each following line is a MixtapeTrackResponse, in order of position. The tracks
+      are looked up in batches (as many as Spotify returns per request), each batch
+      being sent as soon as it has been looked up.
+
+    Takes the same options as get_mixtape, and has the same access checks. All the
+    lookups share a single ENRICHMENT_DEADLINE_SECONDS deadline; tracks that cannot be
+    looked up in time, or no longer exist on Spotify, are sent as placeholders (see
+    get_mixtape). As the headers are sent before it is known whether any track is a
+    placeholder for lack of time, the stream is never cached (Cache-Control: no-store)
+    nor given an ETag.
+    """
+    mixtape_query = MixtapeQuery(
+        session=session,
+        for_update=False,
+        options=[selectinload(Mixtape.tracks)], # type: ignore[arg-type]
+    )
+    mixtape = mixtape_query.load_by_public_id(public_id)
+    mixtape = validate_mixtape_access(mixtape, authenticated_user, is_write=False)
+
+    # Everything needed from the database is loaded before streaming, as the session is
+    # closed once the response starts.
+    header = load_mixtape_header_api_model_from_dbmodel(mixtape)
+    tracks = options.select_tracks(mixtape.tracks)
+
+    def lines() -> Iterator[bytes]:
+        yield header.model_dump_json().encode() + b"\n"
+        deadline = time.monotonic() + ENRICHMENT_DEADLINE_SECONDS
+        is_partial = False
+        for start in range(0, len(tracks), GET_TRACKS_BATCH_SIZE):
+            batch = tracks[start:start + GET_TRACKS_BATCH_SIZE]
+            lookup = lookup_track_details(spotify_client, batch, deadline_seconds=max(deadline - time.monotonic(), 0))
+            if not is_partial and not all(lookup.is_settled(track) for track in batch):
+                is_partial = True
+                metrics.increment("mixtape_enrichment.partial_responses")
+            yield b"".join(lookup.track_response(track, options.album_image_width).model_dump_json().encode() + b"\n" for track in batch)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"Cache-Control": "no-store"})
+
+@router.get("/{public_id}/compact", response_model=MixtapeCompactResponse)
+def get_mixtape_compact(
+    public_id: str,
+    request: Request,
+    session: Session = Depends(get_readonly_session),
+    authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
+):
+    """
+    Gets the mixtape with the given public ID as stored, with each track's Spotify URI,
+    position and text rather than its details from Spotify.
+
+    For callers that do not display the tracks (e.g. the editor reloading after a save,
+    server-side checks): this never calls Spotify, so it only costs the database
+    queries. Access and Cache-Control are the same as for get_mixtape.
+    """
+    mixtape_query = MixtapeQuery(
+        session=session,
+        for_update=False,
+        options=[selectinload(Mixtape.tracks)], # type: ignore[arg-type]
+    )
     mixtape = mixtape_query.load_by_public_id(public_id)
     mixtape = validate_mixtape_access(mixtape, authenticated_user, is_write=False)
+    etag = mixtape_etag(mixtape.public_id, mixtape.version, "compact")
+    headers = {"Cache-Control": mutable_cache_control(is_shared=authenticated_user is None and is_publicly_readable(mixtape))}
+    if if_none_match(request, etag):
+        return not_modified(etag, headers)
+    return FastJSONResponse(load_compact_mixtape_api_model_from_dbmodel(mixtape), headers={**headers, "ETag": etag})
+
+@router.get("/{public_id}/tracks/{track_position}", response_model=MixtapeTrackPageResponse)
+def get_mixtape_track(
+    public_id: str,
+    request: Request,
+    track_position: int = Path(..., ge=1, description="Position of the track within the mixtape"),
+    album_image_width: int | None = Query(None, ge=1, description="Only return the album image best matching this width (the smallest at least this wide, else the largest)"),
+    session: Session = Depends(get_readonly_session),
+    authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
+    spotify_client: SpotifyClient = Depends(get_spotify_client),
+):
+    """
+    Gets a single track of the mixtape with the given public ID, for the track viewer,
+    with the positions of the previous and next tracks so that they can be prefetched.
+
+    Access is checked as for get_mixtape. Only the track's row is loaded (through the
+    index on the mixtape's track positions) and only that track is looked up on Spotify.
+    If it cannot be looked up in time, it is a placeholder, and the response is neither
+    cached nor given an ETag (as for partial responses of get_mixtape). Tracks that no
+    longer exist on Spotify are placeholders too, but cached as usual.
+    Returns 404 if the mixtape has no track at that position.
+    """
+    mixtape_query = MixtapeQuery(session=session, for_update=False, options=[])
+    current = mixtape_query.load_version_by_public_id(public_id)
+    current = validate_mixtape_access(current, authenticated_user, is_write=False)
+    etag = mixtape_etag(current.public_id, current.version, f"t{track_position}{album_image_variant(album_image_width) or ''}")
+    headers = {"Cache-Control": mutable_cache_control(is_shared=authenticated_user is None and is_publicly_readable(current))}
+    if if_none_match(request, etag):
+        return not_modified(etag, headers)
+
+    if current.id is None:
+        raise HTTPException(status_code=500, detail="Got unexpected null Mixtape ID")
+    loaded = mixtape_query.load_track(current.id, track_position)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail="Track not found")
+    lookup = lookup_track_details(spotify_client, [loaded.track])
+    track_page = MixtapeTrackPageResponse(
+        public_id=current.public_id,
+        version=current.version,
+        track=lookup.track_response(loaded.track, album_image_width),
+        previous_track_position=loaded.previous_track_position,
+        next_track_position=loaded.next_track_position,
+        track_count=loaded.track_count,
+    )
+    if not lookup.is_settled(loaded.track):
+        metrics.increment("mixtape_enrichment.partial_responses")
+        return FastJSONResponse(track_page, headers={**headers, "Cache-Control": "no-store"})
+    return FastJSONResponse(track_page, headers={**headers, "ETag": etag})
+
+def album_image_variant(album_image_width: int | None) -> str | None:
+    """Variant of the mixtape's ETag for a response with only the given album image width."""
+    return f"w{album_image_width}" if album_image_width is not None else None
+
+def cached_json_response(request: Request, key: tuple[str, int, MixtapeResponseOptions], body: bytes, etag: str, headers: dict[str, str]) -> Response:
+    """
+    Response for a body from the mixtape response cache, with the given ETag. If the
+    client accepts a compressed encoding, the body's precompressed variant is sent (and
+    cached for the next request), rather than compressing it again in
+    CompressionMiddleware, with an ETag of its own (see encoded_etag). Both variants vary
+    on Accept-Encoding, so shared caches keep them apart.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding")) if len(body) >= COMPRESSION_MINIMUM_SIZE else None
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    if encoding is None:
+        return Response(content=body, media_type="application/json", headers={**headers, "ETag": etag})
+    return Response(
+        content=mixtape_response_cache.get_encoded(key, body, encoding),
+        media_type="application/json",
+        headers={**headers, "ETag": encoded_etag(etag, encoding), "Content-Encoding": encoding},
+    )
 
-    return load_mixtape_api_models_from_dbmodel(spotify_client, mixtape)
+def mixtape_version_path(request: Request, public_id: str, version: int, options: MixtapeResponseOptions = MixtapeResponseOptions()) -> str:
+    """Path (and query) of the immutable endpoint for the given version of a mixtape."""
+    path = request.url_for("get_mixtape_version", public_id=public_id, version=str(version)).path
+    query = options.query_string()
+    return f"{path}?{query}" if query else path
 
 @router.put("/{public_id}", response_model=MixtapeResponse)
 def update_mixtape(
     public_id: str,
     request: MixtapeRequest,
-    session: Session = Depends(get_write_session),
+    session: Session = Depends(get_autosave_session),
     authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
     spotify_client: SpotifyClient = Depends(get_spotify_client),
+    edge_cache: MixtapeEdgeCache = Depends(get_mixtape_edge_cache),
 ):
     """
     Updates the mixtape with the given ID.
     Returns the new mixtape version.
+    Returns 409 (with Retry-After) if another save of the same mixtape holds it for too long.
     TODO: rethink the return value.
     """
 
@@ -314,14 +964,6 @@ def update_mixtape(
     # Store current version for undo pointer
     current_version = mixtape.version
 
-    # Wipe existing tracks so we can insert new ones.
-    # TODO: we should be able to use sa_relationship_kwargs={"cascade": "all, delete-orphan"}
-    # to accomplish this instead. For now, this will do.
-    # Alternatively, maybe mixtape.tracks.clear() would work?
-    session.execute(
-        delete(MixtapeTrack).where(MixtapeTrack.mixtape_id == mixtape.id) # type: ignore[arg-type]
-    )
-
     # Validate and enrich tracks
     tracks = [parse_track(track, spotify_client) for track in request.tracks]
 
@@ -337,15 +979,156 @@ def update_mixtape(
     mixtape.undo_to_version = current_version
     mixtape.redo_to_version = None
 
+    # Write the mixtape, its tracks (replacing the existing ones) and its snapshot.
+    mixtape.finalize()
+    mixtape_query.save(mixtape)
+
+    # Pause before releasing the lock for deterministic concurrency tests.
+    _maybe_pause_for_tests()
+
+    session.commit()
+    edge_cache.purge(mixtape)
+
+    return mixtape_json_response(load_mixtape_api_models_from_dbmodel(spotify_client, mixtape))
+
+@router.patch("/{public_id}", response_model=MixtapeResponse)
+def patch_mixtape(
+    public_id: str,
+    request: MixtapePatchRequest,
+    session: Session = Depends(get_autosave_session),
+    authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
+    spotify_client: SpotifyClient = Depends(get_spotify_client),
+    edge_cache: MixtapeEdgeCache = Depends(get_mixtape_edge_cache),
+):
+    """
+    Applies a list of operations to the mixtape with the given ID, as a single new
+    version (which can be undone like any other).
+
+    This is the incremental alternative to update_mixtape for autosaves: the request only
+    carries the edit, only tracks that were not already in the mixtape are looked up on
+    Spotify, and only the tracks whose position, text or URI changed are written (see
+    MixtapeQuery.save). The result must satisfy the same constraints as a MixtapeRequest
+    (422 otherwise).
+
+    Returns 400 if an operation refers to a position with no track, and 409 if the
+    request's version is set and is not the current version (or, with Retry-After, if
+    another save of the same mixtape holds it for too long).
+    """
+    mixtape_query = MixtapeQuery(
+        session=session,
+        options=[selectinload(Mixtape.tracks)], # type: ignore[arg-type]
+        for_update=True,
+    )
+    mixtape = mixtape_query.load_by_public_id(public_id)
+
+    mixtape = validate_mixtape_access(mixtape, authenticated_user, is_write=True)
+
+    if request.version is not None and request.version != mixtape.version:
+        raise HTTPException(status_code=409, detail=f"Mixtape has changed since version {request.version}; reload it and try again")
+
+    patched = apply_mixtape_operations(mixtape, request.operations)
+
+    # Anonymous mixtapes cannot be made private
+    if mixtape.stack_auth_user_id is None and not patched.is_public:
+        raise HTTPException(status_code=400, detail="Only claimed mixtapes can be made private; unclaimed mixtapes must remain public")
+
+    # Only validate tracks that are new to the mixtape.
+    existing_spotify_uris = {track.spotify_uri for track in mixtape.tracks}
+    tracks = [
+        MixtapeTrack(track_position=track.track_position, track_text=track.track_text, spotify_uri=track.spotify_uri)
+        if track.spotify_uri in existing_spotify_uris
+        else parse_track(track, spotify_client)
+        for track in patched.tracks
+    ]
+
+    current_version = mixtape.version
+    mixtape.name = patched.name
+    mixtape.intro_text = patched.intro_text
+    mixtape.subtitle1 = patched.subtitle1
+    mixtape.subtitle2 = patched.subtitle2
+    mixtape.subtitle3 = patched.subtitle3
+    mixtape.is_public = patched.is_public
+    mixtape.tracks = tracks
+
+    # Set undo pointer to previous version and clear redo pointer
+    mixtape.undo_to_version = current_version
+    mixtape.redo_to_version = None
+
+    # Write the mixtape, the tracks that changed and its snapshot.
     mixtape.finalize()
-    session.add(mixtape) # add root object if not already present.
+    mixtape_query.save(mixtape)
 
     # Pause before releasing the lock for deterministic concurrency tests.
     _maybe_pause_for_tests()
 
     session.commit()
+    edge_cache.purge(mixtape)
+
+    return mixtape_json_response(load_mixtape_api_models_from_dbmodel(spotify_client, mixtape))
+
+def apply_mixtape_operations(mixtape: Mixtape, operations: list[MixtapeOperation]) -> MixtapeRequest:
+    """
+    Apply PATCH operations to the mixtape's content, without modifying the mixtape.
+    Returns the resulting content, validated as a MixtapeRequest.
 
-    return load_mixtape_api_models_from_dbmodel(spotify_client, mixtape)
+    Inserting a track at a position moves the tracks from that position on down by one;
+    removing one moves the tracks after it up by one; moving one is removing it, then
+    inserting it at its new position.
+
+    Raises:
+        HTTPException 400: If an operation refers to a position with no track
+        HTTPException 422: If the result is not a valid MixtapeRequest
+    """
+    fields: dict[str, object] = {
+        field: getattr(mixtape, field)
+        for field in ["name", "intro_text", "subtitle1", "subtitle2", "subtitle3", "is_public"]
+    }
+    tracks = {
+        track.track_position: MixtapeTrackRequest(track_position=track.track_position, track_text=track.track_text, spotify_uri=track.spotify_uri)
+        for track in mixtape.tracks
+    }
+
+    def shift(from_position: int, delta: int) -> None:
+        moved = {position: track for position, track in tracks.items() if position >= from_position}
+        for position in moved:
+            del tracks[position]
+        for position, track in moved.items():
+            tracks[position + delta] = track.model_copy(update={"track_position": position + delta})
+
+    def insert(track: MixtapeTrackRequest) -> None:
+        if track.track_position in tracks:
+            shift(track.track_position, 1)
+        tracks[track.track_position] = track
+
+    def remove(position: int) -> MixtapeTrackRequest:
+        if position not in tracks:
+            raise HTTPException(status_code=400, detail=f"No track at position {position}")
+        track = tracks.pop(position)
+        shift(position + 1, -1)
+        return track
+
+    for operation in operations:
+        if operation.op == "set":
+            fields[operation.field] = operation.value
+        elif operation.op == "insert_track":
+            insert(operation.track)
+        elif operation.op == "move_track":
+            track = remove(operation.from_position)
+            insert(track.model_copy(update={"track_position": operation.to_position}))
+        elif operation.op == "remove_track":
+            remove(operation.track_position)
+        elif operation.op == "set_track_text":
+            if operation.track_position not in tracks:
+                raise HTTPException(status_code=400, detail=f"No track at position {operation.track_position}")
+            tracks[operation.track_position] = tracks[operation.track_position].model_copy(update={"track_text": operation.track_text})
+
+    try:
+        return MixtapeRequest.model_validate({
+            **fields,
+            "tracks": [track.model_dump() for _, track in sorted(tracks.items())],
+        })
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
 
 @router.post("/{public_id}/undo", response_model=MixtapeResponse)
 def undo_mixtape(
@@ -353,15 +1136,17 @@ def undo_mixtape(
     session: Session = Depends(get_write_session),
     authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
     spotify_client: SpotifyClient = Depends(get_spotify_client),
+    edge_cache: MixtapeEdgeCache = Depends(get_mixtape_edge_cache),
 ):
     """
     Undo the last action on a mixtape, restoring it to a previous version.
 
-    This endpoint implements undo functionality by:
-    1. Loading the target version from the snapshot history
-    2. Restoring the mixtape and tracks to that previous state
-    3. Updating the undo/redo pointers to maintain the version chain
-    4. Breaking the redo chain (since a new edit would create a new branch)
+    This endpoint implements undo functionality by writing, in a single statement
+    within Postgres (see MixtapeQuery.restore_snapshot), a new version that:
+    1. Copies the content and tracks of the target version's snapshot
+    2. Records that it resembles the target version
+    3. Undoes to where the target version could undo to, and redoes back to the
+       version being undone
 
     The undo operation follows the doubly-linked list structure stored in the
     mixtape_snapshot table, where each version points to its undo/redo targets.
@@ -381,11 +1166,8 @@ def undo_mixtape(
         HTTPException 404: If the mixtape doesn't exist
         HTTPException 500: If the target version snapshot cannot be found
     """
-    mixtape_query = MixtapeQuery(
-        session=session,
-        options=[selectinload(Mixtape.tracks)], # type: ignore[arg-type]
-        for_update=True,
-    )
+    # The tracks are not loaded: they are copied from the target snapshot within Postgres.
+    mixtape_query = MixtapeQuery(session=session, options=[], for_update=True)
     mixtape = mixtape_query.load_by_public_id(public_id)
 
     mixtape = validate_mixtape_access(mixtape, authenticated_user, is_write=True)
@@ -397,28 +1179,18 @@ def undo_mixtape(
     if mixtape.id is None:
         raise HTTPException(status_code=500, detail="Got unexpected null Mixtape ID")
 
-    # Load the target snapshot (version we want to resemble)
-    target_snapshot = mixtape_query.load_snapshot_by_version(mixtape.id, mixtape.undo_to_version)
-    if target_snapshot is None:
+    # Create a new version resembling the target snapshot (with its tracks), and a
+    # snapshot of it, setting up the undo/redo pointers for the new version.
+    if not mixtape_query.restore_snapshot(mixtape, mixtape.undo_to_version, is_undo=True):
         raise HTTPException(status_code=500, detail="Target version not found in snapshots")
 
-    # Set up new state: copy content from target snapshot but create new version
-    mixtape.restore_from_snapshot(target_snapshot, is_undo=True)
-
-    # Restore tracks from target snapshot
-    mixtape.tracks.clear()
-    mixtape.tracks = [snapshot_track.to_restored_track(mixtape.id) for snapshot_track in target_snapshot.tracks]
-
-    # Finalize to create new version and snapshot (preserve undo/redo pointers)
-    mixtape.finalize(is_undo_redo_operation=True)
-    session.add(mixtape)
-
     # Pause before releasing the lock for deterministic concurrency tests.
     _maybe_pause_for_tests()
 
     session.commit()
+    edge_cache.purge(mixtape)
 
-    return load_mixtape_api_models_from_dbmodel(spotify_client, mixtape)
+    return mixtape_json_response(load_mixtape_api_models_from_dbmodel(spotify_client, mixtape))
 
 @router.post("/{public_id}/redo", response_model=MixtapeResponse)
 def redo_mixtape(
@@ -426,15 +1198,17 @@ def redo_mixtape(
     session: Session = Depends(get_write_session),
     authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
     spotify_client: SpotifyClient = Depends(get_spotify_client),
+    edge_cache: MixtapeEdgeCache = Depends(get_mixtape_edge_cache),
 ):
     """
     Redo the last undone action on a mixtape, restoring it to a later version.
 
-    This endpoint implements redo functionality by:
-    1. Loading the target version from the snapshot history
-    2. Restoring the mixtape and tracks to that later state
-    3. Updating the undo/redo pointers to maintain the version chain
-    4. Preserving the ability to undo back to the current version
+    This endpoint implements redo functionality by writing, in a single statement
+    within Postgres (see MixtapeQuery.restore_snapshot), a new version that:
+    1. Copies the content and tracks of the target version's snapshot
+    2. Records that it resembles the target version
+    3. Undoes back to the version being redone from, and redoes to where the target
+       version could redo to
 
     The redo operation follows the doubly-linked list structure stored in the
     mixtape_snapshot table, where each version points to its undo/redo targets.
@@ -455,11 +1229,8 @@ def redo_mixtape(
         HTTPException 404: If the mixtape doesn't exist
         HTTPException 500: If the target version snapshot cannot be found
     """
-    mixtape_query = MixtapeQuery(
-        session=session,
-        options=[selectinload(Mixtape.tracks)], # type: ignore[arg-type]
-        for_update=True,
-    )
+    # The tracks are not loaded: they are copied from the target snapshot within Postgres.
+    mixtape_query = MixtapeQuery(session=session, options=[], for_update=True)
     mixtape = mixtape_query.load_by_public_id(public_id)
 
     mixtape = validate_mixtape_access(mixtape, authenticated_user, is_write=True)
@@ -471,29 +1242,18 @@ def redo_mixtape(
     if mixtape.id is None:
         raise HTTPException(status_code=500, detail="Got unexpected null Mixtape ID")
 
-    # Load the target snapshot (version we want to resemble)
-    target_snapshot = mixtape_query.load_snapshot_by_version(mixtape.id, mixtape.redo_to_version)
-    if target_snapshot is None:
+    # Create a new version resembling the target snapshot (with its tracks), and a
+    # snapshot of it, setting up the undo/redo pointers for the new version.
+    if not mixtape_query.restore_snapshot(mixtape, mixtape.redo_to_version, is_undo=False):
         raise HTTPException(status_code=500, detail="Target version not found in snapshots")
 
-    # Set up new state: copy content from target snapshot but create new version
-    # This will also set up the undo/redo pointers for the new version.
-    mixtape.tracks.clear()
-    mixtape.restore_from_snapshot(target_snapshot, is_undo=False)
-
-    # Restore tracks from target snapshot
-    mixtape.tracks = [snapshot_track.to_restored_track(mixtape.id) for snapshot_track in target_snapshot.tracks]
-
-    # Finalize to create new version and snapshot (preserve undo/redo pointers)
-    mixtape.finalize(is_undo_redo_operation=True)
-    session.add(mixtape)
-
     # Pause before releasing the lock for deterministic concurrency tests.
     _maybe_pause_for_tests()
 
     session.commit()
+    edge_cache.purge(mixtape)
 
-    return load_mixtape_api_models_from_dbmodel(spotify_client, mixtape)
+    return mixtape_json_response(load_mixtape_api_models_from_dbmodel(spotify_client, mixtape))
 
 # --- SPOTIFY PLAYLIST EXPORT ---
 
@@ -527,18 +1287,24 @@ def export_to_spotify(
     session: Session = Depends(get_write_session),
     authenticated_user: AuthenticatedUser | None = Depends(get_optional_user),
     spotify_client: SpotifyClient = Depends(get_spotify_client),
+    edge_cache: MixtapeEdgeCache = Depends(get_mixtape_edge_cache),
 ):
     """Create or update a Spotify playlist that represents this mixtape.
 
     The operation is idempotent – if a playlist URI is already recorded, the
     existing playlist is updated. Otherwise a new playlist is created and the
     newly generated Spotify playlist URI is persisted to the mixtape record.
+
+    The export holds the mixtape's row lock while it talks to Spotify, so it does not
+    wait for the lock: if the mixtape is being modified (or exported) concurrently,
+    it fails right away with 409 and the client can retry.
     """
 
     mixtape_query = MixtapeQuery(
         session=session,
         options=[selectinload(Mixtape.tracks)],  # type: ignore[arg-type]
         for_update=True,
+        nowait=True,
     )
     mixtape = mixtape_query.load_by_public_id(public_id)
 
@@ -563,11 +1329,12 @@ def export_to_spotify(
             raise HTTPException(status_code=500, detail=f"Error updating existing spotify playlist: {str(e)}")
 
     # Persist the mixtape change.
-    mixtape.finalize(is_undo_redo_operation=False)
-    session.add(mixtape)
+    mixtape.finalize()
+    mixtape_query.save(mixtape)
     session.commit()
+    edge_cache.purge(mixtape)
 
-    return load_mixtape_api_models_from_dbmodel(spotify_client, mixtape)
+    return mixtape_json_response(load_mixtape_api_models_from_dbmodel(spotify_client, mixtape))
 
 # --- TESTING CONCURRENCY SUPPORT ---
 # These globals are used ONLY during tests to deterministically pause execution
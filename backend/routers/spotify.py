@@ -1,5 +1,7 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+import os
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 
 from backend.api_models.spotify import TrackDetails
 from backend.client.spotify import SpotifyClient, get_spotify_client
@@ -7,15 +9,55 @@ from backend.convert_client_api_models.track import (
     spotify_track_to_mixtape_track_details,
 )
 from backend.middleware.auth.dependency_helpers import get_optional_user
+from backend.middleware.db_conn.global_db_conn import (
+    get_current_engine,
+    get_current_replica_engine,
+)
+from backend.middleware.db_conn.session import RetryingSession
+from backend.query.mixtape import MixtapeQuery
+from backend.util.json_response import FastJSONResponse
 
 router = APIRouter()
 
+# Number of the most used tracks to seed the autocomplete index with (see search_tracks).
+TRACK_INDEX_SEED_SIZE = int(os.environ.get("SPOTIFY_TRACK_INDEX_SEED_SIZE", 500))
+
+def load_most_used_tracks() -> dict[str, int]:
+    """
+    The IDs of the TRACK_INDEX_SEED_SIZE tracks used most across all mixtapes, with the
+    number of mixtape tracks using each, to seed the autocomplete index with. Opens its
+    own session (on the replica, if any), as it runs after the search that triggered it.
+    """
+    with RetryingSession(get_current_replica_engine() or get_current_engine()) as session:
+        track_uses = MixtapeQuery(session=session, options=[]).load_most_used_tracks(TRACK_INDEX_SEED_SIZE)
+    return {spotify_uri.split(":")[-1]: uses for spotify_uri, uses in track_uses.items()}
+
 @router.get("/search", response_model=list[TrackDetails])
-def search_tracks(query: str, user_info: dict | None = Depends(get_optional_user), spotify_client: SpotifyClient = Depends(get_spotify_client)):
-    """Search for tracks using service account credentials"""
+def search_tracks(
+    query: str,
+    background_tasks: BackgroundTasks,
+    limit: int = Query(5, ge=1, le=50, description="Most tracks to return"),
+    user_info: dict | None = Depends(get_optional_user),
+    spotify_client: SpotifyClient = Depends(get_spotify_client),
+):
+    """
+    Search for tracks using service account credentials.
+
+    Most tracks people add are ones someone has already used, so the Spotify client
+    answers from its local autocomplete index of the tracks it has seen first, and only
+    searches Spotify if it has fewer than limit matches (see SpotifyClient.search_tracks).
+    The first search of an instance seeds the index with the tracks used most across all
+    mixtapes, after the response is sent (see load_most_used_tracks), so that searches
+    never need a database connection.
+
+    Spotify results are cached for a while, keyed by the query with case and whitespace
+    folded, as autocomplete sends the same popular queries over and over.
+    """
+    if spotify_client.claim_track_index_seed():
+        background_tasks.add_task(spotify_client.seed_track_index, load_most_used_tracks)
     try:
-        results = spotify_client.search_tracks(query)
-        return [spotify_track_to_mixtape_track_details(t) for t in results]
+        results = spotify_client.search_tracks(query, limit=limit)
+        return FastJSONResponse([spotify_track_to_mixtape_track_details(t) for t in results])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to search tracks: {str(e)}")
 
@@ -24,6 +66,6 @@ def get_track(track_id: str, user_info: dict | None = Depends(get_optional_user)
     """Get track details using service account credentials"""
     try:
         track = spotify_client.get_track(track_id)
-        return spotify_track_to_mixtape_track_details(track)
+        return FastJSONResponse(spotify_track_to_mixtape_track_details(track))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch track: {str(e)}")
@@ -1,3 +1,4 @@
+import logging
 from collections.abc import Generator
 
 import pytest
@@ -6,10 +7,13 @@ from sqlalchemy.engine import Engine
 from sqlmodel import SQLModel, create_engine
 
 from backend.app_factory import create_app
+from backend.client.cache_purge import MockCachePurgeClient, get_cache_purge_client
 from backend.client.spotify import MockSpotifyClient
 from backend.client.stack_auth import MockStackAuthBackend, get_stack_auth_backend
 from backend.routers import spotify
 
+logger = logging.getLogger(__name__)
+
 
 @pytest.fixture
 def engine(postgresql) -> Generator[Engine, None, None]:
@@ -25,9 +29,9 @@ def engine(postgresql) -> Generator[Engine, None, None]:
     # Import models to ensure they're registered with SQLModel metadata
 
     # Create tables in this test database
-    print(f"Creating tables in database: {db_url}")
+    logger.info("Creating tables in database: %s", db_url)
     SQLModel.metadata.create_all(engine)
-    print("Tables created successfully")
+    logger.info("Tables created successfully")
     yield engine
     # No need to drop tables; the database will be destroyed after the test
 
@@ -60,6 +64,9 @@ def app(engine: Engine, auth_token_and_user: tuple[str, str, dict]):
     # Override spotify client with mock
     mock_spotify = MockSpotifyClient()
     app.dependency_overrides[spotify.get_spotify_client] = lambda: mock_spotify
+    # Record edge cache purges instead of sending them
+    mock_cache_purge = MockCachePurgeClient()
+    app.dependency_overrides[get_cache_purge_client] = lambda: mock_cache_purge
     return app
 
 @pytest.fixture
@@ -0,0 +1,126 @@
+import gzip
+import json
+
+import brotli
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.middleware.compression import CompressionMiddleware
+from backend.tests.assertion_utils import (
+    assert_response_created,
+    assert_response_success,
+)
+from backend.util.compression import negotiate_encoding
+from backend.util.metrics import metrics
+
+
+def test_negotiate_encoding() -> None:
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("br;q=0.5, gzip") == "gzip"
+    assert negotiate_encoding("br;q=0, gzip;q=0") is None
+    assert negotiate_encoding("*") == "br"
+    assert negotiate_encoding("*;q=0.1, gzip;q=0") == "br"
+
+
+def create_large_mixtape(test_client: TestClient, token: str) -> str:
+    tracks = [
+        {"track_position": i, "track_text": f"Track {i} " * 10, "spotify_uri": f"spotify:track:track{(i % 5) + 1}"}
+        for i in range(1, 21)
+    ]
+    resp = test_client.post(
+        "/api/mixtape",
+        json={"name": "Large Mixtape", "is_public": True, "tracks": tracks},
+        headers={"x-stack-access-token": token},
+    )
+    assert_response_created(resp)
+    return str(resp.json()["public_id"])
+
+
+def test_responses_are_compressed(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    public_id = create_large_mixtape(test_client, token)
+
+    for encoding in ("br", "gzip"):
+        resp = test_client.get(f"/api/mixtape/{public_id}", headers={"Accept-Encoding": encoding})
+        assert_response_success(resp)
+        assert resp.headers["Content-Encoding"] == encoding
+        assert "Accept-Encoding" in resp.headers["Vary"]
+        assert resp.json()["name"] == "Large Mixtape"
+        assert len(resp.json()["tracks"]) == 20
+
+    # Uncompressed variants vary on Accept-Encoding too, so shared caches keep them apart.
+    for path in (f"/api/mixtape/{public_id}", f"/api/mixtape/{public_id}/compact", f"/api/mixtape/{public_id}/stream"):
+        resp = test_client.get(path, headers={"Accept-Encoding": "identity"})
+        assert_response_success(resp)
+        assert "Content-Encoding" not in resp.headers
+        assert resp.headers["Vary"].count("Accept-Encoding") == 1
+
+    # Small responses are not worth compressing.
+    resp = test_client.get("/api/health/app", headers={"Accept-Encoding": "gzip"})
+    assert_response_success(resp)
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_compressed_variants_have_their_own_etags(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    public_id = create_large_mixtape(test_client, token)
+
+    # Cached (precompressed) bodies, and bodies compressed by the middleware.
+    for path in (f"/api/mixtape/{public_id}", f"/api/mixtape/{public_id}/compact"):
+        identity = test_client.get(path, headers={"Accept-Encoding": "identity"})
+        assert_response_success(identity)
+        etags = {identity.headers["ETag"]}
+        for encoding in ("br", "gzip"):
+            resp = test_client.get(path, headers={"Accept-Encoding": encoding})
+            assert_response_success(resp)
+            assert resp.headers["Content-Encoding"] == encoding
+            assert resp.headers["ETag"] == identity.headers["ETag"][:-1] + f'.{encoding}"'
+            etags.add(resp.headers["ETag"])
+
+            # Either variant's ETag revalidates, and the 304 has the client's variant's.
+            resp = test_client.get(path, headers={"Accept-Encoding": encoding, "If-None-Match": resp.headers["ETag"]})
+            assert resp.status_code == 304
+            assert resp.headers["ETag"] == identity.headers["ETag"][:-1] + f'.{encoding}"'
+            resp = test_client.get(path, headers={"Accept-Encoding": encoding, "If-None-Match": identity.headers["ETag"]})
+            assert resp.status_code == 304
+            assert resp.headers["ETag"] == identity.headers["ETag"]
+        assert len(etags) == 3
+
+
+def test_cached_responses_are_compressed_once(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    public_id = create_large_mixtape(test_client, token)
+
+    compressions_before = metrics.get_counter("mixtape_response_cache.compressions")
+    bodies = []
+    for _ in range(3):
+        resp = test_client.get(f"/api/mixtape/{public_id}", headers={"Accept-Encoding": "br"})
+        assert_response_success(resp)
+        assert resp.headers["Content-Encoding"] == "br"
+        bodies.append(resp.json())
+    assert bodies[0] == bodies[1] == bodies[2]
+    assert metrics.get_counter("mixtape_response_cache.compressions") == compressions_before + 1
+
+
+def test_streamed_responses_are_compressed_incrementally() -> None:
+    chunks = [json.dumps({"line": i, "padding": "x" * 100}).encode() + b"\n" for i in range(20)]
+
+    app = FastAPI()
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(chunks), media_type="application/x-ndjson")
+
+    app.add_middleware(CompressionMiddleware)
+    test_client = TestClient(app)
+
+    for encoding, decompress in (("gzip", gzip.decompress), ("br", brotli.decompress)):
+        with test_client.stream("GET", "/stream", headers={"Accept-Encoding": encoding}) as resp:
+            assert resp.headers["Content-Encoding"] == encoding
+            assert "Content-Length" not in resp.headers
+            raw = b"".join(resp.iter_raw())
+        assert decompress(raw) == b"".join(chunks)
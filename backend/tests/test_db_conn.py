@@ -0,0 +1,78 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from backend.middleware.db_conn.global_db_conn import load_engine
+from backend.middleware.db_conn.pool import InstrumentedNullPool, PoolSettings
+from backend.middleware.db_conn.session import RetryingSession
+from backend.tests.assertion_utils import (
+    assert_response_created,
+    assert_response_not_found,
+    assert_response_success,
+)
+from backend.util.metrics import metrics
+
+
+def test_retries_once_on_dead_pooled_connection(client: tuple[TestClient, str, dict], engine: Engine, postgresql) -> None:
+    test_client, token, _ = client
+    resp = test_client.post(
+        "/api/mixtape",
+        json={"name": "Reconnect", "is_public": True, "tracks": [{"track_position": 1, "spotify_uri": "spotify:track:track1"}]},
+        headers={"x-stack-access-token": token},
+    )
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    # Kill the app's idle pooled connections, as a server restart or idle timeout would.
+    with engine.connect() as conn:
+        conn.execute(
+            text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = current_database() AND pid NOT IN (pg_backend_pid(), :fixture_pid)"),
+            {"fixture_pid": postgresql.info.backend_pid},
+        )
+
+    retries_before = metrics.get_counter("db.disconnect_retries")
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(resp)
+    assert resp.json()["name"] == "Reconnect"
+    assert metrics.get_counter("db.disconnect_retries") == retries_before + 1
+
+
+def test_metrics_report_pool_usage(client: tuple[TestClient, str, dict], monkeypatch: pytest.MonkeyPatch) -> None:
+    test_client, _, _ = client
+    resp = test_client.get("/api/health/db")
+    assert_response_success(resp)
+
+    # Metrics are only served to holders of the configured shared secret.
+    assert_response_not_found(test_client.get("/api/health/metrics"))
+    monkeypatch.setenv("METRICS_TOKEN", "metrics-secret")
+    assert test_client.get("/api/health/metrics").status_code == 401
+    assert test_client.get("/api/health/metrics", headers={"x-metrics-token": "wrong"}).status_code == 401
+
+    resp = test_client.get("/api/health/metrics", headers={"x-metrics-token": "metrics-secret"})
+    assert_response_success(resp)
+    data = resp.json()
+    assert data["timings"]["db.pool.primary.checkout_wait"]["count"] >= 1
+    assert data["gauges"]["db.pool.primary.checked_out"] == 0
+    assert 0 <= data["gauges"]["db.pool.primary.saturation"] <= 1
+
+
+def test_null_pool_mode(engine: Engine, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DATABASE_POOL_MODE", "null")
+    settings = PoolSettings()
+    kwargs = settings.engine_kwargs("postgresql+psycopg://user@host/db", is_async=False)
+    assert kwargs["poolclass"] is InstrumentedNullPool
+    assert kwargs["connect_args"] == {"prepare_threshold": None}
+    assert "pool_size" not in kwargs
+
+    null_engine = load_engine(engine.url.render_as_string(hide_password=False), metrics_prefix="db.pool.test_null")
+    with RetryingSession(null_engine) as session:
+        assert session.execute(text("SELECT 1")).scalar_one() == 1
+    assert metrics.snapshot()["timings"]["db.pool.test_null.checkout_wait"]["count"] == 1
+    null_engine.dispose()
+
+
+def test_invalid_pool_mode(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DATABASE_POOL_MODE", "bogus")
+    with pytest.raises(Exception, match="DATABASE_POOL_MODE"):
+        PoolSettings()
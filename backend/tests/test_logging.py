@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueListener
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.tests.assertion_utils import assert_response_success
+from backend.util.log import (
+    JsonFormatter,
+    SamplingFilter,
+    StructuredQueueHandler,
+    Truncated,
+)
+
+
+def test_requests_are_logged(client: tuple[TestClient, str, dict], caplog: pytest.LogCaptureFixture) -> None:
+    test_client, _, _ = client
+    with caplog.at_level(logging.INFO, logger="backend.middleware.request_logging"):
+        resp = test_client.get("/api/health/app")
+    assert_response_success(resp)
+    messages = [r.getMessage() for r in caplog.records if r.name == "backend.middleware.request_logging"]
+    assert len(messages) == 1
+    assert messages[0].startswith("GET /api/health/app -> 200 (")
+
+
+def test_unhandled_exceptions_return_logged_500(app: FastAPI, caplog: pytest.LogCaptureFixture) -> None:
+    @app.get("/api/test-unhandled-exception")
+    def fail():
+        raise RuntimeError("boom")
+
+    with caplog.at_level(logging.ERROR, logger="backend.middleware.error_logging"):
+        resp = TestClient(app).get("/api/test-unhandled-exception")
+    assert resp.status_code == 500
+    assert resp.json() == {"detail": "Internal server error"}
+    records = [r for r in caplog.records if r.name == "backend.middleware.error_logging"]
+    assert len(records) == 1
+    assert "GET /api/test-unhandled-exception" in records[0].getMessage()
+    assert records[0].exc_info is not None
+
+
+def test_truncated_values_are_formatted_lazily() -> None:
+    calls: list[int] = []
+    def produce() -> str:
+        calls.append(1)
+        return "x" * 50
+
+    logger = logging.getLogger("backend.tests.test_logging.lazy")
+    logger.setLevel(logging.INFO)
+    logger.debug("Body: %s", Truncated(produce, limit=10))
+    assert calls == []
+
+    assert str(Truncated(produce, limit=10)) == "xxxxxxxxxx... (40 more characters)"
+    assert str(Truncated("short", limit=10)) == "short"
+
+
+def test_sampling_filter() -> None:
+    sampling = SamplingFilter({"backend.sampled": 0.0, "backend.sampled.kept": 1.0})
+    def record(name: str, level: int) -> logging.LogRecord:
+        return logging.LogRecord(name, level, __file__, 0, "message", None, None)
+
+    assert not sampling.filter(record("backend.sampled", logging.INFO))
+    assert not sampling.filter(record("backend.sampled.child", logging.DEBUG))
+    assert sampling.filter(record("backend.sampled.kept", logging.INFO))
+    assert sampling.filter(record("backend.sampled", logging.WARNING))
+    assert sampling.filter(record("backend.other", logging.INFO))
+
+
+def test_json_formatter() -> None:
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        exc_info = sys.exc_info()
+    record = logging.LogRecord("backend.test", logging.ERROR, __file__, 0, "Failed %s", ("thing",), exc_info)
+    record.mixtape_id = "abc"
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "backend.test"
+    assert entry["message"] == "Failed thing"
+    assert entry["mixtape_id"] == "abc"
+    assert "ValueError: bad" in entry["exception"]
+
+def test_json_records_through_queue() -> None:
+    # Through the queue and listener, as set up by configure_logging.
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    output = io.StringIO()
+    stream_handler = logging.StreamHandler(output)
+    stream_handler.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, stream_handler)
+    logger = logging.getLogger("backend.tests.test_logging.queue")
+    logger.propagate = False
+    logger.addHandler(StructuredQueueHandler(log_queue))
+    listener.start()
+    try:
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            logger.exception("Failed %s", "thing", extra={"mixtape_id": "abc"})
+    finally:
+        listener.stop()
+        logger.handlers.clear()
+        logger.propagate = True
+
+    entry = json.loads(output.getvalue())
+    # The traceback is kept apart from the message, as when formatting directly.
+    assert entry["message"] == "Failed thing"
+    assert "ValueError: bad" in entry["exception"]
+    assert entry["mixtape_id"] == "abc"
@@ -1,9 +1,29 @@
+import fnmatch
+import json
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+
 import httpx
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
 
+from backend.client.cache_purge import MockCachePurgeClient, get_cache_purge_client
+from backend.client.spotify.client import (
+    SpotifyAlbumImage,
+    SpotifyDeadlineExceededError,
+)
 from backend.client.spotify.mock import MockSpotifyClient
+from backend.client.spotify.rate_limit import current_deadline
+from backend.convert_client_api_models.track import select_album_images
+from backend.middleware.db_conn.global_db_conn import get_current_engine
+from backend.query.mixtape import MixtapeQuery
 from backend.routers import auth, spotify
+from backend.routers import mixtape as mixtape_router
 from backend.tests.assertion_utils import (
+    assert_response_bad_request,
     assert_response_created,
     assert_response_not_found,
     assert_response_success,
@@ -125,6 +145,133 @@ def test_edit_mixtape_add_remove_modify_tracks(client: tuple[TestClient, str, di
         assert "track" in t
         assert t["track"]["id"] == f"{t['track']['uri'].replace('spotify:track:', '')}"
 
+@contextmanager
+def record_statements(engine: Engine) -> Generator[list[str], None, None]:
+    """Record the SQL statements executed through the given engine."""
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def test_save_round_trips_do_not_scale_with_track_count(client: tuple[TestClient, str, dict], engine: Engine) -> None:
+    test_client, token, _ = client
+    resp = test_client.post("/api/mixtape", json=mixtape_payload([]), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    statement_counts = []
+    for track_count in (1, 20):
+        tracks = [
+            {"track_position": i, "track_text": f"Track {i}", "spotify_uri": f"spotify:track:track{i % 3 + 1}"}
+            for i in range(1, track_count + 1)
+        ]
+        with record_statements(get_current_engine()) as statements:
+            resp = test_client.put(f"/api/mixtape/{public_id}", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+        assert_response_success(resp)
+        assert len(resp.json()["tracks"]) == track_count
+        statement_counts.append(len(statements))
+    assert statement_counts[0] == statement_counts[1]
+
+    # The snapshot of the latest version has all of its tracks.
+    with engine.connect() as conn:
+        snapshot_track_count = conn.execute(
+            text(
+                "SELECT count(*) FROM mixtape_snapshot_track st JOIN mixtape_snapshot s ON s.id = st.mixtape_snapshot_id "
+                "WHERE s.public_id = :public_id AND s.version = 3"
+            ),
+            {"public_id": public_id},
+        ).scalar_one()
+    assert snapshot_track_count == 20
+
+    # Shrinking the mixtape removes the tracks at unused positions.
+    resp = test_client.put(f"/api/mixtape/{public_id}", json=mixtape_payload(tracks[:2]), headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert sorted(t["track_position"] for t in resp.json()["tracks"]) == [1, 2]
+
+def test_patch_mixtape_operations(client: tuple[TestClient, str, dict], app, engine: Engine) -> None:
+    test_client, token, _ = client
+    headers = {"x-stack-access-token": token}
+    tracks = [
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+        {"track_position": 3, "track_text": "Third", "spotify_uri": "spotify:track:track3"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers=headers)
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    def track_row_versions() -> dict[int, str]:
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT t.track_position, t.xmin::text FROM mixtape_track t JOIN mixtape m ON m.id = t.mixtape_id WHERE m.public_id = :public_id"
+            ), {"public_id": public_id})
+            return {row.track_position: row.xmin for row in rows}
+
+    # Editing one track's text only writes that track's row.
+    before = track_row_versions()
+    resp = test_client.patch(f"/api/mixtape/{public_id}", json={"version": 1, "operations": [
+        {"op": "set_track_text", "track_position": 2, "track_text": "Second, edited"},
+        {"op": "set", "field": "name", "value": "Renamed"},
+    ]}, headers=headers)
+    assert_response_success(resp)
+    data = resp.json()
+    assert data["version"] == 2
+    assert data["name"] == "Renamed"
+    assert data["can_undo"] is True
+    assert [t["track_text"] for t in data["tracks"]] == ["First", "Second, edited", "Third"]
+    after = track_row_versions()
+    assert after[1] == before[1] and after[3] == before[3]
+    assert after[2] != before[2]
+
+    # Only tracks new to the mixtape are validated against Spotify; the rest are only
+    # looked up to build the response.
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    lookups: list[str] = []
+    get_track = mock_spotify.get_track
+    def counting_get_track(track_id: str):
+        lookups.append(track_id)
+        return get_track(track_id)
+    mock_spotify.get_track = counting_get_track  # type: ignore[method-assign]
+    resp = test_client.patch(f"/api/mixtape/{public_id}", json={"operations": [
+        {"op": "insert_track", "track": {"track_position": 2, "track_text": "New", "spotify_uri": "spotify:track:track4"}},
+        {"op": "remove_track", "track_position": 4},
+        {"op": "move_track", "from_position": 1, "to_position": 3},
+    ]}, headers=headers)
+    assert_response_success(resp)
+    assert lookups == ["track4", "track4", "track2", "track1"]
+    assert [(t["track_position"], t["track_text"]) for t in resp.json()["tracks"]] == [(1, "New"), (2, "Second, edited"), (3, "First")]
+
+    # Patches are versions like any other.
+    resp = test_client.post(f"/api/mixtape/{public_id}/undo", headers=headers)
+    assert_response_success(resp)
+    assert [t["track_text"] for t in resp.json()["tracks"]] == ["First", "Second, edited", "Third"]
+
+    # Operations against an outdated version are rejected, as are invalid results.
+    resp = test_client.patch(f"/api/mixtape/{public_id}", json={"version": 2, "operations": [{"op": "remove_track", "track_position": 1}]}, headers=headers)
+    assert resp.status_code == 409
+    resp = test_client.patch(f"/api/mixtape/{public_id}", json={"operations": [{"op": "remove_track", "track_position": 7}]}, headers=headers)
+    assert resp.status_code == 400
+    resp = test_client.patch(f"/api/mixtape/{public_id}", json={"operations": [{"op": "set", "field": "subtitle1", "value": "x" * 61}]}, headers=headers)
+    assert resp.status_code == 422
+    resp = test_client.patch(f"/api/mixtape/{public_id}", json={"operations": [{"op": "delete_everything"}]}, headers=headers)
+    assert resp.status_code == 422
+    # Values of the wrong type are rejected rather than coerced.
+    for field, value in [("is_public", "yes"), ("is_public", "1"), ("is_public", None), ("name", True), ("intro_text", 1)]:
+        resp = test_client.patch(f"/api/mixtape/{public_id}", json={"operations": [{"op": "set", "field": field, "value": value}]}, headers=headers)
+        assert resp.status_code == 422, (field, value)
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert resp.json()["version"] == 4
+
+    resp = test_client.patch(f"/api/mixtape/{public_id}", json={"operations": [{"op": "set", "field": "name", "value": "Hijacked"}]})
+    assert resp.status_code == 401
+
 def test_duplicate_track_position_rejected(client: tuple[TestClient, str, dict]) -> None:
     test_client, token, _ = client
     tracks = [
@@ -135,11 +282,706 @@ def test_duplicate_track_position_rejected(client: tuple[TestClient, str, dict])
     # Should not create mixtape with duplicate track positions
     assert resp.status_code in [422, 400], f"Expected 422 or 400, got {resp.status_code}. Response: {resp.text}"
 
+def test_invalid_track_rejected(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    for spotify_uri in ["spotify:track:doesnotexist", "spotify:album:track1", "track1"]:
+        tracks = [{"track_position": 1, "track_text": None, "spotify_uri": spotify_uri}]
+        resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+        assert_response_bad_request(resp)
+
 def test_get_nonexistent_mixtape(client: tuple[TestClient, str, dict]) -> None:
     test_client, token, _ = client
     resp = test_client.get("/api/mixtape/00000000-0000-0000-0000-000000000000", headers={"x-stack-access-token": token})
     assert_response_not_found(resp)
 
+def test_conditional_get_returns_not_modified(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    tracks = [{"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"}]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+    etag = resp.headers["ETag"]
+
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(resp)
+    assert resp.headers["ETag"] == etag
+
+    # A current ETag gets a 304 from a single version-only query.
+    with record_statements(get_current_engine()) as statements:
+        resp = test_client.get(f"/api/mixtape/{public_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.content == b""
+    assert len(statements) == 1
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert resp.status_code == 304
+
+    # Editing the mixtape changes its ETag, so the old one no longer matches.
+    resp = test_client.put(f"/api/mixtape/{public_id}", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    new_etag = resp.headers["ETag"]
+    assert new_etag != etag
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"If-None-Match": etag})
+    assert_response_success(resp)
+    assert resp.headers["ETag"] == new_etag
+    assert resp.json()["version"] == 2
+
+def test_conditional_get_checks_access(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    resp = test_client.post("/api/mixtape", json={**mixtape_payload([]), "is_public": False}, headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+    etag = resp.headers["ETag"]
+
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 401
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"If-None-Match": etag, "x-stack-access-token": token})
+    assert resp.status_code == 304
+
+def test_get_serves_cached_response(client: tuple[TestClient, str, dict], app) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    first = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(first)
+
+    # Once cached, a GET runs a single version-only query and no Spotify lookups.
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    lookups: list[str] = []
+    get_track = mock_spotify.get_track
+    def counting_get_track(track_id: str):
+        lookups.append(track_id)
+        return get_track(track_id)
+    mock_spotify.get_track = counting_get_track  # type: ignore[method-assign]
+    with record_statements(get_current_engine()) as statements:
+        second = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(second)
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(statements) == 1
+    assert lookups == []
+
+    # Access is still checked against the current version for every request.
+    resp = test_client.put(f"/api/mixtape/{public_id}", json={**mixtape_payload(tracks[:1]), "is_public": False}, headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert resp.status_code == 401
+
+    # A write bumps the version, so the next GET builds the new version.
+    lookups.clear()
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    assert resp.json()["version"] == 2
+    assert len(resp.json()["tracks"]) == 1
+    assert lookups == ["track1"]
+
+def test_concurrent_cache_misses_build_once(client: tuple[TestClient, str, dict], app) -> None:
+    import threading
+    import time
+
+    test_client, token, _ = client
+    tracks = [{"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"}]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    # Make the build slow enough for every request to arrive while it runs.
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    lookups: list[str] = []
+    get_track = mock_spotify.get_track
+    def slow_get_track(track_id: str):
+        lookups.append(track_id)
+        time.sleep(0.5)
+        return get_track(track_id)
+    mock_spotify.get_track = slow_get_track  # type: ignore[method-assign]
+
+    results: list[httpx.Response] = []
+    def send_get() -> None:
+        results.append(test_client.get(f"/api/mixtape/{public_id}"))
+    threads = [threading.Thread(target=send_get, daemon=True) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert len(results) == 5
+    for resp in results:
+        assert_response_success(resp)
+        assert resp.json()["tracks"][0]["track"]["name"] == "Mock Song One"
+    assert lookups == ["track1"]
+
+def test_cached_version_is_consistent_with_concurrent_write(client: tuple[TestClient, str, dict], monkeypatch: pytest.MonkeyPatch) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    created = resp.json()
+    public_id = created["public_id"]
+
+    # Commit a write after the version query, while the response is being built.
+    load_snapshot_by_public_id = MixtapeQuery.load_snapshot_by_public_id
+    def load_snapshot_after_write(self: MixtapeQuery, public_id: str, version: int):
+        monkeypatch.setattr(MixtapeQuery, "load_snapshot_by_public_id", load_snapshot_by_public_id)
+        resp = test_client.put(f"/api/mixtape/{public_id}", json={**mixtape_payload(tracks[1:]), "name": "Renamed"}, headers={"x-stack-access-token": token})
+        assert_response_success(resp)
+        return load_snapshot_by_public_id(self, public_id, version)
+    monkeypatch.setattr(MixtapeQuery, "load_snapshot_by_public_id", load_snapshot_after_write)
+
+    # The response (and what is cached for version 1) is exactly version 1.
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"Accept-Encoding": "identity"})
+    assert_response_success(resp)
+    assert resp.headers["ETag"] == f'"{public_id}.v1"'
+    version1 = resp.json()
+    assert version1["version"] == 1
+    assert version1["name"] == created["name"]
+    assert version1["tracks"] == created["tracks"]
+    resp = test_client.get(f"/api/mixtape/{public_id}/versions/1")
+    assert_response_success(resp)
+    assert resp.json() == version1
+
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(resp)
+    assert resp.json()["name"] == "Renamed"
+    assert [t["track_text"] for t in resp.json()["tracks"]] == ["Second"]
+
+def test_get_mixtape_version(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    created = resp.json()
+    public_id = created["public_id"]
+    resp = test_client.put(f"/api/mixtape/{public_id}", json={**mixtape_payload(tracks[1:]), "name": "Renamed"}, headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+
+    # The mutable endpoint points to the immutable URL of the current version.
+    current = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(current)
+    assert current.headers["Content-Location"] == f"/api/mixtape/{public_id}/versions/2"
+    # Both share the body cached for the version, so only the version query runs.
+    with record_statements(get_current_engine()) as statements:
+        resp = test_client.get(current.headers["Content-Location"])
+    assert_response_success(resp)
+    assert len(statements) == 1
+    assert resp.json() == current.json()
+    assert resp.headers["ETag"] == current.headers["ETag"]
+    assert resp.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+
+    # Earlier versions are served from their snapshots.
+    resp = test_client.get(f"/api/mixtape/{public_id}/versions/1")
+    assert_response_success(resp)
+    version1 = resp.json()
+    assert version1["version"] == 1
+    assert version1["name"] == created["name"]
+    assert [t["track_text"] for t in version1["tracks"]] == ["First", "Second"]
+    assert version1["tracks"] == created["tracks"]
+    resp = test_client.get(f"/api/mixtape/{public_id}/versions/1", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+    assert resp.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+
+    resp = test_client.get(f"/api/mixtape/{public_id}/versions/3")
+    assert_response_not_found(resp)
+    resp = test_client.get(f"/api/mixtape/{public_id}/versions/0")
+    assert resp.status_code == 422
+
+def test_get_private_mixtape_version(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    resp = test_client.post("/api/mixtape", json={**mixtape_payload([]), "is_public": False}, headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    resp = test_client.get(f"/api/mixtape/{public_id}/versions/1")
+    assert resp.status_code == 401
+    resp = test_client.get(f"/api/mixtape/{public_id}/versions/1", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    # Only the owner's client may cache a private mixtape, not a CDN.
+    assert resp.headers["Cache-Control"] == "private, max-age=31536000, immutable"
+
+def test_get_mixtape_compact(client: tuple[TestClient, str, dict], app) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+        {"track_position": 1, "track_text": None, "spotify_uri": "spotify:track:track1"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    created = resp.json()
+    public_id = created["public_id"]
+
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    lookups: list[str] = []
+    get_track = mock_spotify.get_track
+    def counting_get_track(track_id: str):
+        lookups.append(track_id)
+        return get_track(track_id)
+    mock_spotify.get_track = counting_get_track  # type: ignore[method-assign]
+
+    resp = test_client.get(f"/api/mixtape/{public_id}/compact")
+    assert_response_success(resp)
+    data = resp.json()
+    assert lookups == []
+    assert data["name"] == created["name"]
+    assert data["version"] == 1
+    assert data["tracks"] == [
+        {"track_position": 1, "track_text": None, "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+    ]
+    # The compact representation has its own ETag, distinct from the full one's.
+    assert resp.headers["ETag"] != test_client.get(f"/api/mixtape/{public_id}").headers["ETag"]
+    resp = test_client.get(f"/api/mixtape/{public_id}/compact", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+
+    resp = test_client.put(f"/api/mixtape/{public_id}", json={**mixtape_payload(tracks), "is_public": False}, headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    resp = test_client.get(f"/api/mixtape/{public_id}/compact")
+    assert resp.status_code == 401
+    resp = test_client.get("/api/mixtape/nonexistent/compact")
+    assert_response_not_found(resp)
+
+def test_get_mixtape_with_album_image_width(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    tracks = [{"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"}]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    full = test_client.get(f"/api/mixtape/{public_id}")
+    resp = test_client.get(f"/api/mixtape/{public_id}", params={"album_image_width": 64})
+    assert_response_success(resp)
+    assert [len(t["track"]["album"]["images"]) for t in resp.json()["tracks"]] == [1]
+    assert resp.headers["ETag"] != full.headers["ETag"]
+    assert resp.headers["Content-Location"] == f"/api/mixtape/{public_id}/versions/1?album_image_width=64"
+    versioned = test_client.get(resp.headers["Content-Location"])
+    assert_response_success(versioned)
+    assert versioned.json() == resp.json()
+    assert versioned.headers["ETag"] == resp.headers["ETag"]
+
+    resp = test_client.get(f"/api/mixtape/{public_id}", params={"album_image_width": 0})
+    assert resp.status_code == 422
+
+def test_get_mixtape_track(client: tuple[TestClient, str, dict], app) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+        {"track_position": 4, "track_text": "Fourth", "spotify_uri": "spotify:track:track3"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    lookups: list[str] = []
+    get_track = mock_spotify.get_track
+    def counting_get_track(track_id: str):
+        lookups.append(track_id)
+        return get_track(track_id)
+    mock_spotify.get_track = counting_get_track  # type: ignore[method-assign]
+
+    # One query for the access check, one for the track; one Spotify lookup. (The first
+    # request may also have to reconnect the pool, so it is left out.)
+    assert_response_success(test_client.get(f"/api/mixtape/{public_id}/tracks/1"))
+    lookups.clear()
+    with record_statements(get_current_engine()) as statements:
+        resp = test_client.get(f"/api/mixtape/{public_id}/tracks/2")
+    assert_response_success(resp)
+    assert len(statements) == 2
+    assert lookups == ["track2"]
+    data = resp.json()
+    assert data["version"] == 1
+    assert data["track"]["track_text"] == "Second"
+    assert data["track"]["track"]["name"] == "Another Track"
+    assert data["previous_track_position"] == 1
+    assert data["next_track_position"] == 4
+    assert data["track_count"] == 3
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/2", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/1")
+    assert_response_success(resp)
+    assert resp.json()["previous_track_position"] is None
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/4")
+    assert_response_success(resp)
+    assert resp.json()["previous_track_position"] == 2
+    assert resp.json()["next_track_position"] is None
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/3")
+    assert_response_not_found(resp)
+
+    resp = test_client.put(f"/api/mixtape/{public_id}", json={**mixtape_payload(tracks), "is_public": False}, headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/1")
+    assert resp.status_code == 401
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/1", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+
+def test_get_mixtape_track_pages(client: tuple[TestClient, str, dict], app) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": i, "track_text": f"Track {i}", "spotify_uri": f"spotify:track:track{i}"}
+        for i in range(1, 6)
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+    assert resp.json()["track_count"] == 5
+
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    lookups: list[str] = []
+    get_track = mock_spotify.get_track
+    def counting_get_track(track_id: str):
+        lookups.append(track_id)
+        return get_track(track_id)
+    mock_spotify.get_track = counting_get_track  # type: ignore[method-assign]
+
+    # Only the requested page of tracks is looked up on Spotify.
+    full = test_client.get(f"/api/mixtape/{public_id}")
+    lookups.clear()
+    resp = test_client.get(f"/api/mixtape/{public_id}", params={"track_offset": 1, "track_limit": 2})
+    assert_response_success(resp)
+    data = resp.json()
+    assert [t["track_position"] for t in data["tracks"]] == [2, 3]
+    assert data["tracks"] == full.json()["tracks"][1:3]
+    assert data["track_count"] == 5
+    assert lookups == ["track2", "track3"]
+    assert resp.headers["ETag"] != full.headers["ETag"]
+    assert resp.headers["Content-Location"] == f"/api/mixtape/{public_id}/versions/1?track_offset=1&track_limit=2"
+    versioned = test_client.get(resp.headers["Content-Location"])
+    assert versioned.json() == data
+    assert versioned.headers["ETag"] == resp.headers["ETag"]
+
+    resp = test_client.get(f"/api/mixtape/{public_id}", params={"track_offset": 4})
+    assert [t["track_position"] for t in resp.json()["tracks"]] == [5]
+    resp = test_client.get(f"/api/mixtape/{public_id}", params={"track_offset": 10})
+    assert resp.json()["tracks"] == []
+    resp = test_client.get(f"/api/mixtape/{public_id}", params={"track_limit": 0})
+    assert resp.status_code == 422
+
+def test_stream_mixtape(client: tuple[TestClient, str, dict], app, monkeypatch: pytest.MonkeyPatch) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 3, "track_text": "Third", "spotify_uri": "spotify:track:track3"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+    full = test_client.get(f"/api/mixtape/{public_id}").json()
+
+    resp = test_client.get(f"/api/mixtape/{public_id}/stream")
+    assert_response_success(resp)
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert lines[0] == {**full, "tracks": []}
+    assert lines[1:] == full["tracks"]
+    # Whether any track is a placeholder is only known once the headers are sent.
+    assert resp.headers["Cache-Control"] == "no-store"
+    assert "ETag" not in resp.headers
+
+    resp = test_client.get(f"/api/mixtape/{public_id}/stream", params={"track_offset": 2})
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["track_position"] for line in lines[1:]] == [3]
+
+    # Tracks are looked up in batches. A batch that cannot be looked up in time is
+    # streamed as placeholders, and the stream goes on.
+    monkeypatch.setattr(mixtape_router, "GET_TRACKS_BATCH_SIZE", 2)
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    get_tracks = mock_spotify.get_tracks
+    batches: list[list[str]] = []
+    def slow_get_tracks(track_ids: list[str]):
+        batches.append(track_ids)
+        if "track2" in track_ids:
+            raise SpotifyDeadlineExceededError("Ran out of time")
+        return get_tracks(track_ids)
+    mock_spotify.get_tracks = slow_get_tracks  # type: ignore[method-assign]
+    resp = test_client.get(f"/api/mixtape/{public_id}/stream")
+    assert_response_success(resp)
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert batches == [["track1", "track2"], ["track3"]]
+    assert [line["track_position"] for line in lines[1:]] == [1, 2, 3]
+    assert [line["is_placeholder"] for line in lines[1:]] == [True, True, False]
+    assert lines[2]["track"]["uri"] == "spotify:track:track2"
+    mock_spotify.get_tracks = get_tracks  # type: ignore[method-assign]
+
+    resp = test_client.put(f"/api/mixtape/{public_id}", json={**mixtape_payload(tracks), "is_public": False}, headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    resp = test_client.get(f"/api/mixtape/{public_id}/stream")
+    assert resp.status_code == 401
+
+def test_stream_mixtape_lookups_share_one_deadline(client: tuple[TestClient, str, dict], app, monkeypatch: pytest.MonkeyPatch) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": i, "track_text": None, "spotify_uri": f"spotify:track:track{(i % 5) + 1}"}
+        for i in range(1, 6)
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    # Once the deadline has passed, the remaining batches get no time at all, rather than
+    # a fresh deadline each.
+    monkeypatch.setattr(mixtape_router, "GET_TRACKS_BATCH_SIZE", 2)
+    monkeypatch.setattr(mixtape_router, "ENRICHMENT_DEADLINE_SECONDS", 0.2)
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    remaining_seconds: list[float] = []
+    def slow_get_tracks(track_ids: list[str]):
+        deadline = current_deadline()
+        assert deadline is not None
+        remaining_seconds.append(deadline - time.monotonic())
+        time.sleep(0.3)
+        raise SpotifyDeadlineExceededError("Ran out of time")
+    mock_spotify.get_tracks = slow_get_tracks  # type: ignore[method-assign]
+    resp = test_client.get(f"/api/mixtape/{public_id}/stream")
+    assert_response_success(resp)
+    assert all(line["is_placeholder"] for line in map(json.loads, resp.text.splitlines()[1:]))
+    assert len(remaining_seconds) == 3
+    assert 0 < remaining_seconds[0] <= 0.2
+    assert all(remaining <= 0 for remaining in remaining_seconds[1:])
+
+def test_get_mixtape_degrades_when_spotify_fails(client: tuple[TestClient, str, dict], app) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    get_tracks = mock_spotify.get_tracks
+    def failing_get_tracks(track_ids: list[str]):
+        raise RuntimeError("Spotify is down")
+    mock_spotify.get_tracks = failing_get_tracks  # type: ignore[method-assign]
+    cached_tracks = {"track1": mock_spotify.get_track("track1")}
+    mock_spotify.get_cached_tracks = lambda track_ids: cached_tracks  # type: ignore[method-assign]
+
+    # Tracks with cached details are served from them; the others are placeholders. The
+    # response is flagged partial, and neither cached nor given an ETag.
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(resp)
+    data = resp.json()
+    assert data["is_partial"] is True
+    assert data["tracks"][0]["track"]["name"] == "Mock Song One"
+    assert data["tracks"][0]["is_placeholder"] is False
+    assert data["tracks"][1]["is_placeholder"] is True
+    assert data["tracks"][1]["track"]["uri"] == "spotify:track:track2"
+    assert data["tracks"][1]["track_text"] == "Second"
+    assert "ETag" not in resp.headers
+    assert resp.headers["Cache-Control"] == "no-store"
+    resp = test_client.get(f"/api/mixtape/{public_id}/versions/1")
+    assert resp.json()["is_partial"] is True
+    assert resp.headers["Cache-Control"] == "no-store"
+
+    # So are single tracks and streams.
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/2")
+    assert_response_success(resp)
+    assert resp.json()["track"]["is_placeholder"] is True
+    assert "ETag" not in resp.headers
+    assert resp.headers["Cache-Control"] == "no-store"
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/1")
+    assert resp.json()["track"]["track"]["name"] == "Mock Song One"
+    assert "ETag" in resp.headers
+    resp = test_client.get(f"/api/mixtape/{public_id}/stream")
+    assert_response_success(resp)
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["is_placeholder"] for line in lines[1:]] == [False, True]
+
+    # Once Spotify is back, the full response is built (and cached).
+    mock_spotify.get_tracks = get_tracks  # type: ignore[method-assign]
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(resp)
+    assert resp.json()["is_partial"] is False
+    assert "ETag" in resp.headers
+
+def test_get_mixtape_with_removed_track(client: tuple[TestClient, str, dict], app) -> None:
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Removed", "spotify_uri": "spotify:track:track5"},
+    ]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    mock_spotify.tracks = [t for t in mock_spotify.tracks if t.id != "track5"]
+
+    # A track that no longer exists on Spotify is a placeholder, but the response is
+    # complete, so it is cached and revalidated as usual.
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(resp)
+    data = resp.json()
+    assert data["is_partial"] is False
+    assert [t["is_placeholder"] for t in data["tracks"]] == [False, True]
+    assert resp.headers["Cache-Control"] != "no-store"
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+
+    resp = test_client.get(f"/api/mixtape/{public_id}/tracks/2")
+    assert_response_success(resp)
+    assert resp.json()["track"]["is_placeholder"] is True
+    assert "ETag" in resp.headers
+
+def test_get_mixtapes_batch(client: tuple[TestClient, str, dict], app) -> None:
+    test_client, token, _ = client
+    first_tracks = [
+        {"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": "Second", "spotify_uri": "spotify:track:track2"},
+    ]
+    second_tracks = [
+        {"track_position": 1, "track_text": "Shared", "spotify_uri": "spotify:track:track2"},
+        {"track_position": 2, "track_text": "Third", "spotify_uri": "spotify:track:track3"},
+    ]
+    public_ids = []
+    for tracks, is_public in ((first_tracks, True), (second_tracks, True), (first_tracks, False)):
+        resp = test_client.post("/api/mixtape", json={**mixtape_payload(tracks), "is_public": is_public}, headers={"x-stack-access-token": token})
+        assert_response_created(resp)
+        public_ids.append(resp.json()["public_id"])
+    first_id, second_id, private_id = public_ids
+
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    lookups: list[str] = []
+    get_track = mock_spotify.get_track
+    def counting_get_track(track_id: str):
+        lookups.append(track_id)
+        return get_track(track_id)
+    mock_spotify.get_track = counting_get_track  # type: ignore[method-assign]
+
+    # One query for the mixtapes, one for their tracks, and one deduplicated Spotify pass.
+    # (The first request may also have to reconnect the pool, so it is left out.)
+    ids = ",".join([first_id, private_id, "nonexistent", second_id, first_id])
+    assert_response_success(test_client.get("/api/mixtape/batch", params={"ids": ids}))
+    lookups.clear()
+    with record_statements(get_current_engine()) as statements:
+        resp = test_client.get("/api/mixtape/batch", params={"ids": ids})
+    assert_response_success(resp)
+    assert len(statements) == 2
+    assert sorted(lookups) == ["track1", "track2", "track3"]
+    assert resp.headers["Cache-Control"].startswith("private, ")
+
+    results = resp.json()["results"]
+    assert [r["public_id"] for r in results] == [first_id, private_id, "nonexistent", second_id]
+    assert results[0]["mixtape"] == test_client.get(f"/api/mixtape/{first_id}").json()
+    assert results[0]["error"] is None
+    assert results[1] == {"public_id": private_id, "mixtape": None, "error": {"status_code": 401, "detail": "Not authenticated; log in to view this mixtape"}}
+    assert results[2] == {"public_id": "nonexistent", "mixtape": None, "error": {"status_code": 404, "detail": "Mixtape not found"}}
+    assert [t["track_text"] for t in results[3]["mixtape"]["tracks"]] == ["Shared", "Third"]
+
+    # The owner can read their private mixtape; the options apply to each mixtape.
+    resp = test_client.get("/api/mixtape/batch", params={"ids": f"{private_id},{second_id}", "track_limit": 1}, headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    assert [[t["track_position"] for t in r["mixtape"]["tracks"]] for r in resp.json()["results"]] == [[1], [1]]
+
+    # A track removed from Spotify is a placeholder in the mixtapes that have it, which
+    # are complete nonetheless.
+    mock_spotify.tracks = [t for t in mock_spotify.tracks if t.id != "track3"]
+    resp = test_client.get("/api/mixtape/batch", params={"ids": f"{first_id},{second_id}"})
+    assert_response_success(resp)
+    results = resp.json()["results"]
+    assert [r["mixtape"]["is_partial"] for r in results] == [False, False]
+    assert [t["is_placeholder"] for t in results[0]["mixtape"]["tracks"]] == [False, False]
+    assert [t["is_placeholder"] for t in results[1]["mixtape"]["tracks"]] == [False, True]
+
+    # If Spotify fails, tracks are placeholders, and the mixtapes partial.
+    def failing_get_track(track_id: str):
+        raise RuntimeError("Spotify is down")
+    mock_spotify.get_track = failing_get_track  # type: ignore[method-assign]
+    resp = test_client.get("/api/mixtape/batch", params={"ids": first_id})
+    assert_response_success(resp)
+    assert resp.json()["results"][0]["mixtape"]["is_partial"] is True
+    mock_spotify.get_track = get_track  # type: ignore[method-assign]
+
+    resp = test_client.get("/api/mixtape/batch", params={"ids": ","})
+    assert resp.status_code == 422
+    resp = test_client.get("/api/mixtape/batch", params={"ids": ",".join(f"id{i}" for i in range(51))})
+    assert resp.status_code == 422
+
+def test_select_album_images() -> None:
+    images = [SpotifyAlbumImage(url=f"https://example.com/{width}.jpg", width=width, height=width) for width in (640, 300, 64)]
+    assert select_album_images(images, None) == images
+    assert [i.width for i in select_album_images(images, 64)] == [64]
+    assert [i.width for i in select_album_images(images, 100)] == [300]
+    assert [i.width for i in select_album_images(images, 1000)] == [640]
+    assert select_album_images([], 100) == []
+
+def test_cache_control_policy(client: tuple[TestClient, str, dict]) -> None:
+    test_client, token, _ = client
+    resp = test_client.post("/api/mixtape", json=mixtape_payload([]), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+    etag = resp.headers["ETag"]
+
+    # Anonymous reads of public mixtapes can be shared by edge caches...
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(resp)
+    assert resp.headers["Cache-Control"] == "public, max-age=0, s-maxage=60, stale-while-revalidate=600"
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["Cache-Control"].startswith("public, ")
+
+    # ...but the owner's reads, and private mixtapes, are private.
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    assert resp.headers["Cache-Control"] == "private, no-cache"
+    resp = test_client.put(f"/api/mixtape/{public_id}", json={**mixtape_payload([]), "is_public": False}, headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    assert resp.headers["Cache-Control"] == "private, no-cache"
+
+def test_writes_purge_edge_cache(client: tuple[TestClient, str, dict], app) -> None:
+    test_client, token, _ = client
+    mock_cache_purge: MockCachePurgeClient = app.dependency_overrides[get_cache_purge_client]()
+    headers = {"x-stack-access-token": token}
+
+    # Anonymous mixtapes are claimed, then owned and edited.
+    tracks = [{"track_position": 1, "track_text": None, "spotify_uri": "spotify:track:track1"}]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks))
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+    path = f"/api/mixtape/{public_id}"
+    assert mock_cache_purge.purged_paths == []
+
+    assert_response_success(test_client.post(f"{path}/claim", headers=headers))
+    # Every edge-cacheable read of the current version is purged, with any query string.
+    for url in [path, f"{path}?album_image_width=64&track_limit=1", f"{path}/compact", f"{path}/tracks/1"]:
+        resp = test_client.get(url)
+        assert_response_success(resp)
+        assert "s-maxage" in resp.headers["Cache-Control"], url
+        assert any(fnmatch.fnmatchcase(url, pattern) for pattern in mock_cache_purge.purged_paths), url
+    current_paths = mock_cache_purge.purged_paths.copy()
+    # Immutable versions are left in the edge cache while the mixtape stays public.
+    assert not any("/versions" in pattern for pattern in current_paths)
+    assert_response_success(test_client.put(path, json={**mixtape_payload([]), "name": "Renamed"}, headers=headers))
+    assert_response_success(test_client.post(f"{path}/undo", headers=headers))
+    assert_response_success(test_client.post(f"{path}/redo", headers=headers))
+    assert_response_success(test_client.post(f"{path}/spotify-export", headers=headers))
+    assert mock_cache_purge.purged_paths == current_paths * 5
+
+    # Making a mixtape private also purges its edge-cached versions.
+    mock_cache_purge.purged_paths.clear()
+    assert_response_success(test_client.put(path, json={**mixtape_payload([]), "is_public": False}, headers=headers))
+    assert mock_cache_purge.purged_paths == [*current_paths, f"{path}/versions/*"]
+
+    # Failed writes purge nothing.
+    mock_cache_purge.purged_paths.clear()
+    resp = test_client.post(f"{path}/claim", headers=headers)
+    assert resp.status_code == 400
+    assert mock_cache_purge.purged_paths == []
+
 def test_list_my_mixtapes_pagination_and_search(client: tuple[TestClient, str, dict]) -> None:
     test_client, token, _ = client
     # Create 5 mixtapes with varying names
@@ -477,6 +1319,57 @@ def test_concurrent_put_requests_processed_sequentially(client: tuple[TestClient
     # TODO: Once version history endpoint exists, assert that version 2 has
     #       name == "FirstUpdate" and version 3 has name == "SecondUpdate".
 
+@contextmanager
+def hold_mixtape_lock(engine: Engine, public_id: str) -> Generator[None, None, None]:
+    """Hold the mixtape's row lock from another connection, as a concurrent save would."""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT id FROM mixtape WHERE public_id = :public_id FOR UPDATE"), {"public_id": public_id})
+        yield
+        conn.rollback()
+
+def test_export_fails_fast_while_mixtape_is_locked(client: tuple[TestClient, str, dict], engine: Engine) -> None:
+    test_client, token, _ = client
+    tracks = [{"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"}]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    with hold_mixtape_lock(engine, public_id):
+        resp = test_client.post(f"/api/mixtape/{public_id}/spotify-export", headers={"x-stack-access-token": token})
+    assert resp.status_code == 409
+    assert resp.headers["Retry-After"] == "1"
+
+    # Once the lock is released, the export goes through.
+    resp = test_client.post(f"/api/mixtape/{public_id}/spotify-export", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+
+def test_lock_timeout_returns_conflict(client: tuple[TestClient, str, dict], engine: Engine, monkeypatch: pytest.MonkeyPatch) -> None:
+    test_client, token, _ = client
+    tracks = [{"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"}]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks))
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    monkeypatch.setenv("DATABASE_LOCK_TIMEOUT_MS", "100")
+    with hold_mixtape_lock(engine, public_id):
+        resp = test_client.post(f"/api/mixtape/{public_id}/claim", headers={"x-stack-access-token": token})
+    assert resp.status_code == 409
+    assert "Retry-After" in resp.headers
+
+def test_statement_timeout_returns_service_unavailable(client: tuple[TestClient, str, dict], engine: Engine, monkeypatch: pytest.MonkeyPatch) -> None:
+    test_client, token, _ = client
+    tracks = [{"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"}]
+    resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks))
+    assert_response_created(resp)
+    public_id = resp.json()["public_id"]
+
+    monkeypatch.setenv("DATABASE_LOCK_TIMEOUT_MS", "0")
+    monkeypatch.setenv("DATABASE_STATEMENT_TIMEOUT_MS", "100")
+    with hold_mixtape_lock(engine, public_id):
+        resp = test_client.post(f"/api/mixtape/{public_id}/claim", headers={"x-stack-access-token": token})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "5"
+
 # --- UNDO/REDO TESTS ---
 
 def test_undo_mixtape_basic(client: tuple[TestClient, str, dict]) -> None:
@@ -772,6 +1665,42 @@ def test_undo_redo_preserves_tracks(client: tuple[TestClient, str, dict]) -> Non
         assert "track" in track
         assert track["track"]["id"] == f"{track['track']['uri'].replace('spotify:track:', '')}"
 
+def test_undo_redo_round_trips_do_not_scale_with_track_count(client: tuple[TestClient, str, dict], engine: Engine) -> None:
+    test_client, token, _ = client
+    statement_counts = []
+    for track_count in (1, 20):
+        tracks = [
+            {"track_position": i, "track_text": f"Track {i}", "spotify_uri": f"spotify:track:track{i % 3 + 1}"}
+            for i in range(1, track_count + 1)
+        ]
+        resp = test_client.post("/api/mixtape", json=mixtape_payload(tracks[:1]), headers={"x-stack-access-token": token})
+        assert_response_created(resp)
+        public_id = resp.json()["public_id"]
+        resp = test_client.put(f"/api/mixtape/{public_id}", json=mixtape_payload(tracks), headers={"x-stack-access-token": token})
+        assert_response_success(resp)
+
+        # Undo restores the single track; redo restores all of them.
+        with record_statements(get_current_engine()) as statements:
+            resp = test_client.post(f"/api/mixtape/{public_id}/undo", headers={"x-stack-access-token": token})
+            assert_response_success(resp)
+            assert len(resp.json()["tracks"]) == 1
+            resp = test_client.post(f"/api/mixtape/{public_id}/redo", headers={"x-stack-access-token": token})
+            assert_response_success(resp)
+            assert len(resp.json()["tracks"]) == track_count
+        statement_counts.append(len(statements))
+
+        # The snapshot of the redone version has all of its tracks.
+        with engine.connect() as conn:
+            snapshot_track_count = conn.execute(
+                text(
+                    "SELECT count(*) FROM mixtape_snapshot_track st JOIN mixtape_snapshot s ON s.id = st.mixtape_snapshot_id "
+                    "WHERE s.public_id = :public_id AND s.version = 4"
+                ),
+                {"public_id": public_id},
+            ).scalar_one()
+        assert snapshot_track_count == track_count
+    assert statement_counts[0] == statement_counts[1]
+
 def test_undo_redo_concurrent_requests(client: tuple[TestClient, str, dict]) -> None:
     """Test that concurrent undo/redo requests are handled correctly."""
     import threading
@@ -0,0 +1,191 @@
+from collections.abc import Generator
+
+import psycopg
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel, create_engine
+
+from backend.middleware.db_conn import global_db_conn
+from backend.middleware.db_conn.read_your_writes import (
+    WRITE_LSN_COOKIE,
+    ReadYourWritesTracker,
+    get_read_your_writes_tracker,
+    parse_lsn,
+)
+from backend.tests.assertion_utils import (
+    assert_response_created,
+    assert_response_not_found,
+    assert_response_success,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class LaggingReplicaTracker(ReadYourWritesTracker):
+    """Tracker whose replica never catches up, simulating unbounded replication lag."""
+    def is_caught_up(self, replay_lsn: str | None, lsn: str) -> bool:
+        return False
+
+
+@pytest.fixture
+def replica_standin(postgresql, engine: Engine) -> Generator[None, None, None]:
+    """
+    Configure a second, empty database as the read replica.
+
+    The primary's writes are never replicated to it, so it behaves like a replica with
+    infinite lag: any read served by it will not find data written through the API.
+    """
+    info = postgresql.info
+    auth = f"{info.user}:{info.password}" if info.password else info.user
+    admin_url = f"postgresql://{auth}@{info.host}:{info.port}/{info.dbname}"
+    replica_dbname = f"{info.dbname}_replica"
+    with psycopg.connect(admin_url, autocommit=True) as conn:
+        conn.execute(f'CREATE DATABASE "{replica_dbname}"')
+
+    replica_url = f"postgresql+psycopg://{auth}@{info.host}:{info.port}/{replica_dbname}"
+    schema_engine = create_engine(replica_url)
+    SQLModel.metadata.create_all(schema_engine)
+    schema_engine.dispose()
+
+    global_db_conn.initialize_replica_engine(replica_url)
+    yield
+
+    replica_engine = global_db_conn.get_current_replica_engine()
+    assert replica_engine is not None
+    replica_engine.dispose()
+    global_db_conn._current_replica_engine = None
+    global_db_conn._current_async_replica_engine = None
+    with psycopg.connect(admin_url, autocommit=True) as conn:
+        # FORCE drops connections still held by the async engine's pool, whose
+        # connections belong to the test client's (now closed) event loops.
+        conn.execute(f'DROP DATABASE "{replica_dbname}" WITH (FORCE)')
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def lagging_tracker(app: FastAPI, clock: FakeClock) -> LaggingReplicaTracker:
+    tracker = LaggingReplicaTracker(sticky_seconds=10, clock=clock)
+    app.dependency_overrides[get_read_your_writes_tracker] = lambda: tracker
+    return tracker
+
+
+def create_public_mixtape(test_client: TestClient, token: str) -> str:
+    resp = test_client.post(
+        "/api/mixtape",
+        json={
+            "name": "Replica Mixtape",
+            "intro_text": "Intro",
+            "is_public": True,
+            "tracks": [{"track_position": 1, "track_text": "First", "spotify_uri": "spotify:track:track1"}],
+        },
+        headers={"x-stack-access-token": token},
+    )
+    assert_response_created(resp)
+    return str(resp.json()["public_id"])
+
+
+def test_writer_reads_own_write_from_primary(client: tuple[TestClient, str, dict], replica_standin: None, lagging_tracker: LaggingReplicaTracker) -> None:
+    test_client, token, _ = client
+    public_id = create_public_mixtape(test_client, token)
+
+    # The writer sticks to the primary and sees its mixtape.
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    assert resp.json()["name"] == "Replica Mixtape"
+
+    # Other clients are served by the (lagging) replica, which has not seen the write.
+    test_client.cookies.clear()
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_not_found(resp)
+
+
+def test_writer_reads_own_write_on_another_instance(client: tuple[TestClient, str, dict], app: FastAPI, replica_standin: None, lagging_tracker: LaggingReplicaTracker, clock: FakeClock) -> None:
+    test_client, token, _ = client
+    public_id = create_public_mixtape(test_client, token)
+    assert test_client.cookies.get(WRITE_LSN_COOKIE) is not None
+
+    # Another instance has not tracked the write, but the client's cookie carries its LSN.
+    other_instance_tracker = LaggingReplicaTracker(sticky_seconds=10, clock=clock)
+    app.dependency_overrides[get_read_your_writes_tracker] = lambda: other_instance_tracker
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+
+    # Anonymous readers are routed by the cookie alone; a malformed one is ignored.
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_success(resp)
+    test_client.cookies.clear()
+    test_client.cookies.set(WRITE_LSN_COOKIE, "not-an-lsn")
+    resp = test_client.get(f"/api/mixtape/{public_id}")
+    assert_response_not_found(resp)
+
+
+def test_writer_returns_to_replica_after_sticky_window(client: tuple[TestClient, str, dict], replica_standin: None, lagging_tracker: LaggingReplicaTracker, clock: FakeClock) -> None:
+    test_client, token, _ = client
+    public_id = create_public_mixtape(test_client, token)
+
+    # The cookie expires along with the sticky window.
+    clock.now += 11
+    test_client.cookies.clear()
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"x-stack-access-token": token})
+    assert_response_not_found(resp)
+
+
+def test_writer_returns_to_replica_once_caught_up(client: tuple[TestClient, str, dict], app: FastAPI, replica_standin: None, clock: FakeClock) -> None:
+    # The stand-in replica is not in recovery, so it reports itself as caught up.
+    tracker = ReadYourWritesTracker(sticky_seconds=10, clock=clock)
+    app.dependency_overrides[get_read_your_writes_tracker] = lambda: tracker
+    test_client, token, _ = client
+    public_id = create_public_mixtape(test_client, token)
+
+    resp = test_client.get(f"/api/mixtape/{public_id}", headers={"x-stack-access-token": token})
+    assert_response_not_found(resp)
+
+
+def test_tracker_lsn_comparison() -> None:
+    tracker = ReadYourWritesTracker(sticky_seconds=10, clock=FakeClock())
+    assert parse_lsn("0/16B3748") < parse_lsn("1/0")
+    assert tracker.is_caught_up("1/0", "0/FFFFFFFF")
+    assert tracker.is_caught_up("0/16B3748", "0/16B3748")
+    assert not tracker.is_caught_up("0/16B3747", "0/16B3748")
+    assert tracker.is_caught_up(None, "0/16B3748")
+
+
+def test_tracker_forgets_oldest_writes_when_full() -> None:
+    clock = FakeClock()
+    tracker = ReadYourWritesTracker(sticky_seconds=10, max_entries=2, clock=clock)
+    tracker.record_write("a", "0/1")
+    tracker.record_write("b", "0/2")
+    tracker.record_write("c", "0/3")
+    assert tracker.pending_lsn("a") is None
+    assert tracker.pending_lsn("b") == "0/2"
+    assert tracker.pending_lsn("c") == "0/3"
+    clock.now += 10
+    assert tracker.pending_lsn("c") is None
+
+
+def test_async_session_follows_read_your_writes(client: tuple[TestClient, str, dict], replica_standin: None, lagging_tracker: LaggingReplicaTracker, clock: FakeClock) -> None:
+    test_client, token, _ = client
+    public_id = create_public_mixtape(test_client, token)
+
+    # Listing uses an async session, which is routed the same way as sync sessions.
+    resp = test_client.get("/api/mixtape", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    assert [m["public_id"] for m in resp.json()] == [public_id]
+
+    clock.now += 11
+    test_client.cookies.clear()
+    resp = test_client.get("/api/mixtape", headers={"x-stack-access-token": token})
+    assert_response_success(resp)
+    assert resp.json() == []
@@ -1,4 +1,30 @@
-from backend.tests.assertion_utils import assert_response_success
+import json
+
+import pytest
+import requests
+
+from backend.client.spotify import MockSpotifyClient, SpotifyClient, real
+from backend.client.spotify.client import (
+    SpotifyAPIError,
+    SpotifyDeadlineExceededError,
+    SpotifyError,
+    SpotifyTrack,
+    SpotifyTrackNotFoundError,
+    SpotifyUnavailableError,
+)
+from backend.client.spotify.rate_limit import (
+    CircuitBreaker,
+    TokenBucket,
+    spotify_deadline,
+)
+from backend.client.spotify.track_index import TrackIndex
+from backend.middleware.db_conn.dependency_helpers import get_readonly_session
+from backend.routers import spotify
+from backend.tests.assertion_utils import (
+    assert_response_created,
+    assert_response_success,
+)
+from backend.util.metrics import metrics
 
 
 def assert_track_details(track):
@@ -65,3 +91,326 @@ def test_get_track_without_auth(client):
     data = resp.json()
     assert data["id"] == track_id
     assert_track_details(data)
+
+def spotify_id(mock_id: str) -> str:
+    """A well-formed Spotify ID (22 base62 characters) for a mock track, as the real client rejects the mock IDs."""
+    return mock_id.ljust(22, "0")
+
+def real_mock_tracks() -> dict[str, SpotifyTrack]:
+    """The mock tracks with well-formed IDs (see spotify_id), by ID."""
+    tracks = {}
+    for track in MockSpotifyClient().tracks:
+        track.id = spotify_id(track.id)
+        track.uri = f"spotify:track:{track.id}"
+        tracks[track.id] = track
+    return tracks
+
+def test_search_tracks_cache(real_spotify_client: SpotifyClient, monkeypatch: pytest.MonkeyPatch):
+    spotify_client = real_spotify_client
+    requests: list[tuple[str, dict]] = []
+    def fake_request(method: str, endpoint: str, **kwargs):
+        requests.append((endpoint, kwargs["params"]))
+        if kwargs["params"]["q"] == "nothing":
+            return {"tracks": {"items": []}}
+        return {"tracks": {"items": [real_mock_tracks()[spotify_id("track1")].to_dict()]}}
+    monkeypatch.setattr(spotify_client, "_spotify_api_request", fake_request)
+
+    # Case and whitespace are folded into the same cache entry.
+    assert [t.id for t in spotify_client.search_tracks("Mock  Song")] == [spotify_id("track1")]
+    assert [t.id for t in spotify_client.search_tracks(" mock song ")] == [spotify_id("track1")]
+    assert requests == [("/search", {"q": "mock song", "type": "track", "limit": 5})]
+    # The limit is part of the key.
+    spotify_client.search_tracks("mock song", limit=10)
+    assert len(requests) == 2
+
+    # Results are written through to the track cache.
+    assert spotify_client.get_track(spotify_id("track1")).name == "Mock Song One"
+    assert len(requests) == 2
+
+    # Searches that found nothing are cached too.
+    assert spotify_client.search_tracks("Nothing") == []
+    assert spotify_client.search_tracks("nothing") == []
+    assert len(requests) == 3
+
+def test_track_index():
+    mock_tracks = {t.id: t for t in MockSpotifyClient().tracks}
+    index = TrackIndex(max_tracks=4)
+    for track_id in ("track1", "track2", "track3", "track4"):
+        index.add(mock_tracks[track_id])
+
+    # Every word of the query is a prefix of a word of the name or artists.
+    assert [t.id for t in index.search("mock", 5)] == ["track1", "track3"]
+    assert [t.id for t in index.search("MOCK on", 5)] == ["track1"]
+    assert [t.id for t in index.search("anoth art", 5)] == ["track2"]
+    assert index.search("mock fourth", 5) == []
+    assert index.search("  ", 5) == []
+    assert len(index.search("t", 2)) == 2
+
+    # The most used tracks rank first.
+    index.set_uses({"track3": 2, "track1": 1})
+    assert [t.id for t in index.search("mock", 5)] == ["track3", "track1"]
+
+    # Beyond max_tracks, the tracks added least recently are dropped.
+    index.add(mock_tracks["track5"])
+    assert "track1" not in index
+    assert [t.id for t in index.search("mock", 5)] == ["track3"]
+    assert [t.id for t in index.search("fifth", 5)] == ["track5"]
+
+def test_search_tracks_local_index(real_spotify_client: SpotifyClient, monkeypatch: pytest.MonkeyPatch):
+    spotify_client = real_spotify_client
+    mock_tracks = real_mock_tracks()
+    requests: list[str] = []
+    def fake_request(method: str, endpoint: str, **kwargs):
+        requests.append(endpoint)
+        if endpoint == "/tracks":
+            return {"tracks": [mock_tracks[track_id].to_dict() for track_id in kwargs["params"]["ids"].split(",")]}
+        return {"tracks": {"items": [mock_tracks[spotify_id("track4")].to_dict()]}}
+    monkeypatch.setattr(spotify_client, "_spotify_api_request", fake_request)
+
+    # Seeding looks up the details of the most used tracks, in one batch.
+    assert spotify_client.claim_track_index_seed()
+    assert not spotify_client.claim_track_index_seed()
+    spotify_client.seed_track_index(lambda: {spotify_id("track3"): 2, spotify_id("track1"): 1})
+    assert requests == ["/tracks"]
+
+    # Enough local matches: Spotify is not searched.
+    hits_before = metrics.get_counter("spotify_track_index.hits")
+    assert [t.id for t in spotify_client.search_tracks("Mock", limit=2)] == [spotify_id("track3"), spotify_id("track1")]
+    assert requests == ["/tracks"]
+    assert metrics.get_counter("spotify_track_index.hits") == hits_before + 1
+    assert metrics.snapshot()["gauges"]["spotify_track_index.size"] == 2
+
+    # Otherwise Spotify's results are added after the local ones.
+    assert [t.id for t in spotify_client.search_tracks("Mock", limit=5)] == [spotify_id("track3"), spotify_id("track1"), spotify_id("track4")]
+    assert requests == ["/tracks", "/search"]
+
+    # Local tracks that only match a prefix never stop Spotify from being searched, and
+    # come after its results.
+    assert [t.id for t in spotify_client.search_tracks("Mo", limit=1)] == [spotify_id("track4")]
+    assert requests == ["/tracks", "/search", "/search"]
+    assert [t.id for t in spotify_client.search_tracks("Mock So", limit=3)] == [spotify_id("track4"), spotify_id("track3"), spotify_id("track1")]
+
+def test_track_cache_stale_while_revalidate(real_spotify_client: SpotifyClient, monkeypatch: pytest.MonkeyPatch):
+    spotify_client = real_spotify_client
+    now = [0.0]
+    spotify_client.track_cache.clock = lambda: now[0]
+    soft_ttl = spotify_client.track_cache.ttl_seconds
+    hard_ttl = soft_ttl + spotify_client.track_cache.stale_seconds
+    mock_tracks = real_mock_tracks()
+    track1, track2 = spotify_id("track1"), spotify_id("track2")
+    requests: list[list[str]] = []
+    def fake_request(method: str, endpoint: str, **kwargs):
+        track_ids = kwargs["params"]["ids"].split(",")
+        requests.append(track_ids)
+        tracks = [mock_tracks[track_id].to_dict() for track_id in track_ids]
+        for track in tracks:
+            track["name"] += f" v{len(requests)}"
+        return {"tracks": tracks}
+    monkeypatch.setattr(spotify_client, "_spotify_api_request", fake_request)
+
+    assert spotify_client.get_tracks([track1, track2])[track1].name == "Mock Song One v1"
+    assert requests == [[track1, track2]]
+
+    # Past the soft TTL: stale details are served, and refreshed in a single background batch.
+    now[0] += soft_ttl + 1
+    assert spotify_client.get_tracks([track1, track2, track1])[track1].name == "Mock Song One v1"
+    spotify_client._refresh_executor.shutdown(wait=True)
+    assert requests == [[track1, track2], [track1, track2]]
+    assert spotify_client.get_tracks([track1])[track1].name == "Mock Song One v2"
+
+    # Past the hard TTL: the look-up waits for Spotify, but expired details remain
+    # available as a fallback in the meantime.
+    now[0] += hard_ttl + 1
+    assert spotify_client.get_cached_tracks([track1])[track1].name == "Mock Song One v2"
+    assert spotify_client.get_tracks([track1])[track1].name == "Mock Song One v3"
+    assert requests[-1] == [track1]
+
+def test_missing_tracks_are_not_looked_up_again(real_spotify_client: SpotifyClient, monkeypatch: pytest.MonkeyPatch):
+    spotify_client = real_spotify_client
+    mock_tracks = real_mock_tracks()
+    track1, removed, unknown = spotify_id("track1"), spotify_id("removed"), spotify_id("unknown")
+    requests: list[str] = []
+    def fake_request(method: str, endpoint: str, **kwargs):
+        requests.append(endpoint)
+        if endpoint == f"/tracks/{unknown}":
+            raise SpotifyAPIError("Spotify API error 404", status_code=404)
+        return {"tracks": [mock_tracks[track_id].to_dict() if track_id in mock_tracks else None for track_id in kwargs["params"]["ids"].split(",")]}
+    monkeypatch.setattr(spotify_client, "_spotify_api_request", fake_request)
+
+    # Malformed IDs are rejected without any request.
+    with pytest.raises(SpotifyTrackNotFoundError):
+        spotify_client.get_track("not-a-track-id")
+    assert spotify_client.get_tracks(["track1", "spotify:track:x"]) == {}
+    assert requests == []
+
+    # Tracks Spotify does not know are remembered, whether looked up alone or in a batch.
+    for _ in range(2):
+        with pytest.raises(SpotifyTrackNotFoundError):
+            spotify_client.get_track(unknown)
+    assert requests == [f"/tracks/{unknown}"]
+    assert list(spotify_client.get_tracks([track1, removed])) == [track1]
+    assert list(spotify_client.get_tracks([removed, unknown])) == []
+    with pytest.raises(SpotifyTrackNotFoundError):
+        spotify_client.get_track(removed)
+    assert requests == [f"/tracks/{unknown}", "/tracks"]
+
+    # Until the entries expire.
+    spotify_client.missing_track_cache.clear()
+    assert list(spotify_client.get_tracks([removed])) == []
+    assert requests == [f"/tracks/{unknown}", "/tracks", "/tracks"]
+
+def test_search_seeds_track_index(client, app):
+    test_client, token, _ = client
+    tracks = [
+        {"track_position": 1, "track_text": None, "spotify_uri": "spotify:track:track1"},
+        {"track_position": 2, "track_text": None, "spotify_uri": "spotify:track:track2"},
+    ]
+    for mixtape_tracks in (tracks, tracks[1:]):
+        payload = {"name": "Mixtape", "intro_text": None, "is_public": True, "tracks": mixtape_tracks}
+        assert_response_created(test_client.post("/api/mixtape", json=payload, headers={"x-stack-access-token": token}))
+
+    # The index is seeded after the first search, which itself needs no database session.
+    def no_session():
+        raise AssertionError("Searches should not need a database session")
+    app.dependency_overrides[get_readonly_session] = no_session
+    mock_spotify: MockSpotifyClient = app.dependency_overrides[spotify.get_spotify_client]()
+    assert_response_success(test_client.get("/api/spotify/search?query=Mock"))
+    assert mock_spotify.track_uses == {"track2": 2, "track1": 1}
+    del app.dependency_overrides[get_readonly_session]
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict | None = None, headers: dict | None = None):
+        self.status_code = status_code
+        self.text = json.dumps(body) if body is not None else ""
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+@pytest.fixture
+def real_spotify_client(monkeypatch: pytest.MonkeyPatch) -> SpotifyClient:
+    for name in ("SPOTIFY_CLIENT_ID", "SPOTIFY_CLIENT_SECRET", "SPOTIFY_REFRESH_TOKEN"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setenv("SPOTIFY_RATE_LIMIT_PER_SECOND", "1000")
+    spotify_client = SpotifyClient()
+    monkeypatch.setattr(spotify_client, "_auth_headers", lambda: {})
+    return spotify_client
+
+def test_spotify_request_retries(real_spotify_client: SpotifyClient, monkeypatch: pytest.MonkeyPatch):
+    responses = [FakeResponse(429, headers={"Retry-After": "0"}), FakeResponse(503), FakeResponse(200, {"ok": True})]
+    sent: list[str] = []
+    def fake_request(method: str, url: str, **kwargs):
+        sent.append(url)
+        return responses.pop(0)
+    monkeypatch.setattr(real.requests, "request", fake_request)
+    sleeps: list[float] = []
+    real_spotify_client._sleep = sleeps.append
+
+    # 429s and 5xx are retried, with jittered backoff.
+    throttled_before = metrics.get_counter("spotify.throttled")
+    assert real_spotify_client._spotify_api_request("GET", "/me") == {"ok": True}
+    assert len(sent) == 3
+    assert len(sleeps) == 2
+    assert metrics.get_counter("spotify.throttled") == throttled_before + 1
+
+    # Other client errors are not.
+    responses.append(FakeResponse(404, {"error": "not found"}))
+    with pytest.raises(SpotifyAPIError) as exc_info:
+        real_spotify_client._spotify_api_request("GET", "/tracks/missing")
+    assert exc_info.value.status_code == 404
+    assert len(sent) == 4
+
+    # A Retry-After beyond the deadline fails straight away.
+    responses.append(FakeResponse(429, headers={"Retry-After": "60"}))
+    with pytest.raises(SpotifyAPIError) as exc_info:
+        real_spotify_client._spotify_api_request("GET", "/me")
+    assert exc_info.value.status_code == 429
+    assert len(sent) == 5
+    # ...and pauses every other request until then.
+    with spotify_deadline(1), pytest.raises(SpotifyDeadlineExceededError):
+        real_spotify_client._spotify_api_request("GET", "/me")
+    assert len(sent) == 5
+
+def test_spotify_post_is_not_retried(real_spotify_client: SpotifyClient, monkeypatch: pytest.MonkeyPatch):
+    responses: list[FakeResponse | None] = [FakeResponse(503), FakeResponse(429, headers={"Retry-After": "0"}), FakeResponse(201, {"id": "playlist"})]
+    sent: list[str] = []
+    def fake_request(method: str, url: str, **kwargs):
+        sent.append(url)
+        response = responses.pop(0)
+        if response is None:
+            raise requests.ConnectionError("connection reset")
+        return response
+    monkeypatch.setattr(real.requests, "request", fake_request)
+    real_spotify_client._sleep = lambda seconds: None
+
+    # The POST may have created the playlist already: 5xx and network errors are not retried...
+    with pytest.raises(SpotifyAPIError) as exc_info:
+        real_spotify_client._spotify_api_request("POST", "/users/me/playlists", json={})
+    assert exc_info.value.status_code == 503
+    assert len(sent) == 1
+    responses.insert(0, None)
+    with pytest.raises(SpotifyError):
+        real_spotify_client._spotify_api_request("POST", "/users/me/playlists", json={})
+    assert len(sent) == 2
+
+    # ...but a 429 means it was not handled at all.
+    assert real_spotify_client._spotify_api_request("POST", "/users/me/playlists", json={}) == {"id": "playlist"}
+    assert len(sent) == 4
+
+def test_spotify_circuit_breaker(real_spotify_client: SpotifyClient, monkeypatch: pytest.MonkeyPatch):
+    real_spotify_client.max_retries = 0
+    real_spotify_client.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    sent: list[str] = []
+    def failing_request(method: str, url: str, **kwargs):
+        sent.append(url)
+        raise requests.ConnectionError("connection refused")
+    monkeypatch.setattr(real.requests, "request", failing_request)
+
+    for _ in range(2):
+        with pytest.raises(SpotifyError):
+            real_spotify_client._spotify_api_request("GET", "/me")
+    assert metrics.snapshot()["gauges"]["spotify.breaker_state"] == 2
+    with pytest.raises(SpotifyUnavailableError):
+        real_spotify_client._spotify_api_request("GET", "/me")
+    assert len(sent) == 2
+
+    # Once reset_seconds have passed, a successful trial request closes it.
+    real_spotify_client.breaker.reset_seconds = 0
+    monkeypatch.setattr(real.requests, "request", lambda method, url, **kwargs: FakeResponse(200, {"ok": True}))
+    assert real_spotify_client._spotify_api_request("GET", "/me") == {"ok": True}
+    assert real_spotify_client.breaker.state == CircuitBreaker.CLOSED
+
+def test_spotify_circuit_breaker_recovers_from_failed_token_refresh(real_spotify_client: SpotifyClient, monkeypatch: pytest.MonkeyPatch):
+    real_spotify_client.max_retries = 0
+    real_spotify_client.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    real_spotify_client.breaker.record_failure()
+    assert real_spotify_client.breaker.state == CircuitBreaker.HALF_OPEN
+    def failing_auth_headers():
+        raise SpotifyAPIError("Failed to refresh the access token", status_code=400)
+    monkeypatch.setattr(real_spotify_client, "_auth_headers", failing_auth_headers)
+    monkeypatch.setattr(real.requests, "request", lambda method, url, **kwargs: FakeResponse(200, {"ok": True}))
+
+    # The failed trial is recorded, so the breaker lets the next trial through.
+    with pytest.raises(SpotifyAPIError):
+        real_spotify_client._spotify_api_request("GET", "/me")
+    assert real_spotify_client.breaker.state == CircuitBreaker.HALF_OPEN
+    monkeypatch.setattr(real_spotify_client, "_auth_headers", lambda: {})
+    assert real_spotify_client._spotify_api_request("GET", "/me") == {"ok": True}
+    assert real_spotify_client.breaker.state == CircuitBreaker.CLOSED
+
+def test_token_bucket_priority_lanes():
+    now = [0.0]
+    bucket = TokenBucket(rate=1, capacity=3, clock=lambda: now[0])
+    # Background requests leave the reserve to interactive ones.
+    assert bucket.try_acquire(reserve=1) == 0
+    assert bucket.try_acquire(reserve=1) == 0
+    assert bucket.try_acquire(reserve=1) == 1
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 1
+    now[0] += 1
+    assert bucket.try_acquire() == 0
+
+    bucket.pause_until(5)
+    assert bucket.try_acquire() == 4
+    now[0] = 10
+    assert bucket.try_acquire() == 0
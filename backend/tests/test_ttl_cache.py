@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.util.metrics import metrics
+from backend.util.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expiry_and_stale_while_revalidate() -> None:
+    clock = FakeClock()
+    executor = ThreadPoolExecutor(max_workers=1)
+    cache = TTLCache[str]("test_ttl_cache", max_entries=10, ttl_seconds=10, stale_seconds=20, executor=executor, clock=clock)
+    fetches: list[str] = []
+    def fetch() -> str:
+        fetches.append("a")
+        return f"value{len(fetches)}"
+
+    assert cache.get_or_fetch("a", fetch) == "value1"
+    clock.now += 5
+    assert cache.get_or_fetch("a", fetch) == "value1"
+    assert fetches == ["a"]
+
+    # Stale: served as is, and refreshed in the background.
+    clock.now += 10
+    refreshes_before = metrics.get_counter("test_ttl_cache.refreshes")
+    assert cache.get_or_fetch("a", fetch) == "value1"
+    executor.shutdown(wait=True)
+    assert fetches == ["a", "a"]
+    assert metrics.get_counter("test_ttl_cache.refreshes") == refreshes_before + 1
+    assert cache.get_or_fetch("a", fetch) == "value2"
+
+    # Expired: fetched while the caller waits.
+    clock.now += 31
+    assert cache.get("a") is None
+    assert cache.get_or_fetch("a", fetch) == "value3"
+
+def test_ttl_cache_negative_values_and_errors() -> None:
+    clock = FakeClock()
+    cache = TTLCache[list[int]]("test_ttl_cache", max_entries=10, ttl_seconds=100, stale_seconds=100, negative_ttl_seconds=10, is_negative=lambda v: not v, clock=clock)
+    cache.put("empty", [])
+    clock.now += 9
+    assert cache.get("empty") == []
+    clock.now += 1
+    assert cache.get("empty") is None
+
+    def fail() -> list[int]:
+        raise RuntimeError("upstream down")
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch("failing", fail)
+    assert cache.get_or_fetch("failing", lambda: [1]) == [1]
+
+    # Least recently used entries are evicted beyond max_entries.
+    small = TTLCache[int]("test_ttl_cache", max_entries=2, ttl_seconds=100, clock=clock)
+    small.put("a", 1)
+    small.put("b", 2)
+    assert small.get("a") == 1
+    small.put("c", 3)
+    assert small.get("b") is None
+    assert small.get("a") == 1
+
+def test_ttl_cache_single_flight() -> None:
+    cache = TTLCache[int]("test_ttl_cache", max_entries=10, ttl_seconds=100)
+    release = threading.Event()
+    calls: list[int] = []
+    def slow_fetch() -> int:
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.get_or_fetch, "key", slow_fetch) for _ in range(4)]
+        release.wait(0.1)
+        release.set()
+        assert [f.result() for f in futures] == [42, 42, 42, 42]
+    # Callers arriving during the fetch wait for it; those arriving after it hit the cache.
+    assert len(calls) == 1
@@ -0,0 +1,100 @@
+import gzip
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; without it, only gzip is offered.
+    brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+
+# Bodies smaller than this are sent uncompressed: compressing them saves too little to be
+# worth the CPU and the Content-Encoding overhead.
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 500))
+
+# Moderate levels, which get most of the size reduction of the maximum levels at a small
+# fraction of their CPU cost. Responses are compressed per request, unless cached.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Content types worth compressing; images and other binary formats are already compressed.
+_COMPRESSIBLE_CONTENT_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings() -> list[str]:
+    """Content encodings the server can produce, in order of preference."""
+    return [BROTLI, GZIP] if brotli is not None else [GZIP]
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Pick the content encoding for a response from the request's Accept-Encoding header
+    (RFC 9110 §12.5.3), or None to send it uncompressed.
+
+    Among the supported encodings the client accepts (with a non-zero q-value, either by
+    name or through "*"), the one with the highest q-value wins; ties go to the server's
+    preference (brotli, then gzip).
+    """
+    if not accept_encoding:
+        return None
+    qvalues: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.strip().lower()] = q
+
+    best: str | None = None
+    best_q = 0.0
+    for encoding in supported_encodings():
+        q = qvalues.get(encoding, qvalues.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: str | None) -> bool:
+    return content_type is not None and content_type.lower().startswith(_COMPRESSIBLE_CONTENT_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete body with the given (supported) encoding."""
+    if encoding == BROTLI and brotli is not None:
+        return bytes(brotli.compress(body, quality=BROTLI_QUALITY))
+    if encoding == GZIP:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+class StreamCompressor:
+    """
+    Incrementally compresses a streamed body. Each chunk is flushed as it is compressed,
+    so that streamed responses reach the client as they are produced rather than when
+    the compressor's buffer fills up.
+    """
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == BROTLI and brotli is not None:
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == GZIP:
+            self._gzip = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == BROTLI:
+            return bytes(self._brotli.process(chunk) + self._brotli.flush())
+        return self._gzip.compress(chunk) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == BROTLI:
+            return bytes(self._brotli.finish())
+        return self._gzip.flush(zlib.Z_FINISH)
@@ -0,0 +1,89 @@
+import os
+
+from fastapi import Request, Response
+
+from backend.util.compression import supported_encodings
+
+# A representation that can never change (e.g. a specific mixtape version) may be cached
+# for a year, the conventional maximum, and never revalidated.
+IMMUTABLE_MAX_AGE_SECONDS = 31536000
+
+
+def mixtape_etag(public_id: str, version: int, variant: str | None = None) -> str:
+    """
+    Strong ETag for a mixtape at a given version.
+
+    Every write to a mixtape bumps its version, so (public_id, version) identifies the
+    representation exactly, without hashing the response body. Other representations of
+    the same version (e.g. the compact one) are told apart by a variant.
+    """
+    if variant is not None:
+        return f'"{public_id}.v{version}.{variant}"'
+    return f'"{public_id}.v{version}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    The strong ETag of a representation sent with the given content encoding.
+
+    Different content codings of a representation must have different strong validators
+    (RFC 9110 §8.8.3), so the encoding is appended to the ETag of the uncompressed one:
+    e.g. "abc.v3" becomes "abc.v3.br".
+    """
+    return f'{etag[:-1]}.{encoding}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-None-Match header matches the given ETag (RFC 9110 §13.1.2),
+    i.e. whether the client's cached copy is current and a 304 can be returned.
+
+    If-None-Match uses weak comparison, so a W/ prefix on the client's tags is ignored.
+    The ETags of the compressed variants of the representation (see encoded_etag) match
+    too.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    etags = {etag, *(encoded_etag(etag, encoding) for encoding in supported_encodings())}
+    return any(tag.strip().removeprefix("W/") in etags for tag in header.split(","))
+
+
+def immutable_cache_control(is_shared: bool) -> str:
+    """
+    Cache-Control for an immutable representation. Only representations that anyone may
+    read are shareable by CDNs and other shared caches; the rest are cached by the
+    client only.
+    """
+    visibility = "public" if is_shared else "private"
+    return f"{visibility}, max-age={IMMUTABLE_MAX_AGE_SECONDS}, immutable"
+
+
+def mutable_cache_control(is_shared: bool) -> str:
+    """
+    Cache-Control for a representation that changes whenever it is written (e.g. the
+    current version of a mixtape).
+
+    Shared representations (readable by anyone, requested anonymously) are cached by
+    CDNs for MIXTAPE_CDN_MAX_AGE_SECONDS (s-maxage), then served stale for up to
+    MIXTAPE_CDN_STALE_WHILE_REVALIDATE_SECONDS while the CDN revalidates them in the
+    background; writes purge them from the CDN straight away. Browsers always revalidate
+    (max-age=0), which is cheap with If-None-Match.
+
+    Anything else is only cached by the client, and revalidated on every use.
+    """
+    if not is_shared:
+        return "private, no-cache"
+    s_maxage = int(os.environ.get("MIXTAPE_CDN_MAX_AGE_SECONDS", 60))
+    stale_while_revalidate = int(os.environ.get("MIXTAPE_CDN_STALE_WHILE_REVALIDATE_SECONDS", 600))
+    return f"public, max-age=0, s-maxage={s_maxage}, stale-while-revalidate={stale_while_revalidate}"
+
+
+def not_modified(etag: str, headers: dict[str, str] | None = None) -> Response:
+    """
+    Empty 304 Not Modified response for the given ETag, plus any other headers the full
+    response would have had (e.g. Cache-Control).
+    """
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
@@ -0,0 +1,20 @@
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized by pydantic-core (in Rust) rather than the stdlib json module.
+
+    It is the app's default response class. Its content may also be pydantic models (or
+    lists/dicts of them), which are serialized directly: handlers that already build their
+    response model can return `FastJSONResponse(model)` to skip FastAPI's response_model
+    round trip (dumping the model, validating the dump against the same model, then
+    encoding it again). The route's response_model then only documents the response.
+
+    Like JSONResponse, the output is compact UTF-8; NaN and infinities become null.
+    """
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content, inf_nan_mode="null")
@@ -0,0 +1,163 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Attributes every LogRecord has; any other attribute was passed through `extra` and is
+# included as a field of structured records.
+_STANDARD_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
+
+_listener: QueueListener | None = None
+
+
+class Truncated:
+    """
+    Log argument that is truncated to a maximum length when (and only if) the record is
+    formatted, e.g. `logger.debug("Response: %s", Truncated(body))`. Records that are
+    filtered out (by level or sampling) cost nothing, whatever the size of the value.
+
+    The value may also be a function producing it, so that even producing it (e.g.
+    decoding a response body) is skipped unless the record is emitted.
+    """
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int | None = None) -> None:
+        self.value = value
+        self.limit = limit if limit is not None else int(os.environ.get("LOG_MAX_VALUE_LENGTH", 1000))
+
+    def __str__(self) -> str:
+        text = str(self.value() if callable(self.value) else self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... ({len(text) - self.limit} more characters)"
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON objects: time, level, logger and message, the
+    formatted exception (if any), plus any fields passed through `extra`.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Already formatted, e.g. by StructuredQueueHandler.
+            entry["exception"] = record.exc_text
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps records structured for the handlers behind the queue.
+
+    The stock prepare() formats the whole record with this handler's formatter, merging
+    the traceback into the message, so JsonFormatter could no longer tell them apart.
+    Here the message and traceback are still rendered on the logging thread (as the
+    arguments may change once the call returns), but the traceback goes to exc_text,
+    which formatters output as is.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records below WARNING of some loggers (and their
+    children), e.g. {"backend.middleware.request_logging": 0.1} keeps 10% of the request
+    logs. Warnings and errors are always kept.
+    """
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+    def _rate(self, name: str) -> float:
+        # The most specific configured logger wins.
+        while True:
+            if name in self.rates:
+                return self.rates[name]
+            if "." not in name:
+                return self.rates.get("", 1.0)
+            name = name.rsplit(".", 1)[0]
+
+
+def _parse_logger_settings(setting: str | None) -> dict[str, str]:
+    """Parse "logger=value,other.logger=value" (as in LOG_LEVELS and LOG_SAMPLE_RATES)."""
+    settings: dict[str, str] = {}
+    for item in (setting or "").split(","):
+        name, sep, value = item.partition("=")
+        if sep:
+            settings[name.strip()] = value.strip()
+    return settings
+
+
+def configure_logging() -> None:
+    """
+    Configure logging from the environment:
+    - LOG_LEVEL: level of the root logger (default INFO).
+    - LOG_LEVELS: levels of specific loggers, e.g. "backend.client.spotify=DEBUG".
+    - LOG_SAMPLE_RATES: fraction of the records below WARNING to keep for specific
+      loggers, e.g. "backend.middleware.request_logging=0.1".
+    - LOG_FORMAT: "json" (default) for structured records, or "text".
+    - LOG_MAX_VALUE_LENGTH: length beyond which Truncated values are cut (default 1000).
+
+    Handlers are only installed if the runtime has not configured the root logger already
+    (e.g. uvicorn with --log-config). This is important on platforms like Vercel, where
+    the runtime might not configure logging. Records are handed to a queue, and written
+    to stderr by a listener thread, so that request handlers never block on log I/O.
+    Idempotent.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    for name, level in _parse_logger_settings(os.environ.get("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    if _listener is not None or root.handlers:
+        return
+
+    stream_handler = logging.StreamHandler()
+    if os.environ.get("LOG_FORMAT", "json") == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    # Sample before the record is queued, so that dropped records are never formatted.
+    sample_rates = {name: float(rate) for name, rate in _parse_logger_settings(os.environ.get("LOG_SAMPLE_RATES")).items()}
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued when the process exits.
+    atexit.register(_listener.stop)
@@ -0,0 +1,79 @@
+import threading
+from collections.abc import Callable
+from typing import Any
+
+
+class Timing:
+    """Aggregate of observed durations (count, total and max, in seconds)."""
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_seconds": self.total_seconds,
+            "max_seconds": self.max_seconds,
+            "avg_seconds": self.total_seconds / self.count if self.count else 0.0,
+        }
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry (counters, gauges and timings).
+
+    Values live in process memory only; they are exposed through /api/health/metrics.
+    Gauges that are cheaper to compute on demand (e.g. connection pool usage) can be
+    registered as collectors, which are evaluated whenever a snapshot is taken.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+        self._timings: dict[str, Timing] = {}
+        self._collectors: dict[str, Callable[[], dict[str, float]]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = Timing()
+            timing.observe(seconds)
+
+    def register_collector(self, name: str, collector: Callable[[], dict[str, float]]) -> None:
+        """Register (or replace) a callback returning gauge values to include in snapshots."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def get_counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timings = {name: timing.to_dict() for name, timing in self._timings.items()}
+            collectors = list(self._collectors.values())
+        # Collectors are called outside the lock, as they may take locks of their own.
+        for collector in collectors:
+            gauges.update(collector())
+        return {"counters": counters, "gauges": gauges, "timings": timings}
+
+
+# Process-wide metrics registry.
+metrics = Metrics()
@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from backend.util.compression import compress
+from backend.util.metrics import metrics
+from backend.util.single_flight import SingleFlight
+
+
+class _Entry:
+    """A cached body, plus the compressed variants of it that have been requested."""
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.encoded: dict[str, bytes] = {}
+
+
+class ResponseCache:
+    """
+    Bounded in-process LRU cache of serialized response bodies.
+
+    Entries are never invalidated explicitly: keys must identify the content exactly
+    (e.g. a mixtape's public ID and version, which every write bumps), so that a stale
+    entry is simply never looked up again and ages out of the LRU.
+
+    Concurrent misses for the same key are collapsed into a single build, so a burst of
+    requests for an uncached key (e.g. a freshly shared link) only builds it once.
+    Compressed variants of a cached body are cached alongside it, so that a body is only
+    compressed once per content encoding rather than on every response.
+
+    Hits, misses, shared builds and compressions are counted in the metrics registry
+    under `name`.
+    """
+    def __init__(self, name: str, max_entries: int) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._builds = SingleFlight()
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)  # Mark as most recently used
+        metrics.increment(f"{self.name}.hits" if entry is not None else f"{self.name}.misses")
+        return entry.body if entry is not None else None
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = _Entry(body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Remove least recently used
+
+    def get_or_build(self, key: Hashable, build: Callable[[], bytes | None]) -> bytes | None:
+        """
+        Return the cached body for the key, or build it (once across concurrent callers).
+
+        The build function is responsible for storing what it built (with put), as it may
+        find content for a different key than the one requested (e.g. a newer version);
+        it returns the body for the requested key, or None if there is none.
+        """
+        body = self.get(key)
+        if body is not None:
+            return body
+        built, shared = self._builds.do(key, build)
+        if shared:
+            metrics.increment(f"{self.name}.shared_builds")
+        return bytes(built) if built is not None else None
+
+    def get_encoded(self, key: Hashable, body: bytes, encoding: str) -> bytes:
+        """
+        The body (as returned for the key) compressed with the given content encoding,
+        compressed on first use and then cached with the body.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            encoded = entry.encoded.get(encoding) if entry is not None and entry.body is body else None
+        if encoded is not None:
+            return encoded
+        # Compress outside the lock; concurrent first uses may compress twice, harmlessly.
+        encoded = compress(body, encoding)
+        metrics.increment(f"{self.name}.compressions")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.body is body:
+                entry.encoded[encoding] = encoded
+        return encoded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
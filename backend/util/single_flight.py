@@ -0,0 +1,53 @@
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class _Call:
+    """An in-flight call, shared by the caller running it and those waiting on it."""
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into a single call (like Go's
+    singleflight package).
+
+    The first caller for a key runs the function; callers arriving while it runs wait for
+    it and get its result, or its exception, instead of running the function themselves.
+    Once the call finishes, the next caller for the key starts a new one.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Run fn for the key, or wait for the call already running for it.
+        Returns the result and whether it was shared with (i.e. computed by) another caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
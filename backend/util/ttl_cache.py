@@ -0,0 +1,208 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import cast
+
+from backend.util.metrics import metrics
+from backend.util.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry[V]:
+    """A cached value, fresh until fresh_until and servable (stale) until stale_until."""
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: V, fresh_until: float, stale_until: float) -> None:
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class TTLCache[V]:
+    """
+    Bounded in-process LRU cache of values fetched from a slow source (e.g. an upstream
+    API), which expire after a while.
+
+    - Fresh values (fetched less than ttl_seconds ago) are returned as is.
+    - Stale values (fetched less than ttl_seconds + stale_seconds ago) are returned as is
+      too, but a refresh is scheduled in the background (stale-while-revalidate), at most
+      one per key at a time.
+    - Otherwise the value is fetched while the caller waits. Concurrent misses for the
+      same key are collapsed into a single fetch.
+
+    Negative values (as told by is_negative, e.g. empty search results) are cached for
+    negative_ttl_seconds instead, and never served stale, so that a source that starts
+    returning something is picked up soon. Failed fetches are not cached at all.
+
+    Hits, stale hits, misses, shared fetches and refreshes are counted in the metrics
+    registry under `name`.
+    """
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl_seconds: float,
+        stale_seconds: float = 0.0,
+        negative_ttl_seconds: float | None = None,
+        is_negative: Callable[[V], bool] | None = None,
+        executor: Executor | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds if negative_ttl_seconds is not None else ttl_seconds
+        self.is_negative = is_negative
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, _Entry[V]] = OrderedDict()
+        self._fetches = SingleFlight()
+        self._refreshing: set[Hashable] = set()
+        self._executor = executor
+
+    def get(self, key: Hashable, include_expired: bool = False) -> V | None:
+        """
+        The cached value for the key, fresh or stale, without fetching or refreshing it.
+        With include_expired, expired values (which are kept until evicted) are returned
+        too, e.g. as a fallback when the source is unavailable.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry.stale_until <= self.clock() and not include_expired):
+                return None
+            self._entries.move_to_end(key)  # Mark as most recently used
+            return entry.value
+
+    def get_many[K: Hashable](self, keys: list[K]) -> tuple[dict[K, V], list[K]]:
+        """
+        The cached values (fresh or stale) of the given keys, for callers that fetch
+        several keys at once (see refresh_many). Also returns the keys whose values are
+        stale and not being refreshed yet: the caller should pass them to refresh_many,
+        as they are now marked as being refreshed.
+        """
+        now = self.clock()
+        values: dict[K, V] = {}
+        to_refresh: list[K] = []
+        stale = 0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry.stale_until <= now:
+                    continue
+                self._entries.move_to_end(key)  # Mark as most recently used
+                values[key] = entry.value
+                if entry.fresh_until <= now:
+                    stale += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        to_refresh.append(key)
+        metrics.increment(f"{self.name}.hits", len(values) - stale)
+        metrics.increment(f"{self.name}.stale_hits", stale)
+        metrics.increment(f"{self.name}.misses", len(keys) - len(values))
+        return values, to_refresh
+
+    def refresh_many[K: Hashable](self, keys: list[K], fetch: Callable[[list[K]], dict[K, V]]) -> None:
+        """
+        Refresh the values of the given keys (as returned by get_many) in the background,
+        with a single call of fetch, which returns the values it found by key.
+        """
+        def refresh() -> None:
+            try:
+                for key, value in fetch(keys).items():
+                    self.put(key, value)
+                metrics.increment(f"{self.name}.refreshes", len(keys))
+            except Exception:
+                metrics.increment(f"{self.name}.refresh_failures", len(keys))
+                logger.warning("Failed to refresh %d %s entries", len(keys), self.name, exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(keys)
+
+        self._submit(refresh, keys)
+
+    def put(self, key: Hashable, value: V) -> None:
+        """Cache a value obtained elsewhere (e.g. written through from a related request)."""
+        if self.max_entries <= 0:
+            return
+        now = self.clock()
+        if self.is_negative is not None and self.is_negative(value):
+            entry = _Entry(value, now + self.negative_ttl_seconds, now + self.negative_ttl_seconds)
+        else:
+            entry = _Entry(value, now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Remove least recently used
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], V]) -> V:
+        """
+        Return the cached value for the key, or fetch (and cache) it, as described above.
+        Exceptions raised by fetch are propagated to every caller waiting on it.
+        """
+        now = self.clock()
+        hit: _Entry[V] | None = None
+        is_stale = refresh = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stale_until > now:
+                hit = entry
+                self._entries.move_to_end(key)  # Mark as most recently used
+                is_stale = entry.fresh_until <= now
+                refresh = is_stale and key not in self._refreshing
+                if refresh:
+                    self._refreshing.add(key)
+        if hit is not None:
+            metrics.increment(f"{self.name}.stale_hits" if is_stale else f"{self.name}.hits")
+            if refresh:
+                self._refresh_in_background(key, fetch)
+            return hit.value
+
+        metrics.increment(f"{self.name}.misses")
+        value, shared = self._fetches.do(key, lambda: self._fetch_and_put(key, fetch))
+        if shared:
+            metrics.increment(f"{self.name}.shared_fetches")
+        return cast(V, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _fetch_and_put(self, key: Hashable, fetch: Callable[[], V]) -> V:
+        value = fetch()
+        self.put(key, value)
+        return value
+
+    def _refresh_in_background(self, key: Hashable, fetch: Callable[[], V]) -> None:
+        def refresh() -> None:
+            try:
+                self._fetches.do(key, lambda: self._fetch_and_put(key, fetch))
+                metrics.increment(f"{self.name}.refreshes")
+            except Exception:
+                # The stale value is still served until it expires; the next stale hit
+                # will try again.
+                metrics.increment(f"{self.name}.refresh_failures")
+                logger.warning("Failed to refresh %s entry %r", self.name, key, exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._submit(refresh, [key])
+
+    def _submit(self, refresh: Callable[[], None], keys: list) -> None:
+        if self._executor is None:
+            # Created on first use, so that caches that are never stale start no threads.
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix=self.name)
+        try:
+            self._executor.submit(refresh)
+        except RuntimeError:
+            # The executor has been shut down (e.g. at exit); skip the refresh.
+            with self._lock:
+                self._refreshing.difference_update(keys)
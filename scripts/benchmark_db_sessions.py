@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark sync vs. async database sessions.
+
+Serves the same "list my mixtapes" query through two otherwise identical endpoints, one
+using a sync session (run in FastAPI's thread pool) and one using an async session (run
+on the event loop), and reports requests per second for each within a single worker.
+
+An optional artificial per-request database latency (pg_sleep) approximates the round
+trip to a remote managed Postgres, which is where the async path pays off.
+
+Usage:
+    python scripts/benchmark_db_sessions.py --requests 2000 --concurrency 100 --db-latency-ms 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from uuid import uuid4
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import Depends
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app_factory import create_app
+from backend.db_models.mixtape import Mixtape
+from backend.middleware.db_conn.dependency_helpers import get_async_readonly_session, get_readonly_session
+from backend.middleware.db_conn.global_db_conn import get_current_engine
+from backend.query.mixtape import AsyncMixtapeQuery, MixtapeQuery
+
+BENCHMARK_USER_ID = "benchmark-user"
+
+
+def seed_mixtapes(count: int) -> None:
+    with Session(get_current_engine()) as session:
+        for i in range(count):
+            session.add(Mixtape(stack_auth_user_id=BENCHMARK_USER_ID, public_id=str(uuid4()), name=f"Benchmark {i}", is_public=True))
+        session.commit()
+
+
+def delete_mixtapes() -> None:
+    with Session(get_current_engine()) as session:
+        session.execute(delete(Mixtape).where(Mixtape.stack_auth_user_id == BENCHMARK_USER_ID))  # type: ignore[arg-type]
+        session.commit()
+
+
+async def run_load(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request() -> None:
+        async with semaphore:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    load_dotenv('.env.local')
+    # Keep per-request client logging out of the benchmark output.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=1000, help='Requests to send per mode')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent in-flight requests')
+    parser.add_argument('--db-latency-ms', type=float, default=0.0, help='Artificial database latency added to each request')
+    parser.add_argument('--mixtapes', type=int, default=20, help='Mixtapes to seed for the benchmark user')
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("Error: DATABASE_URL environment variable not set")
+        sys.exit(1)
+
+    app = create_app(database_url)
+    SQLModel.metadata.create_all(get_current_engine())
+    sleep_statement = text("SELECT pg_sleep(:seconds)").bindparams(seconds=args.db_latency_ms / 1000)
+
+    @app.get("/benchmark/sync")
+    def list_sync(session: Session = Depends(get_readonly_session)):
+        session.execute(sleep_statement)
+        mixtapes = MixtapeQuery(session=session, options=[]).list_mixtapes_for_user(BENCHMARK_USER_ID)
+        return [m.public_id for m in mixtapes]
+
+    @app.get("/benchmark/async")
+    async def list_async(session: AsyncSession = Depends(get_async_readonly_session)):
+        await session.execute(sleep_statement)
+        mixtapes = await AsyncMixtapeQuery(session=session, options=[]).list_mixtapes_for_user(BENCHMARK_USER_ID)
+        return [m.public_id for m in mixtapes]
+
+    async def benchmark() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for mode in ("sync", "async"):
+                # Warm up the connection pool before measuring.
+                await run_load(client, f"/benchmark/{mode}", min(args.concurrency, args.requests), args.concurrency)
+                rps = await run_load(client, f"/benchmark/{mode}", args.requests, args.concurrency)
+                print(f"{mode:>5}: {rps:8.1f} requests/second (concurrency={args.concurrency}, db latency={args.db_latency_ms}ms)")
+
+    seed_mixtapes(args.mixtapes)
+    try:
+        asyncio.run(benchmark())
+    finally:
+        delete_mixtapes()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark JSON response serialization.
+
+For the payloads of the mixtape, search and list endpoints, compares FastAPI's default
+response path (dump the returned model, validate the dump against the response_model,
+then encode it with the stdlib json module in JSONResponse) with FastJSONResponse, which
+serializes the returned models directly with pydantic-core. Reports microseconds per
+response for each.
+
+No database or network is involved: only the serialization work of a single response
+is measured.
+
+Usage:
+    python scripts/benchmark_json_responses.py --iterations 2000 --tracks 50
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+# Add the project root to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.api_models.mixtape import (
+    MixtapeOverview,
+    MixtapeResponse,
+    MixtapeTrackResponse,
+)
+from backend.api_models.spotify import (
+    TrackAlbum,
+    TrackAlbumImage,
+    TrackArtist,
+    TrackDetails,
+)
+from backend.util.json_response import FastJSONResponse
+
+
+def track_details(i: int) -> TrackDetails:
+    return TrackDetails(
+        id=f"track{i}",
+        name=f"Benchmark Song {i}",
+        artists=[TrackArtist(name=f"Artist {i}"), TrackArtist(name="Featured Artist")],
+        album=TrackAlbum(
+            name=f"Album {i}",
+            images=[TrackAlbumImage(url=f"https://i.scdn.co/image/{i}-{size}", width=size, height=size) for size in (640, 300, 64)],
+        ),
+        uri=f"spotify:track:track{i}",
+    )
+
+
+def mixtape_response(tracks: int) -> MixtapeResponse:
+    return MixtapeResponse(
+        public_id="00000000-0000-0000-0000-000000000000",
+        name="Benchmark Mixtape",
+        intro_text="An intro text long enough to be representative. " * 5,
+        subtitle1="Subtitle one",
+        subtitle2="Subtitle two",
+        subtitle3=None,
+        is_public=True,
+        create_time="2025-01-01T00:00:00+00:00",
+        last_modified_time="2025-01-01T00:00:00+00:00",
+        stack_auth_user_id="benchmark-user",
+        version=1,
+        spotify_playlist_url=None,
+        tracks=[MixtapeTrackResponse(track_position=i + 1, track_text=f"Why I picked song {i}", track=track_details(i)) for i in range(tracks)],
+        can_undo=False,
+        can_redo=False,
+    )
+
+
+def default_path(response_model: Any) -> Callable[[Any], bytes]:
+    """FastAPI's path for a handler returning `content` from a route with response_model."""
+    field = create_model_field(name="Response", type_=response_model, mode="serialization")
+
+    def render(content: Any) -> bytes:
+        # serialize_response never actually awaits for coroutine handlers, so drive it
+        # directly rather than paying for an event loop per call.
+        coroutine = serialize_response(field=field, response_content=content, is_coroutine=True)
+        try:
+            coroutine.send(None)
+        except StopIteration as done:
+            return JSONResponse(done.value).body
+        raise RuntimeError("serialize_response unexpectedly suspended")
+    return render
+
+
+def fast_path(content: Any) -> bytes:
+    return FastJSONResponse(content).body
+
+
+def time_per_call(render: Callable[[Any], bytes], content: Any, iterations: int) -> float:
+    render(content)  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render(content)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=1000, help='Responses to serialize per endpoint and path')
+    parser.add_argument('--tracks', type=int, default=50, help='Tracks in the mixtape response')
+    parser.add_argument('--search-results', type=int, default=5, help='Tracks in the search response')
+    parser.add_argument('--mixtapes', type=int, default=20, help='Mixtapes in the list response')
+    args = parser.parse_args()
+
+    payloads: list[tuple[str, Any, Any]] = [
+        (f"mixtape ({args.tracks} tracks)", MixtapeResponse, mixtape_response(args.tracks)),
+        (f"search ({args.search_results} results)", list[TrackDetails], [track_details(i) for i in range(args.search_results)]),
+        (f"list ({args.mixtapes} mixtapes)", list[MixtapeOverview], [
+            MixtapeOverview(public_id=f"mixtape-{i}", name=f"Mixtape {i}", last_modified_time="2025-01-01T00:00:00+00:00")
+            for i in range(args.mixtapes)
+        ]),
+    ]
+    for name, response_model, content in payloads:
+        default_render = default_path(response_model)
+        assert default_render(content) == fast_path(content), f"{name}: both paths must produce the same JSON"
+        default_us = time_per_call(default_render, content, args.iterations)
+        fast_us = time_per_call(fast_path, content, args.iterations)
+        print(f"{name:>24}: default {default_us:8.1f}us, fast {fast_us:8.1f}us ({default_us / fast_us:.1f}x)")
+
+if __name__ == "__main__":
+    main()